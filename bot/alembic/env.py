@@ -17,6 +17,12 @@ from db.models.search_sessions import SearchSession
 from db.models.bookings import Booking
 from db.models.booking_types import BookingType
 from db.models.booking_chat import BookingChat
+from db.models.availability import Availability
+from db.models.saved_searches import SavedSearch
+from db.models.search_funnel_daily import SearchFunnelDaily
+from db.models.outbox import OutboxMessage
+from db.models.broadcasts import BroadcastCampaign, BroadcastDelivery
+from db.models.static_media import StaticMedia
 
 from db.models.images import Image
 
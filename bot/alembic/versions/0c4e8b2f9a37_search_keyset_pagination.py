@@ -0,0 +1,41 @@
+"""search keyset pagination
+
+Revision ID: 0c4e8b2f9a37
+Revises: f7b2d9e4a610
+Create Date: 2026-10-18 16:05:32.918466
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0c4e8b2f9a37'
+down_revision: Union[str, Sequence[str], None] = 'f7b2d9e4a610'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'search_sessions',
+        sa.Column('cursor', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        schema='public'
+    )
+    # Индекс под ORDER BY выдачи (обратный проход даёт DESC): первая страница и
+    # каждая следующая по курсору (row comparison) читаются без сортировки всей выдачи
+    op.execute("""
+        CREATE INDEX idx_apartments_search_order
+        ON apartments.apartments (price, coalesce(created_at, '-infinity'::timestamp), id)
+        WHERE is_active AND NOT is_draft
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS apartments.idx_apartments_search_order")
+    op.drop_column('search_sessions', 'cursor', schema='public')
@@ -0,0 +1,53 @@
+"""booking notifications outbox
+
+Revision ID: 4a8e2c6b1f03
+Revises: 9d3f6a1c2e58
+Create Date: 2026-10-18 18:11:46.730215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4a8e2c6b1f03'
+down_revision: Union[str, Sequence[str], None] = '9d3f6a1c2e58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'outbox',
+        sa.Column('id', sa.BigInteger(), nullable=False),
+        sa.Column('chat_id', sa.BIGINT(), nullable=False),
+        sa.Column('kind', sa.String(length=64), nullable=False),
+        sa.Column('booking_id', sa.Integer(), nullable=True),
+        sa.Column('text', sa.Text(), nullable=False),
+        sa.Column('parse_mode', sa.String(length=16), nullable=True),
+        sa.Column('reply_markup', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('pin', sa.Boolean(), server_default=sa.text('false'), nullable=False),
+        sa.Column('attempts', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('last_error', sa.String(length=255), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('sent_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('failed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['booking_id'], ['public.bookings.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+        schema='public'
+    )
+    op.create_index(
+        'idx_outbox_pending', 'outbox', ['next_attempt_at'],
+        unique=False, schema='public', postgresql_where=sa.text('sent_at IS NULL AND failed_at IS NULL')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_outbox_pending', table_name='outbox', schema='public')
+    op.drop_table('outbox', schema='public')
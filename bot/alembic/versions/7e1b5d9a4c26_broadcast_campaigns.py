@@ -0,0 +1,62 @@
+"""broadcast campaigns
+
+Revision ID: 7e1b5d9a4c26
+Revises: 4a8e2c6b1f03
+Create Date: 2026-10-18 19:03:52.184770
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e1b5d9a4c26'
+down_revision: Union[str, Sequence[str], None] = '4a8e2c6b1f03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'broadcast_campaigns',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('text', sa.Text(), nullable=False),
+        sa.Column('image_path', sa.String(length=255), nullable=True),
+        sa.Column('photo_file_id', sa.String(length=255), nullable=True),
+        sa.Column('status', sa.String(length=16), server_default=sa.text("'running'"), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name'),
+        schema='public'
+    )
+    op.create_table(
+        'broadcast_deliveries',
+        sa.Column('id', sa.BigInteger(), nullable=False),
+        sa.Column('campaign_id', sa.Integer(), nullable=False),
+        sa.Column('tg_user_id', sa.BIGINT(), nullable=False),
+        sa.Column('status', sa.String(length=16), server_default=sa.text("'pending'"), nullable=False),
+        sa.Column('attempts', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.Column('message_id', sa.BigInteger(), nullable=True),
+        sa.Column('error', sa.String(length=255), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['campaign_id'], ['public.broadcast_campaigns.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('campaign_id', 'tg_user_id', name='uq_broadcast_deliveries_campaign_user'),
+        schema='public'
+    )
+    op.create_index(
+        'idx_broadcast_deliveries_pending', 'broadcast_deliveries', ['campaign_id', 'id'],
+        unique=False, schema='public', postgresql_where=sa.text("status = 'pending'")
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_broadcast_deliveries_pending', table_name='broadcast_deliveries', schema='public')
+    op.drop_table('broadcast_deliveries', schema='public')
+    op.drop_table('broadcast_campaigns', schema='public')
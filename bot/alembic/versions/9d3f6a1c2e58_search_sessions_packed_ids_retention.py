@@ -0,0 +1,173 @@
+"""search_sessions packed ids and retention
+
+Revision ID: 9d3f6a1c2e58
+Revises: 0c4e8b2f9a37
+Create Date: 2026-10-18 17:20:11.402913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d3f6a1c2e58'
+down_revision: Union[str, Sequence[str], None] = '0c4e8b2f9a37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Сколько дней хранятся сырые строки search_sessions
+RETENTION_DAYS = 30
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('search_sessions', sa.Column('result_count', sa.Integer(), nullable=True), schema='public')
+    op.execute("UPDATE public.search_sessions SET result_count = cardinality(apartment_ids)")
+
+    # int[] -> varint bytea (формат db.models.search_sessions.pack_ids)
+    op.execute(
+        """
+        CREATE FUNCTION pg_temp.pack_ids(ids integer[]) RETURNS bytea
+        LANGUAGE plpgsql IMMUTABLE AS $$
+        DECLARE
+            packed bytea := ''::bytea;
+            v integer;
+        BEGIN
+            IF ids IS NULL THEN
+                RETURN NULL;
+            END IF;
+            FOREACH v IN ARRAY ids LOOP
+                WHILE v >= 128 LOOP
+                    packed := packed || set_byte('\\x00'::bytea, 0, (v & 127) | 128);
+                    v := v >> 7;
+                END LOOP;
+                packed := packed || set_byte('\\x00'::bytea, 0, v);
+            END LOOP;
+            RETURN packed;
+        END;
+        $$
+        """
+    )
+    op.execute(
+        """
+        ALTER TABLE public.search_sessions
+        ALTER COLUMN apartment_ids TYPE bytea USING pg_temp.pack_ids(apartment_ids)
+        """
+    )
+    # Для выборки старых строк заданием очистки
+    op.create_index('idx_search_sessions_created_at', 'search_sessions', ['created_at'], unique=False, schema='public')
+
+    op.create_table(
+        'search_funnel_daily',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('searches', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.Column('users', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.Column('with_results', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.Column('browsed', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.Column('saved', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.Column('results_total', sa.BigInteger(), server_default=sa.text('0'), nullable=False),
+        sa.Column('cards_viewed', sa.BigInteger(), server_default=sa.text('0'), nullable=False),
+        sa.PrimaryKeyConstraint('day'),
+        schema='public'
+    )
+
+    # Сворачивает строки старше keep_days в дневные агрегаты и удаляет их.
+    # Запускается раз в сутки, поэтому каждый день сворачивается целиком за один проход.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION public.rollup_search_sessions(keep_days integer)
+        RETURNS integer LANGUAGE plpgsql AS $$
+        DECLARE
+            cutoff timestamptz := date_trunc('day', now()) - make_interval(days => keep_days);
+            deleted integer;
+        BEGIN
+            INSERT INTO public.search_funnel_daily AS d
+                (day, searches, users, with_results, browsed, saved, results_total, cards_viewed)
+            SELECT s.created_at::date,
+                   count(*),
+                   count(DISTINCT s.tg_user_id),
+                   count(*) FILTER (WHERE s.result_count > 0),
+                   count(*) FILTER (WHERE s.current_index > 0),
+                   count(*) FILTER (WHERE EXISTS (
+                       SELECT 1 FROM public.saved_searches ss WHERE ss.search_session_id = s.id
+                   )),
+                   coalesce(sum(s.result_count), 0),
+                   coalesce(sum(s.current_index + 1) FILTER (WHERE s.result_count > 0), 0)
+              FROM public.search_sessions s
+             WHERE s.created_at < cutoff
+             GROUP BY s.created_at::date
+            ON CONFLICT (day) DO UPDATE SET
+                searches = d.searches + EXCLUDED.searches,
+                users = d.users + EXCLUDED.users,
+                with_results = d.with_results + EXCLUDED.with_results,
+                browsed = d.browsed + EXCLUDED.browsed,
+                saved = d.saved + EXCLUDED.saved,
+                results_total = d.results_total + EXCLUDED.results_total,
+                cards_viewed = d.cards_viewed + EXCLUDED.cards_viewed;
+
+            DELETE FROM public.search_sessions WHERE created_at < cutoff;
+            GET DIAGNOSTICS deleted = ROW_COUNT;
+            RETURN deleted;
+        END;
+        $$
+        """
+    )
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_cron")
+    op.execute(
+        f"""
+        SELECT cron.schedule(
+            'search_sessions_rollup', '40 0 * * *',
+            'SELECT public.rollup_search_sessions({RETENTION_DAYS})'
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(
+        "SELECT cron.unschedule(jobid) FROM cron.job WHERE jobname = 'search_sessions_rollup'"
+    )
+    op.execute("DROP FUNCTION IF EXISTS public.rollup_search_sessions(integer)")
+    op.drop_table('search_funnel_daily', schema='public')
+    op.drop_index('idx_search_sessions_created_at', table_name='search_sessions', schema='public')
+    op.drop_column('search_sessions', 'result_count', schema='public')
+
+    op.execute(
+        """
+        CREATE FUNCTION pg_temp.unpack_ids(packed bytea) RETURNS integer[]
+        LANGUAGE plpgsql IMMUTABLE AS $$
+        DECLARE
+            ids integer[] := '{}';
+            v integer := 0;
+            shift integer := 0;
+            b integer;
+        BEGIN
+            IF packed IS NULL THEN
+                RETURN NULL;
+            END IF;
+            FOR i IN 0 .. length(packed) - 1 LOOP
+                b := get_byte(packed, i);
+                v := v | ((b & 127) << shift);
+                IF b < 128 THEN
+                    ids := ids || v;
+                    v := 0;
+                    shift := 0;
+                ELSE
+                    shift := shift + 7;
+                END IF;
+            END LOOP;
+            RETURN ids;
+        END;
+        $$
+        """
+    )
+    op.execute(
+        """
+        ALTER TABLE public.search_sessions
+        ALTER COLUMN apartment_ids TYPE integer[] USING pg_temp.unpack_ids(apartment_ids)
+        """
+    )
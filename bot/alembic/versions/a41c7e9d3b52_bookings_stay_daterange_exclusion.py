@@ -0,0 +1,73 @@
+"""bookings stay daterange exclusion
+
+Revision ID: a41c7e9d3b52
+Revises: d6b2baffd95a
+Create Date: 2026-10-18 10:12:04.518233
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a41c7e9d3b52'
+down_revision: Union[str, Sequence[str], None] = 'd6b2baffd95a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # btree_gist нужен для оператора = по apartment_id внутри GiST
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+
+    op.add_column(
+        'bookings',
+        sa.Column(
+            'stay',
+            postgresql.DATERANGE(),
+            sa.Computed("daterange(check_in, check_out, '[)')", persisted=True),
+            nullable=True
+        ),
+        schema='public'
+    )
+    op.create_index(
+        'idx_booking_apartment_stay', 'bookings', ['apartment_id', 'stay'],
+        unique=False, schema='public', postgresql_using='gist'
+    )
+
+    # Уже существующие пересечения не дадут создать ограничение — показываем их явно
+    conflicts = op.get_bind().execute(sa.text(
+        """
+        SELECT a.id, b.id
+        FROM public.bookings a
+        JOIN public.bookings b
+          ON a.apartment_id = b.apartment_id
+         AND a.id < b.id
+         AND a.stay && b.stay
+        WHERE a.status_id IN (5, 6, 7) AND b.status_id IN (5, 6, 7)
+        """
+    )).fetchall()
+    if conflicts:
+        raise RuntimeError(
+            f"Overlapping active bookings must be resolved before migration: {conflicts[:20]}"
+        )
+
+    op.execute(
+        """
+        ALTER TABLE public.bookings
+        ADD CONSTRAINT excl_booking_apartment_stay
+        EXCLUDE USING gist (apartment_id WITH =, stay WITH &&)
+        WHERE (status_id IN (5, 6, 7))
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE public.bookings DROP CONSTRAINT IF EXISTS excl_booking_apartment_stay")
+    op.drop_index('idx_booking_apartment_stay', table_name='bookings', schema='public', postgresql_using='gist')
+    op.drop_column('bookings', 'stay', schema='public')
@@ -0,0 +1,137 @@
+"""apartments nightly availability
+
+Revision ID: b7f3d1c8e604
+Revises: a41c7e9d3b52
+Create Date: 2026-10-18 11:03:27.904115
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7f3d1c8e604'
+down_revision: Union[str, Sequence[str], None] = 'a41c7e9d3b52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('availability',
+    sa.Column('apartment_id', sa.Integer(), nullable=False),
+    sa.Column('night', sa.Date(), nullable=False),
+    sa.Column('is_blocked', sa.Boolean(), server_default=sa.text('false'), nullable=False),
+    sa.ForeignKeyConstraint(['apartment_id'], ['apartments.apartments.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('apartment_id', 'night'),
+    schema='apartments'
+    )
+    op.create_index(
+        'idx_availability_blocked_night', 'availability', ['night', 'apartment_id'],
+        unique=False, schema='apartments', postgresql_where=sa.text('is_blocked')
+    )
+
+    # Пересчёт ночей [p_from, p_to) одной квартиры по блокирующим броням (5/6/7).
+    # Прошедшие ночи не храним, верхнюю границу не режем: бронь за горизонтом тоже видна поиску
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION apartments.refresh_availability_range(
+            p_apartment_id integer, p_from date, p_to date
+        ) RETURNS void LANGUAGE sql AS $$
+            INSERT INTO apartments.availability (apartment_id, night, is_blocked)
+            SELECT p_apartment_id, gs.night::date,
+                   EXISTS (
+                       SELECT 1 FROM public.bookings b
+                       WHERE b.apartment_id = p_apartment_id
+                         AND b.status_id IN (5, 6, 7)
+                         AND b.stay @> gs.night::date
+                   )
+            FROM generate_series(GREATEST(p_from, current_date), p_to - 1, interval '1 day') AS gs(night)
+            ON CONFLICT (apartment_id, night) DO UPDATE SET is_blocked = EXCLUDED.is_blocked;
+        $$
+        """
+    )
+
+    # Скользящий горизонт: удаляем прошедшие ночи и досоздаём строки на 365 дней вперёд
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION apartments.refresh_availability_horizon()
+        RETURNS void LANGUAGE sql AS $$
+            DELETE FROM apartments.availability WHERE night < current_date;
+
+            INSERT INTO apartments.availability (apartment_id, night, is_blocked)
+            SELECT a.id, gs.night::date,
+                   EXISTS (
+                       SELECT 1 FROM public.bookings b
+                       WHERE b.apartment_id = a.id
+                         AND b.status_id IN (5, 6, 7)
+                         AND b.stay @> gs.night::date
+                   )
+            FROM apartments.apartments a
+            CROSS JOIN generate_series(current_date, current_date + 364, interval '1 day') AS gs(night)
+            WHERE a.is_active
+            ON CONFLICT (apartment_id, night) DO NOTHING;
+        $$
+        """
+    )
+
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION apartments.bookings_availability_trigger()
+        RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                PERFORM apartments.refresh_availability_range(OLD.apartment_id, OLD.check_in, OLD.check_out);
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                PERFORM apartments.refresh_availability_range(NEW.apartment_id, NEW.check_in, NEW.check_out);
+            END IF;
+            RETURN NULL;
+        END;
+        $$
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER trg_bookings_availability
+        AFTER INSERT OR DELETE OR UPDATE OF status_id, apartment_id, check_in, check_out
+        ON public.bookings
+        FOR EACH ROW EXECUTE FUNCTION apartments.bookings_availability_trigger()
+        """
+    )
+
+    # Первичное заполнение: горизонт + брони, уходящие за него
+    op.execute("SELECT apartments.refresh_availability_horizon()")
+    op.execute(
+        """
+        SELECT apartments.refresh_availability_range(apartment_id, check_in, check_out)
+        FROM public.bookings
+        WHERE status_id IN (5, 6, 7) AND check_out > current_date + 365
+        """
+    )
+
+    # pg_cron уже в shared_preload_libraries (db/postgresql.conf)
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_cron")
+    op.execute(
+        """
+        SELECT cron.schedule(
+            'availability_horizon', '5 0 * * *',
+            'SELECT apartments.refresh_availability_horizon()'
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(
+        "SELECT cron.unschedule(jobid) FROM cron.job WHERE jobname = 'availability_horizon'"
+    )
+    op.execute("DROP TRIGGER IF EXISTS trg_bookings_availability ON public.bookings")
+    op.execute("DROP FUNCTION IF EXISTS apartments.bookings_availability_trigger()")
+    op.execute("DROP FUNCTION IF EXISTS apartments.refresh_availability_horizon()")
+    op.execute("DROP FUNCTION IF EXISTS apartments.refresh_availability_range(integer, date, date)")
+    op.drop_index('idx_availability_blocked_night', table_name='availability', schema='apartments', postgresql_where=sa.text('is_blocked'))
+    op.drop_table('availability', schema='apartments')
@@ -0,0 +1,32 @@
+"""apartments coordinates gist index
+
+Revision ID: c92e5a0f7d18
+Revises: b7f3d1c8e604
+Create Date: 2026-10-18 12:20:41.338907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c92e5a0f7d18'
+down_revision: Union[str, Sequence[str], None] = 'b7f3d1c8e604'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # В 1aef50a5b0a8 создание индекса было закомментировано, поэтому IF NOT EXISTS:
+    # на части инсталляций его мог создать GeoAlchemy при create_table
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_apartments_coordinates "
+        "ON apartments.apartments USING gist (coordinates)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS apartments.idx_apartments_coordinates")
@@ -0,0 +1,51 @@
+"""saved searches
+
+Revision ID: e5a1c7f30b94
+Revises: c92e5a0f7d18
+Create Date: 2026-10-18 14:02:17.511204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a1c7f30b94'
+down_revision: Union[str, Sequence[str], None] = 'c92e5a0f7d18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'saved_searches',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('tg_user_id', sa.BIGINT(), nullable=False),
+        sa.Column('search_session_id', sa.Integer(), nullable=True),
+        sa.Column('filters', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('check_in', sa.Date(), nullable=False),
+        sa.Column('check_out', sa.Date(), nullable=False),
+        sa.Column('type_ids', postgresql.ARRAY(sa.Integer()), nullable=True),
+        sa.Column('notified_apartment_ids', postgresql.ARRAY(sa.Integer()), server_default=sa.text("'{}'"), nullable=False),
+        sa.Column('is_active', sa.Boolean(), server_default=sa.text('true'), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('last_notified_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['tg_user_id'], ['public.users.tg_user_id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['search_session_id'], ['public.search_sessions.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+        schema='public'
+    )
+    op.create_index(
+        'idx_saved_searches_active_check_in', 'saved_searches', ['check_in'],
+        unique=False, schema='public', postgresql_where=sa.text('is_active')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_saved_searches_active_check_in', table_name='saved_searches', schema='public')
+    op.drop_table('saved_searches', schema='public')
@@ -0,0 +1,39 @@
+"""apartments full-text search column
+
+Revision ID: f7b2d9e4a610
+Revises: e5a1c7f30b94
+Create Date: 2026-10-18 15:11:48.204133
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7b2d9e4a610'
+down_revision: Union[str, Sequence[str], None] = 'e5a1c7f30b94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Выражение совпадает с SEARCH_TSV_EXPRESSION в db/models/apartments.py
+    op.execute("""
+        ALTER TABLE apartments.apartments
+        ADD COLUMN search_tsv tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('russian'::regconfig, coalesce(short_address, '') || ' ' || coalesce(address, '')), 'A') ||
+            setweight(to_tsvector('russian'::regconfig, coalesce(description, '')), 'B')
+        ) STORED
+    """)
+    op.create_index(
+        'idx_apartments_search_tsv', 'apartments', ['search_tsv'],
+        unique=False, schema='apartments', postgresql_using='gin'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_apartments_search_tsv', table_name='apartments', schema='apartments')
+    op.drop_column('apartments', 'search_tsv', schema='apartments')
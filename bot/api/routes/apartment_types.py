@@ -1,15 +1,13 @@
 # api/routes/apartment_types.py
-from fastapi import APIRouter, Depends
-from sqlalchemy.ext.asyncio import AsyncSession
-from db.db_async import get_async_session
-from db.models.apartment_types import ApartmentType
+from fastapi import APIRouter
 from schemas.apartment_types import ApartmentTypeOut
 from typing import List
-from sqlalchemy import select
+
+from utils.reference_data import reference_data
 
 router = APIRouter()
 
 @router.get("/apartment_types/", response_model=List[ApartmentTypeOut])
-async def get_apartment_types(db: AsyncSession = Depends(get_async_session)):
-    result = await db.execute(select(ApartmentType))
-    return result.scalars().all()
+async def get_apartment_types():
+    # Справочник из памяти процесса, перечитывается по истечении REFERENCE_DATA_REFRESH_SECONDS
+    return await reference_data.apartment_types()
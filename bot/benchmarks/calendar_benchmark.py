@@ -0,0 +1,102 @@
+"""
+Микро-бенчмарк клавиатуры календаря: прежняя сборка всех кнопок с нуля
+против каркаса месяца из кэша с наложением подсветки. Сценарии heatmap —
+горячий путь поиска арендатора, где календарь всегда строится со счётчиками
+свободных квартир (free_counts).
+
+    docker compose run --rm bot_rent python -m benchmarks.calendar_benchmark --number 2000
+"""
+import argparse
+import calendar
+import timeit
+from datetime import date, timedelta
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
+from utils.keyboard_builder import build_calendar, CB_NAV, CB_SELECT
+
+
+def build_calendar_legacy(year: int, month: int, check_in=None, check_out=None, free_counts=None):
+    """Прежняя реализация build_calendar — точка отсчёта для сравнения."""
+    today = date.today()
+    cal = calendar.Calendar(firstweekday=0)
+    keyboard = []
+
+    keyboard.append([InlineKeyboardButton(f"{calendar.month_name[month]} {year}", callback_data="IGNORE")])
+
+    week_days = ["Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс"]
+    keyboard.append([InlineKeyboardButton(d, callback_data="IGNORE") for d in week_days])
+
+    for week in cal.monthdatescalendar(year, month):
+        row = []
+        for day in week:
+            if day.month != month:
+                row.append(InlineKeyboardButton(" ", callback_data="IGNORE"))
+            else:
+                text = str(day.day)
+
+                if check_in and check_out and check_in <= day <= check_out:
+                    text = f"✔️{day.day}"
+                elif check_in and day == check_in:
+                    text = f"✔️{day.day}"
+                elif check_out and day == check_out:
+                    text = f"🔴{day.day}"
+                elif free_counts is not None and day > today and day in free_counts:
+                    free = free_counts[day]
+                    text = f"{day.day}·{free}" if free else f"{day.day}✖️"
+
+                row.append(InlineKeyboardButton(text, callback_data=f"{CB_SELECT}:{day.isoformat()}"))
+        keyboard.append(row)
+
+    prev_month = (date(year, month, 1) - timedelta(days=1)).replace(day=1)
+    next_month = (date(year, month, calendar.monthrange(year, month)[1]) + timedelta(days=1)).replace(day=1)
+    keyboard.append([
+        InlineKeyboardButton("◀️", callback_data=f"{CB_NAV}:{prev_month.year}:{prev_month.month}"),
+        InlineKeyboardButton("▶️", callback_data=f"{CB_NAV}:{next_month.year}:{next_month.month}")
+    ])
+
+    return InlineKeyboardMarkup(keyboard)
+
+
+def month_free_counts(year: int, month: int) -> dict[date, int]:
+    """Счётчики как у availability_heatmap.month(): ночь -> свободных квартир (есть и нули)."""
+    days = calendar.monthrange(year, month)[1]
+    return {date(year, month, d): (d * 7) % 13 for d in range(1, days + 1)}
+
+
+def scenarios(today: date) -> dict[str, tuple]:
+    check_in = today + timedelta(days=3)
+    # Один dict на месяц, как отдаёт кэш availability_heatmap
+    counts = month_free_counts(today.year, today.month)
+    check_in_counts = counts if (check_in.year, check_in.month) == (today.year, today.month) \
+        else month_free_counts(check_in.year, check_in.month)
+    return {
+        "navigation": (today.year, today.month, None, None, None),
+        "check_in": (check_in.year, check_in.month, check_in, None, None),
+        "range": (check_in.year, check_in.month, check_in, check_in + timedelta(days=5), None),
+        "heatmap": (today.year, today.month, None, None, counts),
+        "heatmap_in": (check_in.year, check_in.month, check_in, None, check_in_counts),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=2000, help="вызовов на замер")
+    parser.add_argument("--repeat", type=int, default=5, help="замеров (берётся лучший)")
+    args = parser.parse_args()
+
+    for name, params in scenarios(date.today()).items():
+        # Результат должен совпадать с прежней реализацией
+        if build_calendar(*params).to_dict() != build_calendar_legacy(*params).to_dict():
+            raise SystemExit(f"{name}: keyboards differ")
+
+        legacy = min(timeit.repeat(lambda: build_calendar_legacy(*params), number=args.number, repeat=args.repeat))
+        cached = min(timeit.repeat(lambda: build_calendar(*params), number=args.number, repeat=args.repeat))
+        print(
+            f"{name:<11} legacy {legacy / args.number * 1e6:8.1f} µs   "
+            f"cached {cached / args.number * 1e6:8.1f} µs   x{legacy / cached:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Сравнение поиска по датам: NOT EXISTS по public.bookings против
+сгруппированного anti-join по apartments.availability.
+
+Синтетический год броней создаётся внутри транзакции, которая в конце
+откатывается, поэтому скрипт безопасно запускать на копии боевой БД:
+
+    docker compose run --rm bot_rent python -m benchmarks.nightly_availability --apartments 500
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from sqlalchemy import select, text
+
+from db.db import get_session
+from db.models import Apartment, ApartmentType, Booking, User
+from utils.apts_search_session import build_search_stmt
+
+BLOCKING = (5, 6, 7)
+NON_BLOCKING = (8, 9, 11, 12)
+
+
+def seed(session, apartments: int, rng: random.Random) -> None:
+    type_ids = session.scalars(select(ApartmentType.id)).all()
+    if not type_ids:
+        raise RuntimeError("apartment_types is empty")
+
+    owner = User(tg_user_id=-rng.randint(10**9, 10**10), username="benchmark", is_bot=True)
+    session.add(owner)
+    session.flush()
+
+    today = date.today()
+    for i in range(apartments):
+        apt = Apartment(
+            address=f"benchmark street {i}",
+            short_address=f"benchmark {i}",
+            type_id=rng.choice(type_ids),
+            owner_tg_id=owner.tg_user_id,
+            max_guests=rng.randint(1, 6),
+            price=Decimal(rng.randrange(1500, 15000, 100)),
+            is_draft=False,
+            is_active=True
+        )
+        session.add(apt)
+        session.flush()
+
+        # Год броней без пересечений: чередуем короткие паузы и проживания
+        day = today + timedelta(days=rng.randint(0, 5))
+        while day < today + timedelta(days=365):
+            nights = rng.randint(1, 7)
+            session.add(Booking(
+                tg_user_id=owner.tg_user_id,
+                apartment_id=apt.id,
+                status_id=rng.choice(BLOCKING + NON_BLOCKING),
+                check_in=day,
+                check_out=day + timedelta(days=nights),
+                guest_count=1,
+                total_price=apt.price * nights
+            ))
+            day += timedelta(days=nights + rng.randint(0, 10))
+        session.flush()
+
+    session.execute(text("SELECT apartments.refresh_availability_horizon()"))
+
+
+def measure(session, source: str, windows: list[tuple[date, date]]) -> tuple[list[float], list[list[int]]]:
+    timings, results = [], []
+    for check_in, check_out in windows:
+        stmt = build_search_stmt(check_in, check_out, {}, source=source).with_only_columns(Apartment.id)
+        started = time.perf_counter()
+        ids = session.scalars(stmt).all()
+        timings.append(time.perf_counter() - started)
+        results.append(ids)
+    return timings, results
+
+
+def report(name: str, timings: list[float]) -> None:
+    ms = sorted(t * 1000 for t in timings)
+    p95 = ms[int(len(ms) * 0.95) - 1]
+    print(f"{name:>10}: median {statistics.median(ms):7.2f} ms | p95 {p95:7.2f} ms | max {ms[-1]:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--apartments", type=int, default=300)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    today = date.today()
+    windows = []
+    for _ in range(args.queries):
+        check_in = today + timedelta(days=rng.randint(1, 350))
+        windows.append((check_in, check_in + timedelta(days=rng.randint(1, 14))))
+
+    session = get_session()
+    try:
+        seed(session, args.apartments, rng)
+        session.execute(text("ANALYZE public.bookings"))
+        session.execute(text("ANALYZE apartments.availability"))
+
+        # Прогрев, чтобы не мерить холодный кэш страниц
+        measure(session, "bookings", windows[:10])
+        measure(session, "nightly", windows[:10])
+
+        bookings_t, bookings_r = measure(session, "bookings", windows)
+        nightly_t, nightly_r = measure(session, "nightly", windows)
+
+        mismatches = sum(1 for a, b in zip(bookings_r, nightly_r) if a != b)
+        print(f"apartments={args.apartments} queries={args.queries} result mismatches={mismatches}")
+        report("bookings", bookings_t)
+        report("nightly", nightly_t)
+    finally:
+        session.rollback()
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
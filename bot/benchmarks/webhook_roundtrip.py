@@ -0,0 +1,197 @@
+"""
+Проверка режима вебхука без выхода в сеть: локальная заглушка Bot API и
+run_webhook — тот же путь, что main при BOT_MODE=webhook, — с Application,
+собранным build_application (включая send_scheduler), и одной командой /ping.
+Апдейты отправляются POST-ом с секретом, ответ ловится в заглушке на sendMessage;
+печатается задержка апдейт → ответ. Запрос с неверным секретом должен получить 403,
+post_init и post_shutdown должны быть вызваны.
+
+    docker compose run --rm bot_rent python -m benchmarks.webhook_roundtrip --updates 200
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from telegram import Update
+from telegram.ext import CommandHandler, ContextTypes
+
+from utils.app_builder import build_application
+from utils.send_scheduler import GLOBAL_RATE
+from utils.webhook_server import create_webhook_server, run_webhook, WEBHOOK_PATH, SECRET_HEADER
+
+TOKEN = "123456:TEST"
+SECRET = "roundtrip-secret"
+BOT_USER = {"id": 123456, "is_bot": True, "first_name": "Test", "username": "test_bot"}
+
+
+class FakeBotApi:
+    """Заглушка Bot API: отвечает на вызовы бота и ждёт sendMessage по chat_id."""
+
+    def __init__(self):
+        self.replies: dict[int, asyncio.Future] = {}
+        self.webhook_url = None
+        self.app = Starlette(routes=[Route("/bot{token}/{method}", self.handle, methods=["POST"])])
+
+    async def handle(self, request: Request) -> JSONResponse:
+        method = request.path_params["method"].lower()
+        if request.headers.get("content-type", "").startswith("application/json"):
+            data = await request.json()
+        else:
+            data = dict(await request.form())
+
+        if method == "getme":
+            return JSONResponse({"ok": True, "result": BOT_USER})
+        if method == "setwebhook":
+            self.webhook_url = data.get("url")
+            return JSONResponse({"ok": True, "result": True})
+        if method == "sendmessage":
+            chat_id = int(data["chat_id"])
+            future = self.replies.get(chat_id)
+            if future and not future.done():
+                future.set_result(time.perf_counter())
+            return JSONResponse({"ok": True, "result": {
+                "message_id": 1,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "from": BOT_USER,
+                "text": data.get("text", "")
+            }})
+        return JSONResponse({"ok": True, "result": True})
+
+
+async def ping(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    await update.message.reply_text("pong")
+
+
+def make_update(update_id: int, chat_id: int) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "Guest"},
+            "text": "/ping",
+            "entities": [{"type": "bot_command", "offset": 0, "length": 5}]
+        }
+    }
+
+
+async def start_server(server: uvicorn.Server, task: asyncio.Task) -> None:
+    """Ждёт, пока сервер начнёт принимать запросы; задача упала раньше — пробрасывает её ошибку."""
+    while not server.started:
+        if task.done():
+            task.result()
+            raise RuntimeError("server stopped before start")
+        await asyncio.sleep(0.01)
+
+
+async def stop_server(server: uvicorn.Server, task: asyncio.Task) -> None:
+    server.should_exit = True
+    await task
+
+
+async def run(updates: int, concurrency: int, api_port: int, webhook_port: int) -> int:
+    fake_api = FakeBotApi()
+    api_server = uvicorn.Server(uvicorn.Config(fake_api.app, host="127.0.0.1", port=api_port, log_level="warning"))
+    api_task = asyncio.create_task(api_server.serve())
+    await start_server(api_server, api_task)
+
+    lifecycle = []
+
+    async def post_init(application):
+        lifecycle.append("post_init")
+
+    async def post_shutdown(application):
+        lifecycle.append("post_shutdown")
+
+    application = build_application(
+        TOKEN,
+        base_url=f"http://127.0.0.1:{api_port}/bot",
+        post_init=post_init,
+        post_shutdown=post_shutdown
+    )
+    application.add_handler(CommandHandler("ping", ping))
+    webhook_server = create_webhook_server(application, SECRET, "127.0.0.1", webhook_port)
+    webhook_task = asyncio.create_task(
+        run_webhook(application, webhook_server, url=f"http://127.0.0.1:{webhook_port}", secret_token=SECRET)
+    )
+    webhook_url = f"http://127.0.0.1:{webhook_port}{WEBHOOK_PATH}"
+
+    failures = 0
+    latencies = []
+    # Ответы проходят через send_scheduler: последний ждёт около updates / GLOBAL_RATE секунд
+    reply_timeout = 5 + updates / GLOBAL_RATE
+    try:
+        await start_server(webhook_server, webhook_task)
+        async with httpx.AsyncClient() as client:
+            response = await client.post(webhook_url, json=make_update(0, 1), headers={SECRET_HEADER: "wrong"})
+            if response.status_code != 403:
+                print(f"FAIL: invalid secret answered {response.status_code}, expected 403")
+                failures += 1
+
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def roundtrip(i: int) -> None:
+                nonlocal failures
+                chat_id = 10_000 + i
+                future = asyncio.get_running_loop().create_future()
+                fake_api.replies[chat_id] = future
+                async with semaphore:
+                    started = time.perf_counter()
+                    response = await client.post(
+                        webhook_url, json=make_update(i + 1, chat_id), headers={SECRET_HEADER: SECRET}
+                    )
+                if response.status_code != 200:
+                    failures += 1
+                    return
+                try:
+                    replied = await asyncio.wait_for(future, timeout=reply_timeout)
+                except asyncio.TimeoutError:
+                    failures += 1
+                    return
+                latencies.append((replied - started) * 1000)
+
+            await asyncio.gather(*(roundtrip(i) for i in range(updates)))
+    finally:
+        try:
+            await stop_server(webhook_server, webhook_task)
+        finally:
+            await stop_server(api_server, api_task)
+
+    if fake_api.webhook_url != webhook_url:
+        print(f"FAIL: setWebhook got {fake_api.webhook_url!r}")
+        failures += 1
+    if lifecycle != ["post_init", "post_shutdown"]:
+        print(f"FAIL: lifecycle hooks called: {lifecycle}")
+        failures += 1
+    if latencies:
+        latencies.sort()
+        print(f"updates: {len(latencies)}/{updates}")
+        print(f"update -> reply, ms: p50={statistics.median(latencies):.1f} "
+              f"p95={latencies[int(len(latencies) * 0.95) - 1]:.1f} max={latencies[-1]:.1f}")
+    print("OK" if failures == 0 else f"FAILED: {failures}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--updates", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--api-port", type=int, default=18081)
+    parser.add_argument("--webhook-port", type=int, default=18443)
+    args = parser.parse_args()
+    failures = asyncio.run(run(args.updates, args.concurrency, args.api_port, args.webhook_port))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
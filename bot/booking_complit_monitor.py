@@ -5,17 +5,18 @@ from db.db_async import get_async_session
 from db.models.bookings import Booking
 from db.models.apartments import Apartment
 from db.models.users import User
+from utils.booking_events import booking_changed
+from utils.reference_data import BookingStatus
+from utils.outbox import enqueue, kick_outbox
 
 # Константы
-TARGET_BOOKING_STATUS = 6      # "подтверждено"
-BOOKING_STATUS_TIMEOUT = 12    # "завершено"
+TARGET_BOOKING_STATUS = BookingStatus.CONFIRMED
+BOOKING_STATUS_TIMEOUT = BookingStatus.COMPLETED
 
 
 async def check_complit_booking(context):
     """Проверка и обработка завершенных броней"""
 
-    bot = context.bot
-
     try:
         async with get_async_session() as session:
             stmt = (
@@ -38,15 +39,20 @@ async def check_complit_booking(context):
 
             for booking in complit_bookings:
                 booking.status_id = BOOKING_STATUS_TIMEOUT
+                # Уведомления сохраняются вместе со сменой статуса
+                notify_complit_booking(session, booking)
                 await session.commit()
-                await notify_complit_booking(bot, booking)
+                booking_changed(booking)
+
+            if complit_bookings:
+                kick_outbox(context.job_queue)
 
     except Exception as e:
         pass
 
 
-async def notify_complit_booking(bot, booking):
-    """Отправка уведомлений о том, что бронирование завершно"""
+def notify_complit_booking(session, booking):
+    """Уведомления о том, что бронирование завершено (в outbox текущей транзакции)"""
 
     guest_chat_id = booking.tg_user_id
     owner_chat_id = booking.apartment.owner_tg_id
@@ -67,6 +73,6 @@ async def notify_complit_booking(bot, booking):
     )
 #todo: продумать логику взаимодейсnвия, запрашивать отзывы и оценки
 
-    await bot.send_message(chat_id=guest_chat_id, text=guest_text, parse_mode="HTML")
-    await bot.send_message(chat_id=owner_chat_id, text=owner_text, parse_mode="HTML")
+    enqueue(session, chat_id=guest_chat_id, text=guest_text, kind="booking_completed_guest", booking_id=booking.id, parse_mode="HTML")
+    enqueue(session, chat_id=owner_chat_id, text=owner_text, kind="booking_completed_owner", booking_id=booking.id, parse_mode="HTML")
 
@@ -6,11 +6,16 @@ from db.db_async import get_async_session
 from db.models.bookings import Booking
 from db.models.apartments import Apartment
 from db.models.users import User
+from utils.booking_events import booking_changed
+from utils.reference_data import BookingStatus
+from utils.saved_search_matcher import match_freed_booking
+from utils.outbox import enqueue, kick_outbox
+from utils.logging_config import structured_logger
 
 
 # Константы
-TARGET_BOOKING_STATUS = 5      # "ожидает подтверждения"
-BOOKING_STATUS_TIMEOUT = 11    # "время истекло"
+TARGET_BOOKING_STATUS = BookingStatus.PENDING
+BOOKING_STATUS_TIMEOUT = BookingStatus.TIMEOUT
 
 
 
@@ -41,20 +46,31 @@ async def check_expired_booking(context):
 
             for booking in expired_bookings:
                 booking.status_id = BOOKING_STATUS_TIMEOUT
+                # Уведомления сохраняются вместе со сменой статуса
+                notify_timeout(session, booking)
             
             await session.commit()
 
-
-            # Замер времени уведомлений
             for booking in expired_bookings:
-                    await notify_timeout(bot, booking)
+                booking_changed(booking)
+
+            if expired_bookings:
+                kick_outbox(context.job_queue)
+
+        # Освободившиеся даты — сверяем с сохранёнными поисками фоном
+        for booking in expired_bookings:
+            context.application.create_task(match_freed_booking(bot, booking))
 
     except Exception as e:
-        pass
+        structured_logger.error(
+            f"Expired booking check failed: {e}",
+            action="booking_expired_monitor",
+            exception=e
+        )
 
 
-async def notify_timeout(bot, booking):
-    """Отправка уведомлений о том, что бронь истекла"""
+def notify_timeout(session, booking):
+    """Уведомления гостю и владельцу о том, что бронь истекла (в outbox текущей транзакции)"""
 
     guest_chat_id = booking.tg_user_id
     owner_chat_id = booking.apartment.owner_tg_id
@@ -77,6 +93,6 @@ async def notify_timeout(bot, booking):
         f"⌛️ Истек срок 24 часа на подтверждение"
     )
 
-    await bot.send_message(chat_id=guest_chat_id, text=guest_text, parse_mode="HTML")
-    await bot.send_message(chat_id=owner_chat_id, text=owner_text, parse_mode="HTML")
+    enqueue(session, chat_id=guest_chat_id, text=guest_text, kind="booking_timeout_guest", booking_id=booking.id, parse_mode="HTML")
+    enqueue(session, chat_id=owner_chat_id, text=owner_text, kind="booking_timeout_owner", booking_id=booking.id, parse_mode="HTML")
 
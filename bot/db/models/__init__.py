@@ -9,9 +9,16 @@ from .users import User
 from .sessions import Session
 from .search_sessions import SearchSession
 from .booking_chat import BookingChat
+from .availability import Availability
+from .saved_searches import SavedSearch
+from .search_funnel_daily import SearchFunnelDaily
+from .outbox import OutboxMessage
+from .broadcasts import BroadcastCampaign, BroadcastDelivery
+from .static_media import StaticMedia
 
 __all__ = ["Source","User", "Role", "Session","Apartment",
    "Booking", "BookingType",
     "ApartmentType", 
-    "Image", "SearchSession", "BookingChat"
+    "Image", "SearchSession", "BookingChat", "Availability", "SavedSearch", "SearchFunnelDaily", "OutboxMessage",
+    "BroadcastCampaign", "BroadcastDelivery", "StaticMedia"
 ]
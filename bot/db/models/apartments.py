@@ -9,21 +9,37 @@ from sqlalchemy import (
     Numeric,
     CheckConstraint,
     text,
-    BIGINT
+    BIGINT,
+    Computed,
+    Index
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from geoalchemy2 import Geometry
 from datetime import datetime
 from db.db import Base
 
 from decimal import Decimal
 
+SEARCH_TSV_EXPRESSION = (
+    "setweight(to_tsvector('russian'::regconfig, coalesce(short_address, '') || ' ' || coalesce(address, '')), 'A') || "
+    "setweight(to_tsvector('russian'::regconfig, coalesce(description, '')), 'B')"
+)
 
 class Apartment(Base):
     __tablename__ = "apartments"
     __table_args__ = (
         CheckConstraint('max_guests > 0', name='check_max_guests_positive'),
         CheckConstraint('price >= 0', name='check_price_non_negative'),
+        Index("idx_apartments_search_tsv", "search_tsv", postgresql_using="gin"),
+        # keyset-пагинация выдачи: ORDER BY price, created_at, id DESC читает индекс в обратном порядке
+        Index(
+            "idx_apartments_search_order",
+            "price",
+            text("coalesce(created_at, '-infinity'::timestamp)"),
+            "id",
+            postgresql_where=text("is_active AND NOT is_draft")
+        ),
         {"schema": "apartments"}
     )
 
@@ -51,6 +67,8 @@ class Apartment(Base):
     is_draft = Column(Boolean, nullable=False, default=True, server_default=text("true"))  
     # координаты с пространственным индексом
     coordinates = Column(Geometry(geometry_type='POINT', srid=4326), nullable=True)
+    # полнотекстовый поиск по адресу (вес A) и описанию (вес B); в выборки не грузится
+    search_tsv = deferred(Column(TSVECTOR, Computed(SEARCH_TSV_EXPRESSION, persisted=True)))
 
     # отношения (опционально)
     owner = relationship("User", back_populates="apartments")
@@ -0,0 +1,37 @@
+from sqlalchemy import (
+    Column,
+    Integer,
+    ForeignKey,
+    Date,
+    Boolean,
+    Index,
+    text
+)
+from db.db import Base
+
+
+class Availability(Base):
+    """
+    Денормализованная занятость по ночам на скользящем горизонте 365 дней.
+    Поддерживается триггером на public.bookings и ежедневным заданием pg_cron,
+    из приложения только читается.
+    """
+    __tablename__ = "availability"
+    __table_args__ = (
+        Index(
+            "idx_availability_blocked_night", "night", "apartment_id",
+            postgresql_where=text("is_blocked")
+        ),
+        {"schema": "apartments"}
+    )
+
+    apartment_id = Column(
+        Integer,
+        ForeignKey("apartments.apartments.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    night = Column(Date, primary_key=True)
+    is_blocked = Column(Boolean, nullable=False, default=False, server_default=text("false"))
+
+    def __repr__(self):
+        return f"<Availability(apartment={self.apartment_id}, night={self.night}, blocked={self.is_blocked})>"
@@ -7,8 +7,10 @@ from sqlalchemy import (
     Numeric,
     CheckConstraint,
     DateTime,Boolean, text, Index,
-    BIGINT
+    BIGINT,
+    Computed
 )
+from sqlalchemy.dialects.postgresql import DATERANGE, ExcludeConstraint
 from sqlalchemy.orm import relationship
 from db.db import Base
 from datetime import datetime
@@ -18,6 +20,15 @@ class Booking(Base):
     __tablename__ = "bookings"
     __table_args__ = (
         Index("idx_booking_apartment_dates", "apartment_id", "check_in", "check_out"),
+        Index("idx_booking_apartment_stay", "apartment_id", "stay", postgresql_using="gist"),
+        # Двойное бронирование одних и тех же ночей запрещено на уровне БД
+        ExcludeConstraint(
+            ("apartment_id", "="),
+            ("stay", "&&"),
+            name="excl_booking_apartment_stay",
+            using="gist",
+            where=text("status_id IN (5, 6, 7)")
+        ),
         CheckConstraint("guest_count > 0", name="check_guest_count_positive"),
         CheckConstraint("check_in < checkout", name="check_dates_order"),
         CheckConstraint("total_price >= 0", name="check_total_price_non_negative"),
@@ -34,6 +45,8 @@ class Booking(Base):
     
     check_in = Column(Date, nullable=False, index = True)
     check_out = Column(Date, nullable=False, index = True)
+    # Полуинтервал ночей [check_in, check_out), вычисляется в БД
+    stay = Column(DATERANGE, Computed("daterange(check_in, check_out, '[)')", persisted=True))
     
     guest_count = Column(Integer, nullable=False)
     
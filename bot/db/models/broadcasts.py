@@ -0,0 +1,67 @@
+from sqlalchemy import (
+    Column,
+    Integer,
+    BigInteger,
+    BIGINT,
+    String,
+    Text,
+    DateTime,
+    ForeignKey,
+    Index,
+    UniqueConstraint,
+    func,
+    text as sa_text
+)
+from sqlalchemy.orm import relationship
+from db.db import Base
+
+
+class BroadcastCampaign(Base):
+    """
+    Рассылка всем активным пользователям. Получатели фиксируются при создании
+    в broadcast_deliveries, поэтому рассылку можно приостановить и продолжить.
+    """
+    __tablename__ = "broadcast_campaigns"
+    __table_args__ = {"schema": "public"}
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100), nullable=False, unique=True)     # повторный запуск с тем же именем продолжает рассылку
+    text = Column(Text, nullable=False)                         # HTML; подпись к фото, если оно есть
+    image_path = Column(String(255), nullable=True)
+    photo_file_id = Column(String(255), nullable=True)          # file_id после первой загрузки фото
+
+    status = Column(String(16), nullable=False, server_default=sa_text("'running'"))  # running | paused | completed
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    deliveries = relationship("BroadcastDelivery", back_populates="campaign", passive_deletes=True)
+
+    def __repr__(self):
+        return f"<BroadcastCampaign(id={self.id}, name={self.name}, status={self.status})>"
+
+
+class BroadcastDelivery(Base):
+    """Состояние доставки рассылки одному получателю."""
+    __tablename__ = "broadcast_deliveries"
+    __table_args__ = (
+        UniqueConstraint("campaign_id", "tg_user_id", name="uq_broadcast_deliveries_campaign_user"),
+        Index("idx_broadcast_deliveries_pending", "campaign_id", "id", postgresql_where=sa_text("status = 'pending'")),
+        {"schema": "public"}
+    )
+
+    id = Column(BigInteger, primary_key=True)
+    campaign_id = Column(Integer,
+                    ForeignKey("public.broadcast_campaigns.id", ondelete="CASCADE"),
+                    nullable=False)
+    tg_user_id = Column(BIGINT, nullable=False)
+
+    status = Column(String(16), nullable=False, server_default=sa_text("'pending'"))  # pending | sent | blocked | failed
+    attempts = Column(Integer, nullable=False, server_default=sa_text("0"))
+    message_id = Column(BigInteger, nullable=True)
+    error = Column(String(255), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    campaign = relationship("BroadcastCampaign", back_populates="deliveries")
+
+    def __repr__(self):
+        return f"<BroadcastDelivery(campaign={self.campaign_id}, user={self.tg_user_id}, status={self.status})>"
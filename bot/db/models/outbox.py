@@ -0,0 +1,52 @@
+from sqlalchemy import (
+    Column,
+    Integer,
+    BigInteger,
+    BIGINT,
+    Boolean,
+    String,
+    Text,
+    DateTime,
+    ForeignKey,
+    Index,
+    func,
+    text as sa_text
+)
+from sqlalchemy.dialects.postgresql import JSONB
+from db.db import Base
+
+
+class OutboxMessage(Base):
+    """
+    Исходящее уведомление в Telegram. Пишется в той же транзакции, что и
+    изменение брони, отправляется диспетчером utils.outbox (at-least-once).
+    """
+    __tablename__ = "outbox"
+    __table_args__ = (
+        Index("idx_outbox_pending", "next_attempt_at", postgresql_where=sa_text("sent_at IS NULL AND failed_at IS NULL")),
+        {"schema": "public"}
+    )
+
+    id = Column(BigInteger, primary_key=True)
+
+    chat_id = Column(BIGINT, nullable=False)
+    kind = Column(String(64), nullable=False)                   # событие: booking_request, booking_timeout_guest, ...
+    booking_id = Column(Integer,
+                    ForeignKey("public.bookings.id", ondelete="SET NULL"),
+                    nullable=True)
+
+    text = Column(Text, nullable=False)
+    parse_mode = Column(String(16), nullable=True)
+    reply_markup = Column(JSONB, nullable=True)                 # InlineKeyboardMarkup.to_dict()
+    pin = Column(Boolean, nullable=False, default=False, server_default=sa_text("false"))
+
+    attempts = Column(Integer, nullable=False, default=0, server_default=sa_text("0"))
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    last_error = Column(String(255), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+    failed_at = Column(DateTime(timezone=True), nullable=True)  # отправка прекращена (бот заблокирован, лимит попыток)
+
+    def __repr__(self):
+        return f"<OutboxMessage(id={self.id}, kind={self.kind}, chat={self.chat_id}, attempts={self.attempts})>"
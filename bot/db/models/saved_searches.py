@@ -0,0 +1,50 @@
+from sqlalchemy import (
+    Column,
+    Integer,
+    BIGINT,
+    Boolean,
+    Date,
+    DateTime,
+    ForeignKey,
+    Index,
+    func,
+    text
+)
+from sqlalchemy.dialects.postgresql import JSONB, ARRAY
+from db.db import Base
+
+
+class SavedSearch(Base):
+    """
+    Сохранённый арендатором поиск: при освобождении дат или публикации
+    подходящей квартиры бот присылает уведомление.
+    """
+    __tablename__ = "saved_searches"
+    __table_args__ = (
+        Index("idx_saved_searches_active_check_in", "check_in", postgresql_where=text("is_active")),
+        {"schema": "public"}
+    )
+
+    id = Column(Integer, primary_key=True)
+
+    tg_user_id = Column(BIGINT,
+                    ForeignKey("public.users.tg_user_id", ondelete="CASCADE"),
+                    nullable=False)
+    search_session_id = Column(Integer,
+                    ForeignKey("public.search_sessions.id", ondelete="SET NULL"),
+                    nullable=True)
+
+    filters = Column(JSONB, nullable=False)                     # копия SearchSession.filters
+    check_in = Column(Date, nullable=False)
+    check_out = Column(Date, nullable=False)
+    type_ids = Column(ARRAY(Integer), nullable=True)           # пусто — любые типы
+
+    # Квартиры, о которых уже сообщили, чтобы не присылать повторно
+    notified_apartment_ids = Column(ARRAY(Integer), nullable=False, server_default=text("'{}'"))
+    is_active = Column(Boolean, nullable=False, default=True, server_default=text("true"))
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    last_notified_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<SavedSearch(id={self.id}, user={self.tg_user_id}, {self.check_in}..{self.check_out})>"
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, BigInteger, Date, text
+from db.db import Base
+
+
+class SearchFunnelDaily(Base):
+    """
+    Дневная воронка поиска. Заполняется заданием pg_cron
+    public.rollup_search_sessions(), которое затем удаляет свёрнутые
+    строки search_sessions; из приложения только читается.
+    """
+    __tablename__ = "search_funnel_daily"
+    __table_args__ = {"schema": "public"}
+
+    day = Column(Date, primary_key=True)
+    searches = Column(Integer, nullable=False, server_default=text("0"))       # поисков
+    users = Column(Integer, nullable=False, server_default=text("0"))          # уникальных пользователей
+    with_results = Column(Integer, nullable=False, server_default=text("0"))   # поисков с результатами
+    browsed = Column(Integer, nullable=False, server_default=text("0"))        # листали дальше первой карточки
+    saved = Column(Integer, nullable=False, server_default=text("0"))          # сохранены для уведомлений
+    results_total = Column(BigInteger, nullable=False, server_default=text("0"))  # сумма найденных
+    cards_viewed = Column(BigInteger, nullable=False, server_default=text("0"))   # сумма позиций current_index + 1
+
+    def __repr__(self):
+        return f"<SearchFunnelDaily(day={self.day}, searches={self.searches})>"
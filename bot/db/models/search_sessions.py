@@ -1,9 +1,56 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, func, text, BIGINT
-from sqlalchemy.dialects.postgresql import JSONB, ARRAY
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, func, text, BIGINT, LargeBinary
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
+from sqlalchemy.types import TypeDecorator
 from db.db import Base
 
 
+def pack_ids(ids) -> bytes:
+    """Список неотрицательных ID в bytea: каждый ID — varint (7 бит на байт)."""
+    out = bytearray()
+    for value in ids:
+        while value >= 0x80:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+    return bytes(out)
+
+
+def unpack_ids(data: bytes) -> list[int]:
+    ids = []
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            ids.append(value)
+            value = shift = 0
+    return ids
+
+
+class PackedIds(TypeDecorator):
+    """
+    Упорядоченный список ID, хранимый как varint-упакованный bytea.
+
+    Выдача отсортирована по цене или расстоянию, а не по ID, поэтому дельты
+    не дают выигрыша; varint занимает 1–2 байта на ID против 4 в int[]
+    и дописывается конкатенацией bytea (||) без чтения строки.
+    """
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return pack_ids(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return unpack_ids(value)
+
+
 class SearchSession(Base):
     __tablename__ = "search_sessions"
     __table_args__ = {"schema": "public"}
@@ -20,8 +67,10 @@ class SearchSession(Base):
                     nullable = False, unique = False)
 
     filters = Column(JSONB, nullable=False)                     # JSON с параметрами поиска
-    apartment_ids = Column(ARRAY(Integer), nullable=True)      # список ID квартир
+    apartment_ids = Column(PackedIds, nullable=True)           # список ID квартир (varint bytea)
+    result_count = Column(Integer, nullable=True)               # всего найдено — для дневных агрегатов
     current_index = Column(Integer, nullable=False, default=0, server_default= text("0"))  # текущая позиция пагинации
+    cursor = Column(JSONB, nullable=True)                       # keyset-курсор следующей страницы выдачи
 
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, String, DateTime, func
+from db.db import Base
+
+
+class StaticMedia(Base):
+    """
+    Telegram file_id статических картинок бота (bot/static). Ключ — SHA-256
+    содержимого: заменённый файл загрузится заново, переименованный — нет.
+    """
+    __tablename__ = "static_media"
+    __table_args__ = {"schema": "public"}
+
+    sha256 = Column(String(64), primary_key=True)
+    path = Column(String(255), nullable=False)          # где файл лежал при загрузке, для справки
+    file_id = Column(String(255), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<StaticMedia(sha256={self.sha256[:12]}, path={self.path})>"
@@ -17,7 +17,6 @@ from telegram.ext import (
 
 from db.db_async import get_async_session
 
-from db.models.apartment_types import ApartmentType
 from db.models.apartments import Apartment
 from db.models.images import Image
 from db.models.search_sessions import SearchSession
@@ -32,6 +31,7 @@ from utils.escape import safe_html
 from utils.message_tricks import sanitize_message, send_message, add_message_to_cleanup, cleanup_messages
 
 from utils.full_view_owner import render_apartment_card_full
+from utils.reference_data import reference_data
 
 from utils.logging_config import structured_logger, LoggingContext
 
@@ -149,15 +149,13 @@ async def handle_address_selection(update: Update, context: ContextTypes.DEFAULT
 
     print(f"[DEBUG] Выбран адрес: {label} ({lat}, {lon})")
     # Показываем кнопки типа объекта прямо здесь
-    async with get_async_session() as session:
-        result = await session.execute(ApartmentType.__table__.select())
-        types = result.fetchall()
+    types = await reference_data.apartment_types()
 
-        keyboard = [
-            [InlineKeyboardButton(t.name, callback_data=str(t.id))] for t in types
-        ]
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
+    keyboard = [
+        [InlineKeyboardButton(t["name"], callback_data=str(t["id"]))] for t in types
+    ]
+    
+    reply_markup = InlineKeyboardMarkup(keyboard)
 
     await query.edit_message_text(
         f"Адрес выбран: {label}\n\nТеперь выберите тип объекта:",
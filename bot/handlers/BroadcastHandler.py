@@ -0,0 +1,69 @@
+import os
+
+from telegram import Update
+from telegram.ext import ContextTypes, CommandHandler, filters
+
+from utils.broadcast import (
+    set_campaign_status,
+    campaign_progress,
+    start_campaign,
+    RUNNING,
+    PAUSED
+)
+from utils.logging_config import structured_logger
+
+ADMIN_CHAT_ID = int(os.getenv("ADMIN_CHAT_ID"))
+
+
+def _campaign_id(context: ContextTypes.DEFAULT_TYPE) -> int | None:
+    try:
+        return int(context.args[0])
+    except (IndexError, ValueError):
+        return None
+
+
+async def broadcast_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    campaign_id = _campaign_id(context)
+    if campaign_id is None:
+        await update.message.reply_text("Использование: /broadcast_status <id>")
+        return
+    progress = await campaign_progress(campaign_id)
+    if not progress:
+        await update.message.reply_text(f"❌ Рассылка {campaign_id} не найдена")
+        return
+    lines = [f"{status}: {count}" for status, count in sorted(progress.items())]
+    await update.message.reply_text(f"📣 Рассылка {campaign_id}\n" + "\n".join(lines))
+
+
+async def broadcast_pause(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    campaign_id = _campaign_id(context)
+    if campaign_id is None:
+        await update.message.reply_text("Использование: /broadcast_pause <id>")
+        return
+    if await set_campaign_status(campaign_id, PAUSED):
+        # Текущая пачка досылается, следующая уже не начнётся
+        await update.message.reply_text(f"⏸ Рассылка {campaign_id} приостановлена")
+        structured_logger.info("Broadcast pause requested", action="broadcast", context={'campaign_id': campaign_id})
+    else:
+        await update.message.reply_text(f"❌ Рассылка {campaign_id} не найдена или завершена")
+
+
+async def broadcast_resume(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    campaign_id = _campaign_id(context)
+    if campaign_id is None:
+        await update.message.reply_text("Использование: /broadcast_resume <id>")
+        return
+    if await set_campaign_status(campaign_id, RUNNING):
+        start_campaign(context.application, campaign_id)
+        await update.message.reply_text(f"▶️ Рассылка {campaign_id} продолжена")
+        structured_logger.info("Broadcast resumed", action="broadcast", context={'campaign_id': campaign_id})
+    else:
+        await update.message.reply_text(f"❌ Рассылка {campaign_id} не найдена или завершена")
+
+
+# Управление рассылками — только из админского чата
+broadcast_handlers = [
+    CommandHandler("broadcast_status", broadcast_status, filters=filters.Chat(ADMIN_CHAT_ID)),
+    CommandHandler("broadcast_pause", broadcast_pause, filters=filters.Chat(ADMIN_CHAT_ID)),
+    CommandHandler("broadcast_resume", broadcast_resume, filters=filters.Chat(ADMIN_CHAT_ID)),
+]
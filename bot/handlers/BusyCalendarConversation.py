@@ -26,12 +26,16 @@ from db.db_async import get_async_session
 from utils.keyboard_builder import build_calendar, CB_NAV, CB_SELECT
 from utils.escape import safe_html
 from utils.message_tricks import add_message_to_cleanup, cleanup_messages
+from utils.booking_events import booking_changed
+from utils.booking_overlap import is_overlap_violation
+from utils.reference_data import BookingStatus
 
 from db.models import Session, Booking
 
 
 from sqlalchemy import update as sa_update, select 
 from sqlalchemy.orm import selectinload
+from sqlalchemy.exc import IntegrityError
 
 
 
@@ -40,7 +44,7 @@ from sqlalchemy.orm import selectinload
 HANDLE_PLACEHOLDER_END,
 COMMIT_PLACEHOLDER)= range(3)
 
-PLACEHOLDER_BOOKING_STATUS = 7
+PLACEHOLDER_BOOKING_STATUS = BookingStatus.PLACEHOLDER
 
 async def placeholder_request_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     query = update.callback_query
@@ -150,7 +154,22 @@ async def handle_placeholder_commit(update: Update, context: ContextTypes.DEFAUL
             is_active=True
         )
         session.add(booking)
-        await session.commit()
+        try:
+            await session.commit()
+        except IntegrityError as e:
+            if not is_overlap_violation(e):
+                raise
+            await session.rollback()
+            msg = await query.edit_message_text(
+                f"⚠️ На даты {start_date} → {end_date} уже есть бронирование или блокировка.\n"
+                f"Выберите другой период.",
+                reply_markup=InlineKeyboardMarkup([
+                    [InlineKeyboardButton("🔄 Начать заново", callback_data=f"placeholder_{apartment_id}")]
+                ])
+            )
+            await add_message_to_cleanup(context, msg.chat_id, msg.message_id)
+            return COMMIT_PLACEHOLDER
+        booking_changed(booking)
 
     # 🔄 Показываем сообщение пользователю
     keyboard = [
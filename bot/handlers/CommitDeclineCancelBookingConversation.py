@@ -24,6 +24,10 @@ from db.models.bookings import Booking
 from db.models.apartments import Apartment
 
 from utils.escape import safe_html
+from utils.booking_events import booking_changed
+from utils.reference_data import BookingStatus, FINAL_STATUSES
+from utils.saved_search_matcher import match_freed_booking
+from utils.outbox import enqueue, kick_outbox
 
 from sqlalchemy import select, update as sa_update
 from sqlalchemy.orm import selectinload
@@ -90,7 +94,7 @@ async def booking_decline_reason(update: Update, context: ContextTypes.DEFAULT_T
             return ConversationHandler.END
 
         # Запрещённые статусы
-        forbidden_statuses = [8, 9, 10, 11, 12]
+        forbidden_statuses = FINAL_STATUSES
         if booking.status_id in forbidden_statuses:
             await update.message.reply_text(
                 f"⛔ Нельзя отменить бронирование в статусе <b>{booking.booking_type.name}</b>.",
@@ -113,12 +117,50 @@ async def booking_decline_reason(update: Update, context: ContextTypes.DEFAULT_T
         booking.status_id = status_id
         booking.decline_reason = reason
 
+        # Определяем инициатора
+        initiator_tg_id = update.effective_user.id
+        guest_tg_id = booking.tg_user_id
+        owner_tg_id = booking.apartment.owner_tg_id
+
+        # Уведомление второй стороне — в outbox той же транзакцией, что и смена статуса
+        if initiator_tg_id == guest_tg_id:
+            # Отмену делает гость → уведомляем владельца
+            enqueue(
+                session,
+                chat_id=owner_tg_id,
+                kind="booking_cancelled_by_guest",
+                booking_id=booking.id,
+                text=(
+                    f"❌ Гость отменил бронирование. №{booking.id}\n"
+                    f"Адрес: {booking.apartment.short_address}\n"
+                    f"C: {booking.check_in} по: {booking.check_out}\n"
+                    f"Причина: {reason}"
+                )
+            )
+            confirm_text = "✅ Вы отменили бронирование, владелец уведомлён."
+        else:
+            # Отмену делает владелец → уведомляем гостя
+            enqueue(
+                session,
+                chat_id=guest_tg_id,
+                kind="booking_declined_by_owner",
+                booking_id=booking.id,
+                text=(
+                    f"❌ Ваше бронирование №{booking.id} отменено собственником.\n"
+                    f"Адрес: {booking.apartment.short_address}\n"
+                    f"C: {booking.check_in} по: {booking.check_out}\n"
+                    f"Причина: {reason}\n\n"
+                    f"Хотите создать новое бронирование? 👉 /start"
+                )
+            )
+            confirm_text = "✅ Бронирование отклонено, гость уведомлён."
+
         await session.commit()
+        booking_changed(booking)
+        kick_outbox(context.job_queue)
+        # Даты освободились — уведомления по сохранённым поискам в фоне
+        context.application.create_task(match_freed_booking(context.bot, booking))
 
-    # Определяем инициатора
-    initiator_tg_id = update.effective_user.id
-    guest_tg_id = booking.tg_user_id
-    owner_tg_id = booking.apartment.owner_tg_id
     structured_logger.info(
             "Reject booking",
             user_id=initiator_tg_id,
@@ -132,32 +174,6 @@ async def booking_decline_reason(update: Update, context: ContextTypes.DEFAULT_T
                 'guest':booking.tg_user_id
             }
         )
-    if initiator_tg_id == guest_tg_id:
-        # Отмену делает гость → уведомляем владельца
-        await context.bot.send_message(
-            chat_id=owner_tg_id,
-            text=(
-                f"❌ Гость отменил бронирование. №{booking.id}\n"
-                f"Адрес: {booking.apartment.short_address}\n"
-                f"C: {booking.check_in} по: {booking.check_out}\n"
-                f"Причина: {reason}"
-            )
-        )
-        confirm_text = "✅ Вы отменили бронирование, владелец уведомлён."
-    else:
-        # Отмену делает владелец → уведомляем гостя
-        await context.bot.send_message(
-            chat_id=guest_tg_id,
-            text=(
-                f"❌ Ваше бронирование №{booking.id} отменено собственником.\n"
-                f"Адрес: {booking.apartment.short_address}\n"
-                f"C: {booking.check_in} по: {booking.check_out}\n"
-                f"Причина: {reason}\n\n"
-                f"Хотите создать новое бронирование? 👉 /start"
-            )
-        )
-        confirm_text = "✅ Бронирование отклонено, гость уведомлён."
-
     await update.message.reply_text(confirm_text, reply_markup=ReplyKeyboardRemove())
 
     # Чистим временные данные
@@ -168,8 +184,8 @@ async def booking_decline_reason(update: Update, context: ContextTypes.DEFAULT_T
 
 
 # ✅ Only one function: booking confirmation
-BOOKING_STATUS_PENDING = 5
-BOOKING_STATUS_CONFIRMED = 6
+BOOKING_STATUS_PENDING = BookingStatus.PENDING
+BOOKING_STATUS_CONFIRMED = BookingStatus.CONFIRMED
 
 async def booking_confirm_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle booking confirmation by owner"""
@@ -211,23 +227,27 @@ async def booking_confirm_callback(update: Update, context: ContextTypes.DEFAULT
         # ✅ Change status to Confirmed (id=6)
         booking.status_id = BOOKING_STATUS_CONFIRMED
         booking.updated_at = datetime.utcnow()
-        await session.commit()
 
-    # ✅ Send notification to guest with chat button
-    keyboard = [
-        [InlineKeyboardButton("💬 Перейти в чат", callback_data=f"chat_booking_enter_{booking_id}")]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-
-    await context.bot.send_message(
-        chat_id=booking.tg_user_id,
-        text=(
-            f"✅ Ваше бронирование №{booking.id} подтверждено!\n\n"
-            f"Для получения дополнительной информации и по вопросам оплаты "
-            f"используйте встроенный чат ниже."
-        ),
-        reply_markup=reply_markup
-    )
+        # ✅ Notification to guest with chat button — via outbox, in the same transaction
+        keyboard = [
+            [InlineKeyboardButton("💬 Перейти в чат", callback_data=f"chat_booking_enter_{booking_id}")]
+        ]
+        enqueue(
+            session,
+            chat_id=booking.tg_user_id,
+            kind="booking_confirmed",
+            booking_id=booking.id,
+            text=(
+                f"✅ Ваше бронирование №{booking.id} подтверждено!\n\n"
+                f"Для получения дополнительной информации и по вопросам оплаты "
+                f"используйте встроенный чат ниже."
+            ),
+            reply_markup=InlineKeyboardMarkup(keyboard)
+        )
+
+        await session.commit()
+        booking_changed(booking)
+        kick_outbox(context.job_queue)
 
         # 2) Убираем inline-кнопки из того сообщения, где была нажата кнопка (owner message)
     try:
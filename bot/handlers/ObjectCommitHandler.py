@@ -8,6 +8,8 @@ from sqlalchemy import select
 from telegram import Update
 
 from utils.logging_config import structured_logger
+from utils.apartment_events import apartment_changed
+from utils.saved_search_matcher import match_published_apartment
 
 
 async def confirm_apartment_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -22,6 +24,9 @@ async def confirm_apartment_callback(update: Update, context: ContextTypes.DEFAU
 
             apt.is_draft = False
             await session.commit()
+            apartment_changed(apartment_id)
+            # Новая квартира может подойти под сохранённые поиски арендаторов
+            context.application.create_task(match_published_apartment(context.bot, apartment_id))
             structured_logger.info(
                 "Complite new object",
                 action="Complit new object",
@@ -8,6 +8,7 @@ from telegram import Update
 from datetime import datetime
 
 from utils.logging_config import structured_logger
+from utils.apartment_events import apartment_changed
 
 
 
@@ -25,6 +26,7 @@ async def redo_apartment_callback(update: Update, context: ContextTypes.DEFAULT_
                     updated_at=datetime.utcnow()  # Принудительное обновление (необязательно, но безопасно)
                 )
             )
+            apartment_changed(apartment_id)
             structured_logger.info(
                 "Reject new object",
                 action="Reject new object",
@@ -14,6 +14,7 @@ from telegram.ext import (
     filters, 
     CallbackQueryHandler
 )
+from telegram.error import TelegramError
 from geoalchemy2.shape import to_shape
 from handlers.ShowInfoConversation import info_command
 from handlers.ReferralLinkConversation import start_invite
@@ -36,11 +37,14 @@ from db.models.booking_chat import BookingChat
 
 from utils.user_session import get_user_by_tg_id, get_source_by_suffix, get_user_by_source_id, create_user, create_session
 from utils.owner_objects_request_from_menu import prepare_owner_objects_cards
+from utils.reference_data import ACTIVE_STATUSES
 from utils.renter_bookings_request_from_menu import prepare_renter_bookings_cards
 from utils.owner_orders_request_from_menu import prepare_owner_orders_cards
 from utils.escape import safe_html
 from utils.keyboard_builder import build_calendar, CB_NAV, CB_SELECT
 from utils.message_tricks import add_message_to_cleanup, cleanup_messages, send_message
+from utils.apartment_events import apartment_changed
+from utils.static_media import static_media
 #from utils.delete_apartment import delete_apartment
 
 # Updated logging imports
@@ -201,19 +205,19 @@ async def begin_registration(update: Update, context: ContextTypes.DEFAULT_TYPE,
             )
             try:
             # Send welcome message
-                with open(WELCOME_PHOTO_URL, "rb") as f:
-                    await update.message.reply_photo(
-                        photo=f,
-                        caption=f"{WELCOME_TEXT}\n\n🎯 Если вы впервые у нас, пройдите короткую регистрацию."
-                    )
+                # Фото загружено в Telegram один раз, отправляем по file_id
+                await update.message.reply_photo(
+                    photo=await static_media.photo(context.bot, WELCOME_PHOTO_URL),
+                    caption=f"{WELCOME_TEXT}\n\n🎯 Если вы впервые у нас, пройдите короткую регистрацию."
+                )
                 structured_logger.debug(
                     "Welcome photo sent successfully",
                     user_id=user_id,
                     action="welcome_photo_sent"
                 )
-            except FileNotFoundError as e:
+            except (FileNotFoundError, TelegramError) as e:
                 structured_logger.warning(
-                    f"Welcome photo not found: {WELCOME_PHOTO_URL}",
+                    f"Welcome photo unavailable: {WELCOME_PHOTO_URL}",
                     user_id=user_id,
                     action="welcome_photo_missing",
                     exception=e
@@ -903,6 +907,7 @@ async def handle_new_price_input(update: Update, context: ContextTypes.DEFAULT_T
             apartment.price = new_price
             apartment.updated_at = datetime.utcnow()
             await session.commit()
+            apartment_changed(apartment_id)
 
             structured_logger.info(
                 f"Apartment price updated from {old_price} to {new_price}",
@@ -927,7 +932,7 @@ async def handle_new_price_input(update: Update, context: ContextTypes.DEFAULT_T
         
 #======показ бронирований Арендатору=========
 async def select_renter_bookings (update: Update, context: ContextTypes.DEFAULT_TYPE):
-    ACTIVE_BOOKING_STATUSES = [5, 6]
+    ACTIVE_BOOKING_STATUSES = ACTIVE_STATUSES
     tg_user_id = update.effective_user.id
     async with get_async_session() as session:
         # Получаем активные бронирования Арендатора
@@ -1057,7 +1062,7 @@ async def delete_apartment_confirmed(update: Update, context: ContextTypes.DEFAU
     apartment_id = int(query.data.split("_")[-1])
     tg_user_id = update.effective_user.id
 
-    ACTIVE_BOOKING_STATUSES = [5, 6]
+    ACTIVE_BOOKING_STATUSES = ACTIVE_STATUSES
     
     with LoggingContext("apartment_deletion", user_id=tg_user_id, 
                        apartment_id=apartment_id) as log_ctx:
@@ -1120,6 +1125,7 @@ async def delete_apartment_confirmed(update: Update, context: ContextTypes.DEFAU
                 )
             )
             await session.commit()
+            apartment_changed(apartment_id)
 
             structured_logger.info(
                 f"Apartment {apartment_id} successfully deleted",
@@ -0,0 +1,49 @@
+from telegram import Update
+from telegram.ext import ContextTypes, CallbackQueryHandler
+
+from utils.logging_config import structured_logger
+from utils.saved_search_matcher import save_search
+
+
+async def save_search_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = update.callback_query
+    await query.answer()
+
+    search_session_id = int(query.data.split("_")[-1])
+    tg_user_id = update.effective_user.id
+
+    try:
+        saved = await save_search(search_session_id, tg_user_id)
+    except Exception as e:
+        structured_logger.error(
+            f"Critical error in saving search: {str(e)}",
+            user_id=tg_user_id,
+            action="Save search",
+            exception=e,
+            context={'search_session_id': search_session_id}
+        )
+        await query.message.reply_text("Произошла ошибка. Попробуйте позже или обратитесь в поддержку.")
+        return
+
+    if saved is None:
+        await query.message.reply_text("❌ Поиск не найден. Попробуйте снова /start_search")
+        return
+
+    flex = (saved.filters or {}).get("flex") or 0
+    await query.edit_message_reply_markup(reply_markup=None)
+    await query.message.reply_text(
+        f"🔔 Поиск сохранён: {saved.check_in:%d.%m} – {saved.check_out:%d.%m}"
+        f"{f' (±{flex} дн.)' if flex else ''}.\n"
+        "Сообщим, как только появится подходящий вариант."
+    )
+    structured_logger.info(
+        "Search saved",
+        user_id=tg_user_id,
+        action="Save search",
+        context={'saved_search_id': saved.id, 'search_session_id': search_session_id}
+    )
+
+save_search_handler = CallbackQueryHandler(
+    save_search_callback,
+    pattern=r"^save_search_\d+$"
+)
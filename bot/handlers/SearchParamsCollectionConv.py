@@ -1,6 +1,7 @@
 import datetime
+import time
+from array import array
 from datetime import date
-from enum import IntEnum
 
 from telegram import (
     Update,
@@ -20,30 +21,44 @@ from telegram.ext import (
     MessageHandler,
     filters
 )
-from geoalchemy2.shape import to_shape
+from geoalchemy2.shape import to_shape, from_shape
+from shapely.geometry import Point
 
 from decimal import Decimal
 from db.db_async import get_async_session
 
-from utils.keyboard_builder import build_types_keyboard, build_price_filter_keyboard, build_calendar, CB_NAV, CB_SELECT
-from utils.apts_search_session import get_apartments
+from utils.keyboard_builder import build_types_keyboard, build_price_filter_keyboard, build_calendar, build_location_keyboard, build_flex_keyboard, CB_NAV, CB_SELECT
+from utils.apts_search_session import (
+    get_apartments,
+    get_first_page,
+    count_matching,
+    create_search_session,
+    fetch_page,
+    load_next_page,
+    append_search_page,
+    is_paginated,
+    GEO_MAX_RADIUS_KM
+)
 from utils.booking_navigation_view import booking_apartment_card_full
 from utils.booking_complit_view import show_booked_appartment
 from utils.escape import safe_html
-from utils.request_confirmation import send_booking_request_to_owner
+from utils.outbox import kick_outbox
 from utils.message_tricks import cleanup_messages, add_message_to_cleanup, send_message, sanitize_message
-
-from db.models import (ApartmentType,
-                       Apartment,
+from utils.card_cache import card_cache
+from utils.search_progress import search_progress
+from utils.card_prefetch import card_prefetcher
+from utils.booking_service import create_booking, BookingOutcome
+from utils.reference_data import reference_data
+from utils.availability_heatmap import availability_heatmap
+from utils.flexible_search import FLEX_MAX_DAYS
+
+from db.models import (Apartment,
                        Session,
-                       SearchSession,
-                       Booking,
                        BookingType)
 
 from utils.logging_config import structured_logger, log_db_select
 
 from sqlalchemy import update as sa_update, select 
-from sqlalchemy.orm import selectinload
 
 import json
 from telegram.error import TelegramError
@@ -64,12 +79,14 @@ def safe_json(obj):
  SELECTING_PRICE,
  VIEWING_APARTMENTS,
  ENTERING_GUESTS,
- BOOKING_COMMENT)= range(7)
+ BOOKING_COMMENT,
+ SELECTING_LOCATION,
+ SELECTING_FLEX,
+ ENTERING_KEYWORDS)= range(10)
 
+# Ограничение длины запроса полнотекстового поиска
+KEYWORDS_MAX_LENGTH = 100
 
-class BookingStatus(IntEnum):
-    BOOKING_STATUS_PENDING = 5
-    BOOKING_STATUS_CONFIRMED = 6
 
 PRICE_MAP = {
     "price_all":        (None, {"text": "Без фильтра по цене"}),
@@ -78,6 +95,17 @@ PRICE_MAP = {
     "price_6000_plus":  ({"min": 6000, "max": None}, {"text": "6000+ ₽"}),
 }
 
+# Районы для поиска "рядом": ключ callback -> (широта, долгота, подпись)
+DISTRICTS = {
+    "center":    (43.5855, 39.7231, "🏙 Центр"),
+    "adler":     (43.4286, 39.9239, "✈️ Адлер"),
+    "sirius":    (43.4045, 39.9553, "🏟 Сириус"),
+    "khosta":    (43.5144, 39.8698, "🌿 Хоста"),
+    "dagomys":   (43.6594, 39.6546, "🌊 Дагомыс"),
+    "lazarevskoe": (43.9087, 39.3314, "🏖 Лазаревское"),
+    "polyana":   (43.6797, 40.2056, "🏔 Красная Поляна"),
+}
+
 async def start_search(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Старт поиска жилья: инициализация данных пользователя"""
     # Определяем источник вызова
@@ -99,8 +127,11 @@ async def start_search(update: Update, context: ContextTypes.DEFAULT_TYPE):
         context.user_data["actual_price"] = None
         context.user_data["apartment_type"] = None
         context.user_data["filtered_apartments_ids"] = None
-        context.user_data["filtered_apartments"] = None
         context.user_data["new_search_id"] = None
+        context.user_data["geo"] = None
+        context.user_data["flex_days"] = 0
+        context.user_data["flex_shifts"] = {}
+        context.user_data["keywords"] = None
         
         await cleanup_messages(context)
         
@@ -111,10 +142,13 @@ async def start_search(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
 
         # Отправляем новое сообщение с календарём
+        today = date.today()
+        free_counts = await availability_heatmap.month_or_none(today.year, today.month)
         msg = await context.bot.send_message(
             chat_id=target_chat,
-            text="📅 Выберите дату заезда",
-            reply_markup=build_calendar(date.today().year, date.today().month)
+            text="📅 Выберите дату заезда\n<i>Рядом с числом — сколько вариантов свободно в эту ночь</i>",
+            reply_markup=build_calendar(today.year, today.month, free_counts=free_counts),
+            parse_mode="HTML"
         )
         await add_message_to_cleanup(context,msg.chat_id,msg.message_id)
         return SELECTING_CHECKIN
@@ -149,8 +183,10 @@ async def calendar_callback(update: Update, context: CallbackContext):
     if data.startswith(CB_NAV):
         _, y, m = data.split(":")
         y, m = int(y), int(m)
+        # Счётчики месяца — из кэша, не более одного запроса на месяц
+        free_counts = await availability_heatmap.month_or_none(y, m)
         msg = await query.edit_message_reply_markup(
-            reply_markup=build_calendar(y, m, check_in, check_out)
+            reply_markup=build_calendar(y, m, check_in, check_out, free_counts=free_counts)
         )
         await add_message_to_cleanup(context,msg.chat_id,msg.message_id)
         return SELECTING_CHECKIN if not check_in else SELECTING_CHECKOUT
@@ -178,9 +214,10 @@ async def calendar_callback(update: Update, context: CallbackContext):
             # ✅ Сохраняем дату заезда
             context.user_data["check_in"] = selected_date
 
+            free_counts = await availability_heatmap.month_or_none(selected_date.year, selected_date.month)
             msg = await query.edit_message_text(
                 f"✅ Дата заезда: {selected_date}\nТеперь выберите дату выезда",
-                reply_markup=build_calendar(selected_date.year, selected_date.month, check_in=selected_date)
+                reply_markup=build_calendar(selected_date.year, selected_date.month, check_in=selected_date, free_counts=free_counts)
             )
             await add_message_to_cleanup(context,msg.chat_id,msg.message_id)
             return SELECTING_CHECKOUT
@@ -191,28 +228,49 @@ async def calendar_callback(update: Update, context: CallbackContext):
 
         context.user_data["check_out"] = selected_date
 
-        async with get_async_session() as session:
-            result = await session.execute(select(ApartmentType).order_by(ApartmentType.id))
-            types = [{"id": t.id, "name": t.name} for t in result.scalars().all()]
-        # Сохраняем в user_data
-        context.user_data["types"] = types
-        context.user_data["selected_types"] = []
-
-        # Строим клавиатуру
-        keyboard = build_types_keyboard(types, [])
-        reply_markup = InlineKeyboardMarkup(keyboard)
-
-        
-
         msg = await query.edit_message_text(
                 f"🔦 Поиск по датам:\n"
                 f"с <b>{check_in}</b> по <b>{selected_date}</b>\n"
-                "Выберите тип. Можно выбрать несколько вариантов:",
-                reply_markup=reply_markup,
+                "Даты точные или можно сдвинуть на несколько дней?",
+                reply_markup=InlineKeyboardMarkup(build_flex_keyboard(FLEX_MAX_DAYS)),
                 parse_mode="HTML"
             )
         await add_message_to_cleanup(context,msg.chat_id,msg.message_id)
-        return SELECTING_TYPES
+        return SELECTING_FLEX
+
+async def handle_flex_choice(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Точные даты или гибкий поиск ±N дней, затем выбор типов."""
+    query = update.callback_query
+    await query.answer()
+
+    try:
+        flex = int(query.data.removeprefix("flex_"))
+    except ValueError:
+        return SELECTING_FLEX
+    flex = context.user_data["flex_days"] = max(0, min(flex, FLEX_MAX_DAYS))
+
+    check_in = context.user_data.get("check_in")
+    check_out = context.user_data.get("check_out")
+    flex_text = f" (±{flex} дн.)" if flex else ""
+
+    types = await reference_data.apartment_types()
+    # Сохраняем в user_data
+    context.user_data["types"] = types
+    context.user_data["selected_types"] = []
+
+    # Строим клавиатуру
+    keyboard = build_types_keyboard(types, [])
+    reply_markup = InlineKeyboardMarkup(keyboard)
+
+    msg = await query.edit_message_text(
+            f"🔦 Поиск по датам:\n"
+            f"с <b>{check_in}</b> по <b>{check_out}</b>{flex_text}\n"
+            "Выберите тип. Можно выбрать несколько вариантов:",
+            reply_markup=reply_markup,
+            parse_mode="HTML"
+        )
+    await add_message_to_cleanup(context,msg.chat_id,msg.message_id)
+    return SELECTING_TYPES
 
 
 async def handle_apartment_type_multiselection(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -281,16 +339,110 @@ async def handle_price_filter_selection(update: Update, context: ContextTypes.DE
 
     context.user_data["price_filter"] = price_range
     context.user_data["price_text"] = meta["text"]
-    
+
+    await query.edit_message_text(
+        f"✅ Вы выбрали фильтр по цене: {meta["text"]}\n\n"
+        "🔎 Что важно? Напишите ключевые слова — например, «вид на море», «парковка» "
+        "или название улицы:",
+        reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("⏭ Пропустить", callback_data="kw_skip")]])
+    )
+    return ENTERING_KEYWORDS
+
+async def handle_keywords(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Ключевые слова для полнотекстового поиска по адресу и описанию."""
+    keywords = " ".join(update.message.text.split())[:KEYWORDS_MAX_LENGTH]
+    context.user_data["keywords"] = keywords or None
+    return await ask_location(update, context)
+
+async def handle_keywords_skip(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = update.callback_query
+    await query.answer()
+    await query.edit_message_reply_markup(reply_markup=None)
+    context.user_data["keywords"] = None
+    return await ask_location(update, context)
+
+async def ask_location(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    msg = await send_message(
+        update,
+        "📍 Где искать? Выберите район или поделитесь геопозицией:",
+        reply_markup=InlineKeyboardMarkup(build_location_keyboard(DISTRICTS))
+    )
+    await add_message_to_cleanup(context, msg.chat_id, msg.message_id)
+    return SELECTING_LOCATION
+
+async def handle_location_choice(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Выбор района поиска или запрос геопозиции пользователя."""
+    query = update.callback_query
+    key = query.data.removeprefix("geo_")
+
+    # На callback отвечаем один раз: для неизвестного района — сразу алертом
+    if key not in ("me", "any") and key not in DISTRICTS:
+        await query.answer("Неизвестный район.", show_alert=True)
+        return SELECTING_LOCATION
+    await query.answer()
+
+    if key == "me":
+        await query.edit_message_reply_markup(reply_markup=None)
+        msg = await query.message.reply_text(
+            f"📍 Отправьте геопозицию — покажем варианты в радиусе {GEO_MAX_RADIUS_KM} км",
+            reply_markup=ReplyKeyboardMarkup(
+                [[KeyboardButton("📍 Отправить геопозицию", request_location=True)]],
+                resize_keyboard=True,
+                one_time_keyboard=True
+            )
+        )
+        await add_message_to_cleanup(context, msg.chat_id, msg.message_id)
+        return SELECTING_LOCATION
+
+    if key == "any":
+        context.user_data["geo"] = None
+    else:
+        lat, lon, label = DISTRICTS[key]
+        context.user_data["geo"] = {"lat": lat, "lon": lon, "radius_km": GEO_MAX_RADIUS_KM, "label": label}
+
+    await query.edit_message_reply_markup(reply_markup=None)
+    return await run_search(update, context)
+
+async def handle_shared_location(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Пользователь поделился геопозицией — ищем вокруг неё."""
+    location = update.message.location
+    lat, lon = round(location.latitude, 4), round(location.longitude, 4)
+    context.user_data["geo"] = {"lat": lat, "lon": lon, "radius_km": GEO_MAX_RADIUS_KM, "label": "📍 рядом с вами"}
+
+    # Сохраняем последнюю известную точку пользователя в сессии
+    session_id = context.user_data.get("session_id")
+    if session_id:
+        async with get_async_session() as session:
+            await session.execute(
+                sa_update(Session)
+                .where(Session.id == session_id)
+                .values(location=from_shape(Point(lon, lat), srid=4326))
+            )
+            await session.commit()
+
+    msg = await update.message.reply_text("📍 Геопозиция получена", reply_markup=ReplyKeyboardRemove())
+    await add_message_to_cleanup(context, msg.chat_id, msg.message_id)
+    return await run_search(update, context)
+
+async def run_search(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Итог выбранных фильтров, поиск и показ первой карточки."""
     check_in = context.user_data.get("check_in")
     check_out = context.user_data.get("check_out")
     selected_names = context.user_data.get("selected_names")
+    price_range = context.user_data.get("price_filter")
+    geo = context.user_data.get("geo")
+    flex = context.user_data.get("flex_days") or 0
+    started = time.monotonic()
 
     # ✅ Демонстрируем пользователю его выбор
-    await query.edit_message_text(
-        f"✅ Вы выбрали аренду с: {check_in} по {check_out}\n"
+    await send_message(
+        update,
+        f"✅ Вы выбрали аренду с: {check_in} по {check_out}"
+        f"{f' (±{flex} дн.)' if flex else ''}\n"
         f"✅ Вы выбрали типы: {', '.join(selected_names)}\n"
-        f"✅ Вы выбрали фильтр по цене: {meta["text"]}\n\n"
+        f"✅ Вы выбрали фильтр по цене: {context.user_data.get('price_text')}\n"
+        f"✅ Район: {geo['label'] if geo else 'без разницы'}\n"
+        f"✅ Ключевые слова: {context.user_data.get('keywords') or '—'}\n\n"
         "🔍 Переходим к подбору квартир..."
     )
 
@@ -301,10 +453,13 @@ async def handle_price_filter_selection(update: Update, context: ContextTypes.DE
         if not apartment_ids:
             return ConversationHandler.END
         
+        # None — число результатов досчитается в фоне после показа первой карточки
+        total = context.user_data.get("search_total")
+
         # ✅ Show count BEFORE the card
         count_msg = await context.bot.send_message(
             chat_id=update.effective_chat.id,
-            text=f"🔍 Найдено предложений: {len(apartment_ids)}"
+            text=f"🔍 Найдено предложений: {total}" if total is not None else "🔍 Считаем предложения..."
         )
         await add_message_to_cleanup(context, count_msg.chat_id, count_msg.message_id)
         
@@ -316,12 +471,29 @@ async def handle_price_filter_selection(update: Update, context: ContextTypes.DE
                 'out': check_out.isoformat() if check_out else None,
                 'price_range':price_range,
                 'types': selected_names,
-                'number_candidates': len(apartment_ids) 
+                'geo': geo,
+                'flex_days': flex,
+                'keywords': context.user_data.get("keywords"),
+                'shifted': len(context.user_data.get("flex_shifts") or {}),
+                'number_candidates': total
             }
         )
 
         # Now show the first apartment
         await show_apartment_card(update, context, index=0)
+
+        structured_logger.info(
+            "First search result shown",
+            user_id=update.effective_user.id,
+            action="search_first_card",
+            context={
+                'time_to_first_card_ms': round((time.monotonic() - started) * 1000),
+                'streamed': total is None
+            }
+        )
+
+        if context.user_data.get("new_search_id") is None:
+            context.application.create_task(finish_search(context, count_msg, started), update=update)
         return VIEWING_APARTMENTS
         
     except Exception as e:
@@ -332,30 +504,147 @@ async def handle_price_filter_selection(update: Update, context: ContextTypes.DE
         )
         return ConversationHandler.END
 
+async def finish_search(context: ContextTypes.DEFAULT_TYPE, count_msg, started: float):
+    """
+    Фоновая часть поиска после показа первой карточки: число результатов,
+    запись search_sessions и загрузка следующей страницы.
+    Если пользователь тем временем начал новый поиск, результат отбрасывается.
+    """
+    user_data = context.user_data
+    search_filters = user_data["search_filters"]
+    check_in = user_data["check_in"]
+    check_out = user_data["check_out"]
+
+    def is_current() -> bool:
+        return user_data.get("search_filters") is search_filters
+
+    try:
+        total = user_data.get("search_total")
+        if total is None:
+            total = await count_matching(check_in, check_out, search_filters)
+            if not is_current():
+                return
+            if user_data.get("search_total") is None:
+                user_data["search_total"] = max(total, len(user_data["filtered_apartments_ids"]))
+            total = user_data["search_total"]
+
+        try:
+            await count_msg.edit_text(f"🔍 Найдено предложений: {total}")
+        except TelegramError as e:
+            structured_logger.warning(
+                f"Failed to update search count message: {e}",
+                action="search_background",
+                context={'message_id': count_msg.message_id}
+            )
+
+        loaded = list(user_data["filtered_apartments_ids"])
+        new_search = await create_search_session(
+            user_data.get("session_id"),
+            user_data.get("tg_user_id"),
+            search_filters,
+            loaded,
+            user_data.get("search_cursor"),
+            total
+        )
+        if not is_current():
+            return
+        user_data["new_search_id"] = new_search.id
+
+        # Страницы, догруженные пока сессия записывалась, дописываем отдельно
+        apartment_ids = user_data["filtered_apartments_ids"]
+        if len(apartment_ids) > len(loaded):
+            await append_search_page(new_search.id, list(apartment_ids[len(loaded):]), user_data.get("search_cursor"))
+
+        # Следующая страница ждёт в user_data: листание за её границу не ходит в БД
+        cursor = user_data.get("search_cursor")
+        if cursor:
+            page, next_cursor = await fetch_page(check_in, check_out, search_filters, cursor)
+            if is_current() and user_data.get("search_cursor") == cursor:
+                user_data["search_next_page"] = (cursor, page, next_cursor)
+
+        structured_logger.info(
+            "Search finished in background",
+            action="search_background",
+            context={
+                'search_id': new_search.id,
+                'total': total,
+                'elapsed_ms': round((time.monotonic() - started) * 1000)
+            }
+        )
+    except Exception as e:
+        structured_logger.error(
+            f"Background search step failed: {e}",
+            action="search_background",
+            exception=e
+        )
+
+async def load_more_apartments(context: ContextTypes.DEFAULT_TYPE) -> array:
+    """Догружает следующую страницу выдачи по сохранённому курсору."""
+    apartment_ids = context.user_data["filtered_apartments_ids"]
+    cursor = context.user_data.get("search_cursor")
+    if not cursor:
+        return apartment_ids
+
+    search_id = context.user_data.get("new_search_id")
+    prefetched = context.user_data.pop("search_next_page", None)
+    if prefetched and prefetched[0] == cursor:
+        _, page, next_cursor = prefetched
+        if search_id is not None:
+            await append_search_page(search_id, page, next_cursor)
+    else:
+        page, next_cursor = await load_next_page(
+            search_id,
+            context.user_data["check_in"],
+            context.user_data["check_out"],
+            context.user_data["search_filters"],
+            cursor
+        )
+    apartment_ids.extend(page)
+    context.user_data["search_cursor"] = next_cursor
+    if next_cursor is None:
+        # Выдача могла измениться с момента подсчёта — итог по факту
+        context.user_data["search_total"] = len(apartment_ids)
+    return apartment_ids
+
 async def show_apartment_card(update: Update, context: ContextTypes.DEFAULT_TYPE, index: int = 0, is_navigation: bool = False):
     """Unified function to display apartment cards."""
-    apts = context.user_data.get("filtered_apartments", [])
-    if not apts:
+    apartment_ids = context.user_data.get("filtered_apartments_ids")
+    if not apartment_ids:
         await send_message(update, "❌ Список квартир пуст")
         return ConversationHandler.END
     
-    total = len(apts)
-    index = max(0, min(index, total - 1))
+    total = context.user_data.get("search_total")
+    index = max(0, min(index, total - 1)) if total else max(0, index)
+
+    # Выдача грузится страницами: дошли до конца загруженного — берём следующую
+    if index >= len(apartment_ids):
+        apartment_ids = await load_more_apartments(context)
+        index = min(index, len(apartment_ids) - 1)
+
+    # Пока число результатов считается в фоне, показываем загруженное и «есть ещё»
+    total = context.user_data.get("search_total")
+    has_more = total is None and bool(context.user_data.get("search_cursor"))
+    if total is None:
+        total = len(apartment_ids)
     
-    apartment = apts[index]
-    text, media, markup = booking_apartment_card_full(apartment, index, total)
+    apartment = await card_cache.get(apartment_ids[index])
+    if apartment is None:
+        await send_message(update, "❌ Объект больше недоступен. Попробуйте другой вариант")
+        return VIEWING_APARTMENTS
+    shift = context.user_data.get("flex_shifts", {}).get(apartment.id)
+    shifted_dates = None
+    if shift:
+        shifted_dates = (
+            context.user_data["check_in"] + datetime.timedelta(days=shift),
+            context.user_data["check_out"] + datetime.timedelta(days=shift)
+        )
+    text, media, markup = booking_apartment_card_full(apartment, index, total, shifted_dates, has_more)
     
     query = update.callback_query
     
-    # Update search session index
-    if "new_search_id" in context.user_data:
-        async with get_async_session() as session:
-            await session.execute(
-                sa_update(SearchSession)
-                .where(SearchSession.id == context.user_data["new_search_id"])
-                .values(current_index=index)
-            )
-            await session.commit()
+    # Позицию пагинации пишем в БД отложенно (write-behind), без ожидания commit
+    if context.user_data.get("new_search_id"):
+        search_progress.record(context.user_data["new_search_id"], index)
     """  
     # Display apartment
     if query and is_navigation:
@@ -388,10 +677,9 @@ async def show_apartment_card(update: Update, context: ContextTypes.DEFAULT_TYPE
             structured_logger.debug(
                 "Editing apartment view",
                 context={
-                    "mode": "edit_media" if (media and media[0].media) else "edit_text",
-                    "photo": safe_json(media[0].media if media else None),
-                    "caption/text": text,
-                    "reply_markup": safe_json(markup.to_dict() if markup else None),
+                    "mode": "edit_media" if media else "edit_text",
+                    "apartment_id": apartment.id,
+                    "index": index,
                 }
             )
 
@@ -423,9 +711,8 @@ async def show_apartment_card(update: Update, context: ContextTypes.DEFAULT_TYPE
                         else "photo" if (media and len(media) == 1)
                         else "text"
                     ),
-                    "media_list": safe_json([m.media for m in media] if media else None),
-                    "caption/text": text,
-                    "reply_markup": safe_json(markup.to_dict() if markup else None),
+                    "apartment_id": apartment.id,
+                    "index": index,
                 }
             )
 
@@ -457,6 +744,9 @@ async def show_apartment_card(update: Update, context: ContextTypes.DEFAULT_TYPE
 
             await add_message_to_cleanup(context, sent.chat_id, sent.message_id)
 
+        # Пока пользователь смотрит карточку, подгружаем соседние
+        card_prefetcher.schedule(update.effective_chat.id, apartment_ids, index)
+
     except TelegramError as e:
         structured_logger.error(
             "Telegram API error while sending apartment",
@@ -516,6 +806,11 @@ async def start_booking(update: Update, context: ContextTypes.DEFAULT_TYPE):
     context.user_data["chosen_apartment"] = apartment_id
     context.user_data["actual_price"] = price
 
+    # Даты брони: с учётом сдвига, если квартира нашлась гибким поиском
+    shift = datetime.timedelta(days=context.user_data.get("flex_shifts", {}).get(apartment_id, 0))
+    context.user_data["booking_check_in"] = context.user_data["check_in"] + shift
+    context.user_data["booking_check_out"] = context.user_data["check_out"] + shift
+
     await query.message.reply_text("Введите количество гостей:")
     return ENTERING_GUESTS
 
@@ -547,100 +842,90 @@ async def finalize_booking (update: Update, context: ContextTypes.DEFAULT_TYPE):
         else:
             comment = sanitize_message(comment)[:255]
         print(f"[DEBUG] context.user_data: {context.user_data}")
-        check_in = context.user_data.get("check_in") 
-        check_out = context.user_data.get("check_out")
+        check_in = context.user_data.get("booking_check_in") or context.user_data.get("check_in")
+        check_out = context.user_data.get("booking_check_out") or context.user_data.get("check_out")
         price = context.user_data.get("actual_price")
         total = (check_out - check_in).days * price
         msg_id = context.user_data.get("last_filter_apartment_message_id")
         cht_id = context.user_data.get("last_filter_apartment_chat_id")
 
-        async with get_async_session() as session:
-            session_id = context.user_data.get("session_id")
-            if not session_id:
-                # создаём новую сессию
-                new_session = Session(tg_user_id=context.user_data['tg_user_id'], role_id = 1,last_action={"event": "order_started"})
-                session.add(new_session)
-                await session.flush()  # получаем id новой сессии
-                session_id = new_session.id
-                context.user_data["session_id"] = session_id  # кладём обратно в контекст
-
-            booking = Booking(
-                tg_user_id = context.user_data['tg_user_id'],
-                apartment_id = context.user_data['chosen_apartment'],
-                status_id = BookingStatus.BOOKING_STATUS_PENDING,
-                guest_count = context.user_data['guest_count'],
-                total_price = total,
-                comments = comment,
-                check_in = check_in,
-                check_out = check_out
-            )
-            session.add(booking)
-            await session.commit()
-            await session.refresh(booking)
-
-            stmt = (
-                select(Booking)
-                .options(
-                    selectinload(Booking.apartment)
-                    .selectinload(Apartment.apartment_type),
-                    selectinload(Booking.apartment)
-                    .selectinload(Apartment.images),
-                    selectinload(Booking.apartment)
-                    .selectinload(Apartment.owner) 
-                )
-                .where(Booking.id == booking.id)
+        result = await create_booking(
+            tg_user_id=context.user_data['tg_user_id'],
+            apartment_id=context.user_data['chosen_apartment'],
+            check_in=check_in,
+            check_out=check_out,
+            guest_count=context.user_data['guest_count'],
+            total_price=total,
+            comments=comment
+        )
+        if result.outcome is BookingOutcome.DATES_TAKEN:
+            # Пока гость вводил данные, эти ночи успели забронировать
+            await update.message.reply_text(
+                "😔 К сожалению, эти даты уже заняты. Попробуйте другой вариант 👉 /start_search"
             )
-            result = await session.execute(stmt)
-            booking_full = result.scalar_one()
-            print(f"[DEBUG] Отправка запроса владельцу для booking_id={booking_full.id}")
-            await send_booking_request_to_owner(context.bot,booking_full)
-            print(f"[DEBUG] Сообщение владельцу должно быть отправлено")
-
-            await update.message.reply_text("✅ Ваше бронирование создано. После подтверждения заявки владельцем бот с вами свяжется.")
-            text, media = show_booked_appartment(booking_full)
-
-            structured_logger.info (
-                "New order request created",
-                user_id = Booking.tg_user_id,
-                action = "New booking request",
-                context={
-                    'booking_id':Booking.id,
-                    'Address': Booking.apartment.short_address,
-                    'Price': Booking.total_price,
-                    'in': Booking.check_in.isoformat() if Booking.check_in else None,
-                    'out': Booking.check_out.isoformat() if Booking.check_out else None
-                
-                }
+            return ConversationHandler.END
+        if result.outcome is BookingOutcome.APARTMENT_UNAVAILABLE:
+            await update.message.reply_text(
+                "😔 Объект больше недоступен для бронирования. Попробуйте другой вариант 👉 /start_search"
             )
-        
-            msg_ids = []
+            return ConversationHandler.END
 
-            if media:
-                media_messages = await update.message.reply_media_group(media)
-                msg_ids.extend([m.message_id for m in media_messages])
+        booking = result.booking
+        # Запрос владельцу уже в outbox — отправка не задерживает ответ гостю
+        kick_outbox(context.job_queue)
 
-            msg_text = await update.message.reply_text(text, parse_mode="HTML")
-            msg_ids.append(msg_text.message_id)
+        await update.message.reply_text("✅ Ваше бронирование создано. После подтверждения заявки владельцем бот с вами свяжется.")
+        text, media = show_booked_appartment(booking)
 
-            # Сохраняем список ID в session.last_action
-            session_obj = await session.get(Session, session_id)
-            if session_obj:
-                session_obj.last_action = {
-                    "event": "booking_created_message",
-                    "message_ids": msg_ids
-                }
-                    
+        structured_logger.info (
+            "New order request created",
+            user_id = booking.tg_user_id,
+            action = "New booking request",
+            context={
+                'booking_id': booking.id,
+                'Address': booking.apartment.short_address,
+                'Price': booking.total_price,
+                'in': booking.check_in.isoformat(),
+                'out': booking.check_out.isoformat()
+            }
+        )
+
+        msg_ids = []
+
+        if media:
+            media_messages = await update.message.reply_media_group(media)
+            msg_ids.extend([m.message_id for m in media_messages])
+
+        msg_text = await update.message.reply_text(text, parse_mode="HTML")
+        msg_ids.append(msg_text.message_id)
+
+        # Сохраняем список ID в session.last_action — один UPDATE (или INSERT новой сессии)
+        last_action = {
+            "event": "booking_created_message",
+            "message_ids": msg_ids
+        }
+        async with get_async_session() as session:
+            session_id = context.user_data.get("session_id")
+            if session_id:
+                await session.execute(
+                    sa_update(Session).where(Session.id == session_id).values(last_action=last_action)
+                )
+            else:
+                new_session = Session(tg_user_id=booking.tg_user_id, role_id=1, last_action=last_action)
+                session.add(new_session)
+                await session.flush()
+                context.user_data["session_id"] = new_session.id
             await session.commit()
 
-            if cht_id and msg_id:
-                try:
-                    await context.bot.delete_message(chat_id=cht_id, message_id=msg_id)
-                    print(f"[DEBUG] Удалено сообщение с карточкой (msg_id={msg_id})")
-                except Exception as e:
-                    print(f"[WARNING] Не удалось удалить сообщение с карточкой: {e}")
+        if cht_id and msg_id:
+            try:
+                await context.bot.delete_message(chat_id=cht_id, message_id=msg_id)
+                print(f"[DEBUG] Удалено сообщение с карточкой (msg_id={msg_id})")
+            except Exception as e:
+                print(f"[WARNING] Не удалось удалить сообщение с карточкой: {e}")
 
-            context.user_data["last_filter_apartment_message_id"] = None
-            context.user_data["last_filter_apartment_chat_id"] = None
+        context.user_data["last_filter_apartment_message_id"] = None
+        context.user_data["last_filter_apartment_chat_id"] = None
 
     except Exception as e:
 
@@ -669,12 +954,17 @@ async def filter_apartments(update: Update, context: ContextTypes.DEFAULT_TYPE):
     check_in = context.user_data.get("check_in",date)
     check_out = context.user_data.get("check_out",date)
     price = context.user_data.get("price_filter")
+    geo = context.user_data.get("geo")
+    flex = context.user_data.get("flex_days") or 0
 
     filters = {
         "type_ids": type_ids,
         "check_in": check_in.isoformat() if hasattr(check_in, "isoformat") else check_in,
         "check_out": check_out.isoformat() if hasattr(check_out, "isoformat") else check_out,
-        "price": price
+        "price": price,
+        "geo": {"lat": geo["lat"], "lon": geo["lon"], "radius_km": geo["radius_km"]} if geo else None,
+        "flex": flex,
+        "keywords": (context.user_data.get("keywords") or "").lower() or None
     }
     print(f"DEBUG_DATE_TYPE: {type(check_in)}")
     if not tg_user_id:
@@ -682,10 +972,24 @@ async def filter_apartments(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return None
 
     # ✅ Получаем список квартир
-    apartment_ids, apartments, new_search = await get_apartments(check_in, check_out, session_id, tg_user_id, filters)
+    if is_paginated(filters):
+        # Первая карточка показывается сразу по первой странице; подсчёт,
+        # запись search_sessions и следующая страница — в finish_search
+        first_page, cursor = await get_first_page(check_in, check_out, filters)
+        apartment_ids = list(first_page)
+        search_id = None
+        shifts = {}
+        total = None if cursor else len(apartment_ids)
+        if not apartment_ids:
+            search_id = (await create_search_session(session_id, tg_user_id, filters, [])).id
+    else:
+        apartment_ids, new_search, shifts, total = await get_apartments(check_in, check_out, session_id, tg_user_id, filters)
+        search_id = new_search.id
+        cursor = new_search.cursor
 
     if not apartment_ids:
         keyboard = [
+        [InlineKeyboardButton("🔔 Сохранить поиск и сообщить о появлении", callback_data=f"save_search_{search_id}")],
         [InlineKeyboardButton("🔍 Новый поиск", callback_data="start_search")]
     ]
         reply_markup = InlineKeyboardMarkup(keyboard)
@@ -693,11 +997,18 @@ async def filter_apartments(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
         return []
 
-    # ✅ Сохраняем результаты в контексте
+    # ✅ Сохраняем в контексте только упорядоченные ID (4 байта на квартиру),
+    # карточки берутся из общего card_cache
     context.user_data.update({
-            "filtered_apartments_ids": apartment_ids,
-            "filtered_apartments": apartments,
-            "new_search_id": new_search.id
+            "filtered_apartments_ids": array("I", apartment_ids),
+            "new_search_id": search_id,
+            # Постраничная выдача: всего найдено, курсор следующей страницы и фильтры для догрузки
+            "search_total": total,
+            "search_cursor": cursor,
+            "search_next_page": None,
+            "search_filters": filters,
+            # Гибкий поиск: сдвиг дат для квартир, свободных не в точные даты
+            "flex_shifts": shifts
         })
 
     return apartment_ids
@@ -738,6 +1049,7 @@ async def handle_show_map(update: Update, context: ContextTypes.DEFAULT_TYPE):
 # === Отмена ===
 async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Отмена поиска"""
+    card_prefetcher.cancel(update.effective_chat.id)
     await cleanup_messages(context)
     context.user_data.clear()
     await update.message.reply_text("❌ Поиск отменён",reply_markup=ReplyKeyboardRemove())
@@ -13,12 +13,23 @@ search_conv = ConversationHandler(
         SELECTING_CHECKOUT: [
             CallbackQueryHandler(calendar_callback)
         ],
+        SELECTING_FLEX: [
+            CallbackQueryHandler(handle_flex_choice, pattern="^flex_")
+        ],
         SELECTING_TYPES: [
             CallbackQueryHandler(handle_apartment_type_multiselection)
         ],
         SELECTING_PRICE: [
             CallbackQueryHandler(handle_price_filter_selection, pattern="^price_")
         ],
+        ENTERING_KEYWORDS: [
+            MessageHandler(filters.TEXT & ~filters.COMMAND, handle_keywords),
+            CallbackQueryHandler(handle_keywords_skip, pattern="^kw_skip$")
+        ],
+        SELECTING_LOCATION: [
+            CallbackQueryHandler(handle_location_choice, pattern="^geo_"),
+            MessageHandler(filters.LOCATION, handle_shared_location)
+        ],
         VIEWING_APARTMENTS: [
             CallbackQueryHandler(navigate_apartments, pattern="^apt_(prev|next)_\d+$"),
             CallbackQueryHandler(handle_show_map, pattern=r"^show_map_\d+$"),
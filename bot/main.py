@@ -14,6 +14,8 @@ from handlers.ReferralLinkHandler import referral_conversation
 from handlers.BookingChatConversation import exit_booking_chat
 from handlers.ShowInfoHandler import info_conversation
 from handlers.ShowMapConversationHandler import handle_show_map
+from handlers.SavedSearchHandler import save_search_handler
+from handlers.BroadcastHandler import broadcast_handlers
 
 
 
@@ -22,8 +24,22 @@ from booking_expired_monitor import check_expired_booking
 from booking_complit_monitor import check_complit_booking
 from my_daily_stats import collect_daily_stats
 from run_notify import scheduled_notify
+from utils.availability_index import availability_index, check_availability_index
+from utils.logging_config import structured_logger
+from utils.search_progress import search_progress, flush_search_progress, FLUSH_INTERVAL_SECONDS
+from utils.cache_stats import log_cache_stats
+from utils.outbox import dispatch_outbox, OUTBOX_POLL_SECONDS
+from utils.broadcast import resume_running_campaigns
+from utils.static_media import static_media
+from utils.webhook_server import create_webhook_server, run_webhook
+from utils.app_builder import build_application
+from utils.card_prefetch import card_prefetcher
+from utils.reference_data import reference_data, refresh_reference_data, REFERENCE_DATA_REFRESH_SECONDS
+from utils.saved_search_matcher import saved_search_index, expire_saved_searches
 
 import os
+import asyncio
+import signal
 from pathlib import Path
 from datetime import time, datetime, timedelta, timezone
 
@@ -61,6 +77,61 @@ async def post_init(application: Application) -> None:
     ]
     await application.bot.set_my_commands(commands)
 
+    # Справочники (типы квартир, статусы броней, роли) держим в памяти.
+    # ID статусов сверяем сразу: с рассинхронизированным справочником не стартуем
+    await reference_data.load()
+    reference_data.verify_booking_statuses()
+    # SIGHUP — перечитать справочники без перезапуска бота
+    try:
+        asyncio.get_running_loop().add_signal_handler(
+            signal.SIGHUP,
+            lambda: application.create_task(refresh_reference_data())
+        )
+    except (NotImplementedError, AttributeError):
+        pass  # нет SIGHUP (Windows)
+
+    # In-memory индекс занятости для поиска по датам.
+    # Если БД недоступна — поиск работает через SQL, индекс догрузит check_availability_index
+    try:
+        await availability_index.load()
+    except Exception as e:
+        structured_logger.error(
+            f"Availability index load failed: {e}",
+            action="availability_index_load",
+            exception=e
+        )
+
+    # Индекс сохранённых поисков для уведомлений об освободившихся датах
+    try:
+        await saved_search_index.load()
+    except Exception as e:
+        structured_logger.error(
+            f"Saved search index load failed: {e}",
+            action="saved_search_index_load",
+            exception=e
+        )
+
+    # file_id статических картинок; недостающие загружаются фоном
+    try:
+        await static_media.load()
+        application.create_task(static_media.warm_up(application.bot))
+    except Exception as e:
+        structured_logger.error(
+            f"Static media load failed: {e}",
+            action="static_media",
+            exception=e
+        )
+
+    # Рассылки, прерванные перезапуском, продолжаются с места остановки
+    try:
+        await resume_running_campaigns(application)
+    except Exception as e:
+        structured_logger.error(
+            f"Broadcast resume failed: {e}",
+            action="broadcast",
+            exception=e
+        )
+
         # Запуск периодических задач
     application.job_queue.run_repeating(
         check_expired_booking,
@@ -72,6 +143,35 @@ async def post_init(application: Application) -> None:
         interval=30 * 60,
         first=10
     )
+    application.job_queue.run_repeating(
+        check_availability_index,
+        interval=30 * 60,
+        first=15 * 60
+    )
+    application.job_queue.run_repeating(
+        flush_search_progress,
+        interval=FLUSH_INTERVAL_SECONDS,
+        first=FLUSH_INTERVAL_SECONDS
+    )
+    application.job_queue.run_repeating(
+        refresh_reference_data,
+        interval=REFERENCE_DATA_REFRESH_SECONDS,
+        first=REFERENCE_DATA_REFRESH_SECONDS
+    )
+    application.job_queue.run_repeating(
+        dispatch_outbox,
+        interval=OUTBOX_POLL_SECONDS,
+        first=5
+    )
+    application.job_queue.run_repeating(
+        log_cache_stats,
+        interval=15 * 60,
+        first=15 * 60
+    )
+    application.job_queue.run_daily(
+        expire_saved_searches,
+        time(hour=0, minute=15)
+    )
     application.job_queue.run_daily(
         check_complit_booking,
         time(hour=1, minute=19)
@@ -92,20 +192,35 @@ async def post_init(application: Application) -> None:
         name="new_year_notify_once"
     )
 
+async def post_shutdown(application: Application) -> None:
+    card_prefetcher.cancel_all()
+
+    # Досохраняем позиции пагинации, накопленные после последнего сброса
+    try:
+        await search_progress.flush()
+    except Exception as e:
+        structured_logger.error(
+            f"Search progress flush on shutdown failed: {e}",
+            action="search_progress_flush",
+            exception=e
+        )
+
 def main():
     BOT_TOKEN = os.getenv("BOT_TOKEN")
     if not BOT_TOKEN:
         raise ValueError("BOT_TOKEN is not set in .env")
 
 
-    # добавлен тайм-аут в связи с тем, что ТГ блокируют, он не успевает отвечать на запрос и возвращает ошибку
-    app = ApplicationBuilder()\
-    .token(BOT_TOKEN)\
-    .connect_timeout(30)\
-    .read_timeout(30)\
-    .write_timeout(60)\
-    .post_init(post_init)\
-    .build()
+    # polling (по умолчанию) или webhook
+    BOT_MODE = os.getenv("BOT_MODE", "polling")
+
+    # Локальный Bot API сервер или его заглушка вместо api.telegram.org
+    app = build_application(
+        BOT_TOKEN,
+        base_url=os.getenv("BOT_API_BASE_URL"),
+        post_init=post_init,
+        post_shutdown=post_shutdown
+    )
 
     #глобальные обработчики
     #app.add_handler(CallbackQueryHandler(global_back_to_menu, pattern="^mainmenu$"), group=0)
@@ -132,6 +247,10 @@ def main():
 
     app.add_handler(search_conv,group=1) #процесс выбора квартиры для бронирования
 
+    app.add_handler(save_search_handler,group=0) #сохранение поиска без результатов
+
+    app.add_handlers(broadcast_handlers, group=0) #управление рассылками из админского чата
+
     app.add_handler(conv_commit_decline_cancel,group=1) #сценарий, когда бронирование отклонено или отменено
 
     app.add_handler(booking_chat,group=1)   #обработчик приватных чатов между пользователями
@@ -144,8 +263,21 @@ def main():
 
 
 
-    # Без asyncio
-    app.run_polling()
+    if BOT_MODE == "webhook":
+        WEBHOOK_URL = os.getenv("WEBHOOK_URL")
+        WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
+        if not WEBHOOK_URL or not WEBHOOK_SECRET:
+            raise ValueError("WEBHOOK_URL and WEBHOOK_SECRET must be set for BOT_MODE=webhook")
+        server = create_webhook_server(
+            app,
+            secret_token=WEBHOOK_SECRET,
+            host=os.getenv("WEBHOOK_HOST", "0.0.0.0"),
+            port=int(os.getenv("WEBHOOK_PORT", "8443"))
+        )
+        asyncio.run(run_webhook(app, server, url=WEBHOOK_URL, secret_token=WEBHOOK_SECRET))
+    else:
+        # Без asyncio; вебхук, если был, run_polling снимает сам
+        app.run_polling()
 
 if __name__ == "__main__":
 
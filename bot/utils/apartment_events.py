@@ -0,0 +1,18 @@
+from utils.card_cache import card_cache
+from utils.card_render_cache import render_cache
+from utils.availability_heatmap import availability_heatmap
+from utils.search_cache import search_cache
+
+
+def apartment_changed(apartment_id: int) -> None:
+    """
+    Вызывается после commit изменения квартиры (публикация, правка, удаление).
+    Сбрасывает закэшированные данные объекта.
+    """
+    # Тип квартиры известен, только если карточка в кэше; иначе сбрасываем все поиски
+    card = card_cache.get_cached(apartment_id)
+    search_cache.invalidate_type(card.type_id if card else None)
+    card_cache.invalidate(apartment_id)
+    render_cache.invalidate(apartment_id)
+    # Публикация/удаление меняет число квартир в каждой ночи
+    availability_heatmap.invalidate_all()
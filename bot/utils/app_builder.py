@@ -0,0 +1,26 @@
+from telegram.ext import Application, ApplicationBuilder
+
+from utils.send_scheduler import send_scheduler
+
+
+def build_application(token: str, base_url: str | None = None, post_init=None, post_shutdown=None) -> Application:
+    """
+    Сборка Application бота: общая для main и проверки вебхука (benchmarks.webhook_roundtrip).
+    base_url — локальный Bot API сервер или его заглушка вместо api.telegram.org.
+    """
+    builder = ApplicationBuilder()
+    if base_url:
+        builder = builder.base_url(base_url)
+
+    # добавлен тайм-аут в связи с тем, что ТГ блокируют, он не успевает отвечать на запрос и возвращает ошибку
+    builder = builder\
+    .token(token)\
+    .connect_timeout(30)\
+    .read_timeout(30)\
+    .write_timeout(60)\
+    .rate_limiter(send_scheduler)
+    if post_init:
+        builder = builder.post_init(post_init)
+    if post_shutdown:
+        builder = builder.post_shutdown(post_shutdown)
+    return builder.build()
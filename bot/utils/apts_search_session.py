@@ -1,12 +1,42 @@
-from sqlalchemy import select, exists, or_, and_
+from sqlalchemy import select, exists, and_, func, cast, literal, literal_column, tuple_, update as sa_update
+from geoalchemy2 import Geography
 from datetime import datetime
+from decimal import Decimal
+import asyncio
+import math
+import os
 from db.db_async import get_async_session
 from db.models.apartments import Apartment
-from db.models.search_sessions import SearchSession
+from db.models.search_sessions import SearchSession, PackedIds
 from db.models.booking_types import BookingType
 from db.models.bookings import Booking
+from db.models.availability import Availability
+from utils.availability_index import availability_index
+from utils.reference_data import BLOCKING_STATUSES
+from utils.card_cache import card_cache
+from utils.booking_overlap import stay_overlaps
+from utils.search_cache import search_cache
+from utils.flexible_search import find_flexible_matches
 
-EXCLUDED_STATUSES = [5,6,7] # Ожидает, Подтверждено, Заглушка
+EXCLUDED_STATUSES = list(BLOCKING_STATUSES) # Ожидает, Подтверждено, Заглушка
+
+# Источник занятости для поиска: index | nightly | bookings
+AVAILABILITY_SOURCE = os.getenv("SEARCH_AVAILABILITY_SOURCE", "index")
+
+# Поиск "рядом": максимальный радиус и число ближайших объектов в выдаче
+GEO_MAX_RADIUS_KM = 10
+GEO_RESULTS_LIMIT = 50
+
+# Размер страницы keyset-пагинации выдачи
+SEARCH_PAGE_SIZE = 20
+
+# created_at может быть NULL: такие квартиры идут в конце выдачи.
+# Выражение совпадает с индексом idx_apartments_search_order
+NO_CREATED_AT = literal_column("'-infinity'::timestamp")
+CREATED_AT_SORT = func.coalesce(Apartment.created_at, NO_CREATED_AT)
+
+# Конфигурация полнотекстового поиска, как в Apartment.search_tsv
+TSEARCH_CONFIG = literal_column("'russian'::regconfig")
 
 async def get_apartments(
     check_in: datetime,
@@ -14,65 +44,295 @@ async def get_apartments(
     session_id: int,
     tg_user_id: int,
     filters: dict
-) -> tuple[list[int], list[Apartment], SearchSession]:
+) -> tuple[list[int], SearchSession, dict[int, int], int]:
+    """
+    Поиск с записью в search_sessions. Возвращает ID квартир, сессию поиска,
+    сдвиги дат {apartment_id: дни} для квартир, свободных только со сдвигом
+    (гибкий поиск, filters["flex"] > 0), и общее число найденных.
 
-    type_ids = filters.get("type_ids")
-    price = filters.get("price", {})
+    Поиск с обычной сортировкой отдаёт только первую страницу: число результатов
+    считается отдельным лёгким COUNT, следующие страницы догружаются по курсору
+    (load_next_page). Геопоиск, ранжирование по ключевым словам и гибкие даты
+    возвращают выдачу целиком.
+    """
+    shifts: dict[int, int] = {}
+    cursor = None
 
-    async with get_async_session() as session:
-        stmt = (select(Apartment).where(
-                Apartment.is_draft.is_(False),
-                Apartment.is_active.is_(True)
-            ).order_by(
-                Apartment.price.desc(),
-                Apartment.created_at.desc()
-            ))
-
-        # ✅ Фильтр по типам
-        if type_ids:
-            stmt = stmt.where(Apartment.type_id.in_(type_ids))
-
-        # ✅ Фильтр по цене
-        if price:
-            min_price = price.get("min")
-            max_price = price.get("max")
-            if min_price is not None:
-                stmt = stmt.where(Apartment.price >= min_price)
-            if max_price is not None:
-                stmt = stmt.where(Apartment.price <= max_price)
-
-        # ✅ Фильтр по датам: исключаем пересекающиеся брони
-        if check_in and check_out:
-            stmt = stmt.where(
-                ~exists().where(
-                    and_(
-                        Booking.apartment_id == Apartment.id,
-                        Booking.status_id.in_(EXCLUDED_STATUSES),  
-                        or_(
-                            and_(Booking.check_in <= check_in, Booking.check_out > check_in),
-                            and_(Booking.check_in < check_out, Booking.check_out >= check_out),
-                            and_(Booking.check_in >= check_in, Booking.check_out <= check_out)
-                        )
-                    )
-                )
+    # ✅ Одинаковые поиски разных пользователей обслуживает общий кэш
+    if filters.get("flex"):
+        matches = await search_cache.get_or_load(
+            filters,
+            lambda: find_flexible_matches(
+                build_search_stmt(None, None, filters).limit(None),
+                check_in, check_out, filters["flex"],
+                limit=GEO_RESULTS_LIMIT if filters.get("geo") else None
             )
+        )
+        apartment_ids = [apt_id for apt_id, _ in matches]
+        shifts = {apt_id: shift for apt_id, shift in matches if shift}
+        total = len(apartment_ids)
+    elif is_paginated(filters):
+        (first_page, cursor), total = await asyncio.gather(
+            get_first_page(check_in, check_out, filters),
+            count_matching(check_in, check_out, filters)
+        )
+        apartment_ids = list(first_page)
+    else:
+        apartment_ids = list(await search_cache.get_or_load(
+            filters,
+            lambda: find_apartment_ids(check_in, check_out, filters)
+        ))
+        total = len(apartment_ids)
+
+    new_search = await create_search_session(session_id, tg_user_id, filters, apartment_ids, cursor, total)
+    return apartment_ids, new_search, shifts, total
 
-        # ✅ Выполняем запрос
-        result = await session.execute(stmt)
-        apartments = result.scalars().all()
-        apartment_ids = [apt.id for apt in apartments]
 
+async def create_search_session(
+    session_id: int,
+    tg_user_id: int,
+    filters: dict,
+    apartment_ids: list[int],
+    cursor: dict | None = None,
+    result_count: int | None = None
+) -> SearchSession:
+    async with get_async_session() as session:
         # ✅ Логируем поиск
         new_search = SearchSession(
             session_id=session_id,
             tg_user_id=tg_user_id,
             filters=filters,  # JSON сохраняем как есть
             apartment_ids=apartment_ids,
+            cursor=cursor,
+            result_count=len(apartment_ids) if result_count is None else result_count,
             created_at=datetime.utcnow()
         )
 
         session.add(new_search)
         await session.commit()
-        print(f"DUBUG_GET_APARTMENT: {apartment_ids},{apartments},{new_search.id}")
-        print(f"DEBUG apartment_ids={apartment_ids}, type={type(apartment_ids)}")
-        return apartment_ids, apartments, new_search
+        return new_search
+
+
+async def find_apartment_ids(check_in: datetime, check_out: datetime, filters: dict) -> list[int]:
+    """Выполняет поиск в БД и возвращает упорядоченные ID подходящих квартир."""
+    async with get_async_session() as session:
+        # ✅ Выполняем запрос
+        result = await session.execute(build_search_stmt(check_in, check_out, filters))
+        apartments = result.scalars().all()
+
+        # Карточки кладём в общий кэш, вызывающему отдаём только ID
+        card_cache.put_many(apartments)
+        return [apt.id for apt in apartments]
+
+
+def is_paginated(filters: dict) -> bool:
+    """Постранично отдаётся только выдача с сортировкой (price, created_at, id)."""
+    return not (filters.get("geo") or filters.get("keywords") or filters.get("flex"))
+
+
+async def get_first_page(check_in: datetime, check_out: datetime, filters: dict) -> tuple[tuple[int, ...], dict | None]:
+    """Первая страница выдачи и курсор следующей — через общий кэш поиска."""
+    page, cursor = await search_cache.get_or_load(
+        filters,
+        lambda: fetch_page(check_in, check_out, filters, None)
+    )
+    return tuple(page), cursor
+
+
+async def count_matching(check_in: datetime, check_out: datetime, filters: dict) -> int:
+    """Число результатов поиска — в кэше отдельной записью рядом с первой страницей."""
+    (total,) = await search_cache.get_or_load(
+        {**filters, "count": True},
+        lambda: _count_as_list(check_in, check_out, filters)
+    )
+    return total
+
+
+async def _count_as_list(check_in: datetime, check_out: datetime, filters: dict) -> list[int]:
+    return [await count_apartments(check_in, check_out, filters)]
+
+
+async def count_apartments(check_in: datetime, check_out: datetime, filters: dict) -> int:
+    matching = build_search_stmt(check_in, check_out, filters).order_by(None).with_only_columns(Apartment.id)
+    async with get_async_session() as session:
+        return await session.scalar(select(func.count()).select_from(matching.subquery()))
+
+
+async def fetch_page(
+    check_in: datetime,
+    check_out: datetime,
+    filters: dict,
+    cursor: dict | None,
+    limit: int = SEARCH_PAGE_SIZE
+) -> tuple[list[int], dict | None]:
+    """
+    Страница выдачи после курсора (keyset по price, created_at, id — все по убыванию).
+    Возвращает ID квартир и курсор следующей страницы (None — страниц больше нет).
+    """
+    stmt = build_search_stmt(check_in, check_out, filters)
+    if cursor:
+        created_at = (
+            datetime.fromisoformat(cursor["created_at"]) if cursor["created_at"]
+            else NO_CREATED_AT
+        )
+        stmt = stmt.where(
+            tuple_(Apartment.price, CREATED_AT_SORT, Apartment.id)
+            < tuple_(Decimal(cursor["price"]), created_at, cursor["id"])
+        )
+
+    async with get_async_session() as session:
+        result = await session.execute(stmt.limit(limit + 1))
+        apartments = result.scalars().all()
+
+    has_more = len(apartments) > limit
+    apartments = apartments[:limit]
+    card_cache.put_many(apartments)
+
+    next_cursor = None
+    if has_more:
+        last = apartments[-1]
+        next_cursor = {
+            "price": str(last.price),
+            "created_at": last.created_at.isoformat() if last.created_at else None,
+            "id": last.id,
+        }
+    return [apt.id for apt in apartments], next_cursor
+
+
+async def load_next_page(search_id: int | None, check_in: datetime, check_out: datetime, filters: dict, cursor: dict) -> tuple[list[int], dict | None]:
+    """
+    Догружает следующую страницу и сохраняет курсор в search_sessions.
+    search_id None — сессия поиска ещё не записана (её запишет фоновая задача
+    вместе со всеми уже загруженными ID).
+    """
+    page, next_cursor = await fetch_page(check_in, check_out, filters, cursor)
+    if search_id is not None:
+        await append_search_page(search_id, page, next_cursor)
+    return page, next_cursor
+
+
+async def append_search_page(search_id: int, page: list[int], next_cursor: dict | None) -> None:
+    """Дописывает упакованные ID страницы к search_sessions.apartment_ids и сдвигает курсор."""
+    async with get_async_session() as session:
+        await session.execute(
+            sa_update(SearchSession)
+            .where(SearchSession.id == search_id)
+            .values(
+                cursor=next_cursor,
+                apartment_ids=SearchSession.apartment_ids.op("||")(literal(page, PackedIds()))
+            )
+        )
+        await session.commit()
+
+
+def build_search_stmt(check_in: datetime, check_out: datetime, filters: dict, source: str | None = None):
+    """
+    Строит запрос поиска квартир.
+
+    source — откуда брать занятость: "index" (in-memory индекс, по умолчанию),
+    "nightly" (таблица apartments.availability) или "bookings" (NOT EXISTS по броням).
+    filters["geo"] = {"lat", "lon", "radius_km"} включает поиск рядом с точкой:
+    сортировка по расстоянию через KNN-оператор <-> по GiST-индексу coordinates.
+    filters["keywords"] — полнотекстовый фильтр по адресу и описанию (GIN по search_tsv),
+    без геопоиска выдача сортируется по ts_rank.
+    """
+    type_ids = filters.get("type_ids")
+    price = filters.get("price", {})
+    geo = filters.get("geo")
+    keywords = filters.get("keywords")
+    source = source or AVAILABILITY_SOURCE
+
+    stmt = select(Apartment).where(
+        Apartment.is_draft.is_(False),
+        Apartment.is_active.is_(True)
+    )
+
+    if keywords:
+        # Ранжирование — в Postgres, только по строкам, найденным через GIN-индекс
+        query = func.websearch_to_tsquery(TSEARCH_CONFIG, keywords)
+        stmt = stmt.where(Apartment.search_tsv.op("@@")(query))
+        if not geo:
+            stmt = stmt.order_by(func.ts_rank(Apartment.search_tsv, query).desc())
+
+    if geo:
+        stmt = _apply_geo(stmt, geo)
+    else:
+        stmt = stmt.order_by(
+            Apartment.price.desc(),
+            CREATED_AT_SORT.desc(),
+            Apartment.id.desc()
+        )
+
+    # ✅ Фильтр по типам
+    if type_ids:
+        stmt = stmt.where(Apartment.type_id.in_(type_ids))
+
+    # ✅ Фильтр по цене
+    if price:
+        min_price = price.get("min")
+        max_price = price.get("max")
+        if min_price is not None:
+            stmt = stmt.where(Apartment.price >= min_price)
+        if max_price is not None:
+            stmt = stmt.where(Apartment.price <= max_price)
+
+    # ✅ Фильтр по датам: исключаем квартиры, занятые хотя бы одну ночь из [check_in, check_out)
+    if not (check_in and check_out):
+        return stmt
+
+    if source == "index" and availability_index.ready:
+        blocked_ids = availability_index.blocked_apartments(check_in, check_out)
+        if blocked_ids:
+            stmt = stmt.where(Apartment.id.notin_(blocked_ids))
+        return stmt
+
+    if source == "nightly":
+        # Сгруппированный anti-join по ночной таблице занятости
+        blocked = (
+            select(Availability.apartment_id)
+            .where(
+                Availability.is_blocked.is_(True),
+                Availability.night >= check_in,
+                Availability.night < check_out
+            )
+            .group_by(Availability.apartment_id)
+            .subquery()
+        )
+        return (
+            stmt.outerjoin(blocked, blocked.c.apartment_id == Apartment.id)
+            .where(blocked.c.apartment_id.is_(None))
+        )
+
+    # Запасной путь (в т.ч. пока индекс не загружен)
+    return stmt.where(
+        ~exists().where(
+            and_(
+                Booking.apartment_id == Apartment.id,
+                Booking.status_id.in_(EXCLUDED_STATUSES),  
+                stay_overlaps(check_in, check_out)
+            )
+        )
+    )
+
+
+def _apply_geo(stmt, geo: dict):
+    """Радиус вокруг точки и сортировка по расстоянию (ORDER BY <-> LIMIT идёт по индексу)."""
+    lat, lon = geo["lat"], geo["lon"]
+    radius_km = min(geo.get("radius_km") or GEO_MAX_RADIUS_KM, GEO_MAX_RADIUS_KM)
+    point = func.ST_SetSRID(func.ST_MakePoint(lon, lat), 4326)
+
+    # Грубый фильтр в градусах (по индексу, с запасом по долготе) + точный в метрах
+    radius_deg = radius_km / (111.32 * math.cos(math.radians(lat)))
+    return (
+        stmt.where(
+            Apartment.coordinates.isnot(None),
+            func.ST_DWithin(Apartment.coordinates, point, radius_deg),
+            func.ST_DWithin(
+                cast(Apartment.coordinates, Geography),
+                cast(point, Geography),
+                radius_km * 1000
+            )
+        )
+        .order_by(Apartment.coordinates.op("<->")(point))
+        .limit(GEO_RESULTS_LIMIT)
+    )
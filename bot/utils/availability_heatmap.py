@@ -0,0 +1,100 @@
+import calendar
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import text, bindparam
+
+from db.db_async import get_async_session
+
+from utils.cache_stats import register_cache_stats, hit_ratio
+from utils.logging_config import structured_logger
+from utils.reference_data import BLOCKING_STATUSES
+
+# Страховка от изменений, прошедших мимо booking_changed/apartment_changed
+HEATMAP_TTL_SECONDS = 10 * 60
+
+# Одна агрегация на месяц: число опубликованных квартир минус занятые в каждую ночь
+MONTH_FREE_COUNTS_SQL = text("""
+    SELECT n.night::date AS night,
+           (SELECT count(*) FROM apartments.apartments
+             WHERE is_active AND NOT is_draft)
+           - count(DISTINCT b.apartment_id) AS free
+      FROM generate_series(CAST(:first AS date), CAST(:last AS date), interval '1 day') AS n(night)
+      LEFT JOIN public.bookings b
+             ON b.status_id IN :statuses
+            AND b.stay @> n.night::date
+            AND b.apartment_id IN (
+                SELECT id FROM apartments.apartments WHERE is_active AND NOT is_draft
+            )
+     GROUP BY n.night
+""").bindparams(bindparam("statuses", expanding=True))
+
+
+class AvailabilityHeatmap:
+    """
+    Число свободных квартир на каждую ночь месяца для календаря арендатора.
+
+    Месяц считается одним агрегирующим запросом и кэшируется; изменение брони
+    сбрасывает только затронутые месяцы, изменение квартиры — весь кэш.
+    """
+
+    def __init__(self, ttl: int = HEATMAP_TTL_SECONDS):
+        self.ttl = ttl
+        self._months: dict[tuple[int, int], tuple[float, dict[date, int]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def month(self, year: int, month: int) -> dict[date, int]:
+        key = (year, month)
+        cached = self._months.get(key)
+        if cached and time.monotonic() - cached[0] < self.ttl:
+            self.hits += 1
+            return cached[1]
+
+        self.misses += 1
+        first = date(year, month, 1)
+        last = date(year, month, calendar.monthrange(year, month)[1])
+        async with get_async_session() as session:
+            result = await session.execute(
+                MONTH_FREE_COUNTS_SQL,
+                {"first": first, "last": last, "statuses": [int(s) for s in BLOCKING_STATUSES]}
+            )
+            counts = {night: max(free, 0) for night, free in result.all()}
+
+        self._months[key] = (time.monotonic(), counts)
+        return counts
+
+    async def month_or_none(self, year: int, month: int) -> dict[date, int] | None:
+        """Как month(), но при ошибке БД возвращает None — календарь рисуется без счётчиков."""
+        try:
+            return await self.month(year, month)
+        except Exception as e:
+            structured_logger.warning(
+                f"Availability heatmap query failed: {e}",
+                action="availability_heatmap",
+                context={'year': year, 'month': month}
+            )
+            return None
+
+    def invalidate_range(self, check_in: date, check_out: date) -> None:
+        """Сбрасывает месяцы, в которые попадают ночи [check_in, check_out)."""
+        last_night = check_out - timedelta(days=1)
+        y, m = check_in.year, check_in.month
+        while (y, m) <= (last_night.year, last_night.month):
+            self._months.pop((y, m), None)
+            y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+
+    def invalidate_all(self) -> None:
+        self._months.clear()
+
+    def stats(self) -> dict:
+        return {
+            'months': len(self._months),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': hit_ratio(self.hits, self.misses),
+        }
+
+
+availability_heatmap = AvailabilityHeatmap()
+register_cache_stats("availability_heatmap", availability_heatmap.stats)
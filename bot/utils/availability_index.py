@@ -0,0 +1,163 @@
+from datetime import date
+
+from sqlalchemy import select
+
+from db.db_async import get_async_session
+from db.models.bookings import Booking
+
+from utils.logging_config import structured_logger
+from utils.reference_data import BLOCKING_STATUSES
+
+# Точка отсчёта битовых масок: бит N соответствует ночи EPOCH + N дней.
+# Ночи раньше эпохи для поиска не нужны (заезд возможен только с завтра).
+EPOCH_ORDINAL = date(2025, 1, 1).toordinal()
+
+
+def nights_mask(check_in: date, check_out: date) -> int:
+    """Битовая маска ночей [check_in, check_out)."""
+    start = max(check_in.toordinal() - EPOCH_ORDINAL, 0)
+    end = check_out.toordinal() - EPOCH_ORDINAL
+    if end <= start:
+        return 0
+    return ((1 << (end - start)) - 1) << start
+
+
+class AvailabilityIndex:
+    """
+    In-memory индекс занятости квартир.
+
+    Для каждой квартиры хранит блокирующие брони (ожидает, подтверждено, заглушка) и битовую маску
+    занятых ночей. Строится при старте бота и обновляется инкрементально при
+    каждом изменении брони, поэтому поиск отвечает на фильтр по датам без
+    подзапроса к public.bookings.
+    """
+
+    def __init__(self):
+        self._bookings: dict[int, dict[int, tuple[date, date]]] = {}
+        self._bitmaps: dict[int, int] = {}
+        self._pending: list[tuple] | None = None
+        self.ready = False
+
+    async def load(self) -> None:
+        """Полная загрузка индекса из БД."""
+        self._pending = []
+        try:
+            snapshot = await self._load_snapshot()
+            pending, self._pending = self._pending, None
+
+            self._bookings = snapshot
+            self._bitmaps = {apt_id: self._build_bitmap(bookings) for apt_id, bookings in snapshot.items()}
+            # Изменения, пришедшие во время загрузки, применяем поверх снимка
+            for event in pending:
+                self._apply(*event)
+            self.ready = True
+        finally:
+            self._pending = None
+
+        structured_logger.info(
+            "Availability index loaded",
+            action="availability_index_load",
+            context={
+                'apartments': len(self._bookings),
+                'bookings': sum(len(b) for b in self._bookings.values())
+            }
+        )
+
+    async def _load_snapshot(self) -> dict[int, dict[int, tuple[date, date]]]:
+        async with get_async_session() as session:
+            result = await session.execute(
+                select(Booking.id, Booking.apartment_id, Booking.check_in, Booking.check_out)
+                .where(Booking.status_id.in_(BLOCKING_STATUSES))
+            )
+            snapshot: dict[int, dict[int, tuple[date, date]]] = {}
+            for booking_id, apartment_id, check_in, check_out in result.all():
+                snapshot.setdefault(apartment_id, {})[booking_id] = (check_in, check_out)
+            return snapshot
+
+    @staticmethod
+    def _build_bitmap(bookings: dict[int, tuple[date, date]]) -> int:
+        bits = 0
+        for check_in, check_out in bookings.values():
+            bits |= nights_mask(check_in, check_out)
+        return bits
+
+    def apply(self, booking_id: int, apartment_id: int, status_id: int, check_in: date, check_out: date) -> None:
+        """Учитывает создание или смену статуса брони."""
+        if self._pending is not None:
+            self._pending.append((booking_id, apartment_id, status_id, check_in, check_out))
+        self._apply(booking_id, apartment_id, status_id, check_in, check_out)
+
+    def apply_booking(self, booking: Booking) -> None:
+        self.apply(booking.id, booking.apartment_id, booking.status_id, booking.check_in, booking.check_out)
+
+    def _apply(self, booking_id, apartment_id, status_id, check_in, check_out) -> None:
+        bookings = self._bookings.setdefault(apartment_id, {})
+        if status_id in BLOCKING_STATUSES:
+            bookings[booking_id] = (check_in, check_out)
+            self._bitmaps[apartment_id] = self._bitmaps.get(apartment_id, 0) | nights_mask(check_in, check_out)
+            return
+
+        if bookings.pop(booking_id, None) is None:
+            return
+        # Брони одной квартиры могут пересекаться (заглушка поверх брони),
+        # поэтому при снятии маску пересобираем целиком
+        if bookings:
+            self._bitmaps[apartment_id] = self._build_bitmap(bookings)
+        else:
+            self._bookings.pop(apartment_id, None)
+            self._bitmaps.pop(apartment_id, None)
+
+    def is_free(self, apartment_id: int, check_in: date, check_out: date) -> bool:
+        return not (self._bitmaps.get(apartment_id, 0) & nights_mask(check_in, check_out))
+
+    def blocked_apartments(self, check_in: date, check_out: date) -> set[int]:
+        """ID квартир, у которых занята хотя бы одна ночь из [check_in, check_out)."""
+        mask = nights_mask(check_in, check_out)
+        return {apt_id for apt_id, bits in self._bitmaps.items() if bits & mask}
+
+    async def verify(self) -> list[int]:
+        """
+        Сверяет индекс с БД. При расхождении подменяет индекс свежим снимком.
+        Возвращает ID квартир, по которым было расхождение.
+        """
+        self._pending = []
+        try:
+            snapshot = await self._load_snapshot()
+            pending, self._pending = self._pending, None
+        finally:
+            self._pending = None
+
+        # Брони, изменённые во время сверки, не считаем расхождением
+        touched = {event[1] for event in pending}
+        mismatched = [
+            apt_id for apt_id in set(snapshot) | set(self._bookings)
+            if apt_id not in touched and snapshot.get(apt_id, {}) != self._bookings.get(apt_id, {})
+        ]
+
+        if mismatched:
+            structured_logger.warning(
+                "Availability index diverged from database, reloading",
+                action="availability_index_mismatch",
+                context={'apartment_ids': mismatched[:50], 'count': len(mismatched)}
+            )
+            await self.load()
+
+        return mismatched
+
+
+availability_index = AvailabilityIndex()
+
+
+async def check_availability_index(context):
+    """Периодическая сверка индекса занятости с БД (JobQueue)."""
+    try:
+        if not availability_index.ready:
+            await availability_index.load()
+            return
+        await availability_index.verify()
+    except Exception as e:
+        structured_logger.error(
+            f"Availability index check failed: {e}",
+            action="availability_index_check",
+            exception=e
+        )
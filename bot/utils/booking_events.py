@@ -0,0 +1,15 @@
+from db.models.bookings import Booking
+
+from utils.availability_index import availability_index
+from utils.search_cache import search_cache
+from utils.availability_heatmap import availability_heatmap
+
+
+def booking_changed(booking: Booking) -> None:
+    """
+    Вызывается после commit создания брони или смены её статуса.
+    Синхронизирует in-memory структуры, зависящие от занятости квартир.
+    """
+    availability_index.apply_booking(booking)
+    search_cache.invalidate_dates(booking.check_in, booking.check_out)
+    availability_heatmap.invalidate_range(booking.check_in, booking.check_out)
@@ -1,5 +1,7 @@
-from db.models.apartments import Apartment
-from db.models.search_sessions import SearchSession
+from datetime import date
+
+from utils.card_cache import ApartmentCard
+from utils.card_render_cache import render_cache, RenderedCard
 
 from telegram import (
     Update,
@@ -9,44 +11,68 @@ from telegram import (
 )
 
 
-def booking_apartment_card_full(current_apartment: Apartment, current_index: int, total: int) -> tuple[str, str | None, InlineKeyboardMarkup]:
-    """Возвращает текст, первую фотографию и клавиатуру для карточки."""
-    text = (
+def _render_search_card(current_apartment: ApartmentCard) -> RenderedCard:
+    body = (
         f"<b>{current_apartment.short_address}</b>\n\n"
         f"💬 {current_apartment.description or 'Без описания'}\n\n"
-        f"🏷️ Тип: {current_apartment.apartment_type.name}\n"
+        f"🏷️ Тип: {current_apartment.type_name}\n"
         f"📍 Этаж: {current_apartment.floor}\n"
         f"🏠 Есть балкон: {'Да' if current_apartment.has_balcony else 'Нет'}\n"
         f"🦎 Можно с животными: {'Да' if current_apartment.pets_allowed else 'Нет'}\n"
         f"🧍‍♂️ Максимум гостей: {current_apartment.max_guests}\n"
         f"💰 Цена: {current_apartment.price} ₽/ночь\n\n"
-        f"📍 {current_index+1}/{total}"
     )
 
     # Медиа
     #media = [InputMediaPhoto(img.tg_file_id) for img in apartment.images[:10]] if apartment.images else None
 
-    photo_id = current_apartment.images[0].tg_file_id if current_apartment.images else None
-    media = [InputMediaPhoto(photo_id)] if photo_id else None
+    photo_id = current_apartment.photo_ids[0] if current_apartment.photo_ids else None
+    media = (InputMediaPhoto(photo_id),) if photo_id else ()
+
+    action_rows = (
+        # Кнопка "Показать на карте" — отдельной строкой
+        (InlineKeyboardButton("📍 Показать на карте", callback_data=f"show_map_{current_apartment.id}"),),
+        # Кнопки "Забронировать" и "Новый поиск" — в одной строке
+        (
+            InlineKeyboardButton("✅ Забронировать", callback_data=f"book_{current_apartment.id}_{current_apartment.price}"),
+            InlineKeyboardButton("🔍 Новый поиск", callback_data="start_search")
+        ),
+    )
+    return RenderedCard(body, media, action_rows)
+
+
+def booking_apartment_card_full(
+    current_apartment: ApartmentCard,
+    current_index: int,
+    total: int,
+    shifted_dates: tuple[date, date] | None = None,
+    has_more: bool = False
+) -> tuple[str, list[InputMediaPhoto] | None, InlineKeyboardMarkup]:
+    """
+    Возвращает текст, первую фотографию и клавиатуру для карточки.
+    shifted_dates — свободные даты, если квартира нашлась гибким поиском со сдвигом.
+    has_more — общее число ещё не посчитано, total — сколько загружено, дальше есть ещё.
+    """
+    card = render_cache.get_or_render(
+        "search", current_apartment.id, current_apartment.updated_at,
+        lambda: _render_search_card(current_apartment)
+    )
+    text = card.body
+    if shifted_dates:
+        check_in, check_out = shifted_dates
+        text += f"📆 Свободно: {check_in:%d.%m} – {check_out:%d.%m}\n\n"
+    text += f"📍 {current_index+1}/{total}{'+' if has_more else ''}"
 
     buttons = []
     if current_index > 0:
         buttons.append(InlineKeyboardButton("⬅️ Предыдущий", callback_data=f"apt_prev_{current_index-1}"))
-    if current_index < total - 1:
+    if current_index < total - 1 or has_more:
         buttons.append(InlineKeyboardButton("➡️ Следующий", callback_data=f"apt_next_{current_index+1}"))
 
     # Кнопки навигации по карточкам
     buttons = [buttons] if buttons else []
-
-    # Кнопка "Показать на карте" — отдельной строкой
-    buttons.append([InlineKeyboardButton("📍 Показать на карте", callback_data=f"show_map_{current_apartment.id}")])
-
-    # Кнопки "Забронировать" и "Новый поиск" — в одной строке
-    buttons.append([
-        InlineKeyboardButton("✅ Забронировать", callback_data=f"book_{current_apartment.id}_{current_apartment.price}"),
-        InlineKeyboardButton("🔍 Новый поиск", callback_data="start_search")
-    ])
+    buttons.extend(card.action_rows)
 
     markup = InlineKeyboardMarkup(buttons)
 
-    return text, media, markup
+    return text, card.media_list(), markup
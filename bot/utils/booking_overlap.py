@@ -0,0 +1,19 @@
+from datetime import date
+
+from sqlalchemy.dialects.postgresql import Range
+from sqlalchemy.exc import IntegrityError
+
+from db.models.bookings import Booking
+
+# SQLSTATE exclusion_violation — срабатывание excl_booking_apartment_stay
+EXCLUSION_VIOLATION = "23P01"
+
+
+def stay_overlaps(check_in: date, check_out: date):
+    """Условие `bookings.stay && [check_in, check_out)` для GiST-индекса."""
+    return Booking.stay.overlaps(Range(check_in, check_out, bounds="[)"))
+
+
+def is_overlap_violation(error: IntegrityError) -> bool:
+    """True, если INSERT/UPDATE отклонён ограничением на пересечение дат."""
+    return getattr(error.orig, "pgcode", None) == EXCLUSION_VIOLATION
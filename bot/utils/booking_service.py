@@ -0,0 +1,138 @@
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+
+from sqlalchemy import select, insert, exists, literal, BIGINT, Integer, Date, Numeric, String, DateTime
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.attributes import set_committed_value
+
+from db.db_async import get_async_session
+from db.models.apartments import Apartment
+from db.models.bookings import Booking
+
+from utils.booking_events import booking_changed
+from utils.booking_overlap import stay_overlaps, is_overlap_violation
+from utils.request_confirmation import enqueue_booking_request_to_owner
+from utils.reference_data import BookingStatus, BLOCKING_STATUSES
+from utils.logging_config import structured_logger
+
+
+class BookingOutcome(Enum):
+    CREATED = "created"
+    DATES_TAKEN = "dates_taken"                 # ночи заняты другой бронью
+    APARTMENT_UNAVAILABLE = "apartment_unavailable"  # объект снят с публикации или удалён
+
+
+class BookingResult:
+    """Итог create_booking. booking заполнен только при CREATED, вместе с apartment (owner, тип, фото)."""
+
+    __slots__ = ("outcome", "booking")
+
+    def __init__(self, outcome: BookingOutcome, booking: Booking | None = None):
+        self.outcome = outcome
+        self.booking = booking
+
+    @property
+    def created(self) -> bool:
+        return self.outcome is BookingOutcome.CREATED
+
+
+async def create_booking(
+    tg_user_id: int,
+    apartment_id: int,
+    check_in: date,
+    check_out: date,
+    guest_count: int,
+    total_price: Decimal,
+    comments: str
+) -> BookingResult:
+    """
+    Создаёт бронь гостя в одной транзакции из двух запросов:
+
+    1. SELECT квартиры с владельцем, типом и фото FOR UPDATE OF apartments —
+       блокировка строки выстраивает параллельные брони одной квартиры в очередь;
+    2. INSERT ... SELECT ... WHERE NOT EXISTS (пересекающаяся бронь) RETURNING —
+       повторная проверка занятости видит брони, закоммиченные до блокировки.
+
+    Сообщение владельцу пишется в outbox той же транзакцией; после commit
+    вызывающий запускает диспетчер (kick_outbox).
+
+    Ограничение excl_booking_apartment_stay остаётся страховкой для записей,
+    идущих мимо этой функции (заглушки собственника).
+    """
+    now = datetime.utcnow()
+    async with get_async_session() as session:
+        apartment = (await session.execute(
+            select(Apartment)
+            .options(
+                joinedload(Apartment.owner),
+                joinedload(Apartment.apartment_type),
+                joinedload(Apartment.images)
+            )
+            .where(Apartment.id == apartment_id)
+            .with_for_update(of=Apartment)
+        )).unique().scalar_one_or_none()
+
+        if apartment is None or apartment.is_draft or not apartment.is_active:
+            await session.rollback()
+            return BookingResult(BookingOutcome.APARTMENT_UNAVAILABLE)
+
+        values = select(
+            literal(tg_user_id, BIGINT),
+            literal(apartment_id, Integer),
+            literal(int(BookingStatus.PENDING), Integer),
+            literal(check_in, Date),
+            literal(check_out, Date),
+            literal(guest_count, Integer),
+            literal(total_price, Numeric(8, 2)),
+            literal(comments, String(255)),
+            literal(now, DateTime),
+            literal(now, DateTime)
+        ).where(
+            ~exists().where(
+                Booking.apartment_id == apartment_id,
+                Booking.status_id.in_(BLOCKING_STATUSES),
+                stay_overlaps(check_in, check_out)
+            )
+        )
+        stmt = (
+            insert(Booking)
+            .from_select(
+                ["tg_user_id", "apartment_id", "status_id", "check_in", "check_out",
+                 "guest_count", "total_price", "comments", "created_at", "updated_at"],
+                values
+            )
+            .returning(Booking)
+        )
+
+        try:
+            booking = (await session.execute(stmt)).scalar_one_or_none()
+            if booking is None:
+                await session.rollback()
+                return BookingResult(BookingOutcome.DATES_TAKEN)
+            # Квартира уже загружена первым запросом — подставляем без обращения к БД
+            set_committed_value(booking, "apartment", apartment)
+            # Запрос владельцу сохраняется вместе с бронью и уходит через outbox
+            enqueue_booking_request_to_owner(session, booking)
+            await session.commit()
+        except IntegrityError as e:
+            if not is_overlap_violation(e):
+                raise
+            await session.rollback()
+            return BookingResult(BookingOutcome.DATES_TAKEN)
+
+    booking_changed(booking)
+
+    structured_logger.info(
+        "Booking created",
+        user_id=tg_user_id,
+        action="booking_create",
+        context={
+            'booking_id': booking.id,
+            'apartment_id': apartment_id,
+            'in': check_in.isoformat(),
+            'out': check_out.isoformat()
+        }
+    )
+    return BookingResult(BookingOutcome.CREATED, booking)
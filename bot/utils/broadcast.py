@@ -0,0 +1,302 @@
+import asyncio
+
+from sqlalchemy import select, update as sa_update, func, literal
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from telegram.error import TelegramError, RetryAfter, Forbidden, BadRequest
+
+from db.db_async import get_async_session
+from db.models.broadcasts import BroadcastCampaign, BroadcastDelivery
+from db.models.users import User
+
+from utils.logging_config import structured_logger
+from utils.send_scheduler import Lane
+from utils.static_media import static_media
+
+# Одновременных отправок; темп всё равно задаёт send_scheduler (полоса BROADCAST)
+BROADCAST_CONCURRENCY = 8
+BROADCAST_BATCH_SIZE = 200
+BROADCAST_MAX_ATTEMPTS = 3
+
+# Статусы рассылки и доставки
+RUNNING, PAUSED, COMPLETED = "running", "paused", "completed"
+PENDING, SENT, BLOCKED, FAILED = "pending", "sent", "blocked", "failed"
+
+# Рассылки, которые выполняются в этом процессе
+_active_campaigns: set[int] = set()
+
+
+async def create_campaign(name: str, text: str, image_path: str | None = None) -> int:
+    """
+    Создаёт рассылку и фиксирует получателей — всех активных пользователей.
+    Рассылка с таким именем уже есть — возвращает её ID (повторный запуск продолжает её).
+    """
+    async with get_async_session() as session:
+        campaign_id = await session.scalar(
+            pg_insert(BroadcastCampaign)
+            .values(name=name, text=text, image_path=image_path)
+            .on_conflict_do_nothing(index_elements=["name"])
+            .returning(BroadcastCampaign.id)
+        )
+        if campaign_id is None:
+            return await session.scalar(select(BroadcastCampaign.id).where(BroadcastCampaign.name == name))
+
+        await session.execute(
+            pg_insert(BroadcastDelivery)
+            .from_select(
+                ["campaign_id", "tg_user_id"],
+                select(literal(campaign_id), User.tg_user_id).where(
+                    User.is_active.is_(True),
+                    User.is_bot.is_(False)
+                )
+            )
+            .on_conflict_do_nothing()
+        )
+        await session.commit()
+        return campaign_id
+
+
+async def set_campaign_status(campaign_id: int, status: str) -> bool:
+    """Пауза (PAUSED) или снятие с паузы (RUNNING); завершённую рассылку не трогает."""
+    async with get_async_session() as session:
+        result = await session.execute(
+            sa_update(BroadcastCampaign)
+            .where(BroadcastCampaign.id == campaign_id, BroadcastCampaign.status != COMPLETED)
+            .values(status=status)
+        )
+        await session.commit()
+        return result.rowcount > 0
+
+
+async def campaign_progress(campaign_id: int) -> dict[str, int]:
+    """Число получателей по статусам доставки."""
+    async with get_async_session() as session:
+        rows = (await session.execute(
+            select(BroadcastDelivery.status, func.count())
+            .where(BroadcastDelivery.campaign_id == campaign_id)
+            .group_by(BroadcastDelivery.status)
+        )).all()
+    return dict(rows)
+
+
+class _Delivery:
+    __slots__ = ("id", "tg_user_id", "attempts", "status", "message_id", "error", "file_id")
+
+    def __init__(self, delivery_id: int, tg_user_id: int, attempts: int):
+        self.id = delivery_id
+        self.tg_user_id = tg_user_id
+        self.attempts = attempts
+        self.status = PENDING
+        self.message_id = None
+        self.error = None
+        self.file_id = None
+
+
+async def run_campaign(bot, campaign_id: int) -> dict[str, int]:
+    """
+    Отправляет рассылку ожидающим получателям и возвращает итог этого запуска.
+
+    Фото берётся из реестра статики (utils.static_media) и отправляется по file_id. Получатели идут
+    пачками с ограниченной параллельностью; результат пачки сохраняется сразу,
+    поэтому после паузы или перезапуска рассылка продолжается с места остановки.
+    Заблокировавшие бота помечаются users.is_active = false.
+    """
+    if campaign_id in _active_campaigns:
+        return {}
+    _active_campaigns.add(campaign_id)
+    totals = {SENT: 0, BLOCKED: 0, FAILED: 0}
+    try:
+        async with get_async_session() as session:
+            campaign = await session.get(BroadcastCampaign, campaign_id)
+        if campaign is None or campaign.status == COMPLETED:
+            return totals
+
+        # Фото загружается один раз через реестр статики; не вышло — первому получателю в _send
+        if campaign.image_path and not campaign.photo_file_id:
+            try:
+                campaign.photo_file_id = await static_media.photo(bot, campaign.image_path)
+                await _save_file_id(campaign_id, campaign.photo_file_id)
+            except (OSError, TelegramError) as e:
+                structured_logger.warning(
+                    f"Broadcast photo upload failed: {e}",
+                    action="broadcast",
+                    context={'campaign_id': campaign_id, 'image_path': campaign.image_path}
+                )
+
+        semaphore = asyncio.Semaphore(BROADCAST_CONCURRENCY)
+        after_id = 0
+        while True:
+            if await _status(campaign_id) != RUNNING:
+                structured_logger.info(
+                    "Broadcast paused",
+                    action="broadcast",
+                    context={'campaign_id': campaign_id, **totals}
+                )
+                break
+
+            batch = await _pending_batch(campaign_id, after_id)
+            if not batch:
+                if after_id == 0:
+                    await _complete(campaign_id)
+                    break
+                # Новый проход — по отложенным после временных ошибок
+                after_id = 0
+                continue
+            after_id = batch[-1].id
+
+            try:
+                # Пока фото не загружено, отправляем по одному до первого file_id
+                queue = list(batch)
+                while queue and campaign.image_path and not campaign.photo_file_id:
+                    delivery = queue.pop(0)
+                    await _send(bot, campaign, delivery, semaphore)
+                    if delivery.file_id:
+                        campaign.photo_file_id = delivery.file_id
+                        await _save_file_id(campaign_id, delivery.file_id)
+                await asyncio.gather(*(_send(bot, campaign, d, semaphore) for d in queue))
+            finally:
+                # Уже отправленные не должны остаться pending и уйти повторно
+                await _save_batch(batch)
+            for delivery in batch:
+                if delivery.status in totals:
+                    totals[delivery.status] += 1
+            structured_logger.info(
+                "Broadcast batch sent",
+                action="broadcast",
+                context={'campaign_id': campaign_id, 'batch': len(batch), **totals}
+            )
+        return totals
+    finally:
+        _active_campaigns.discard(campaign_id)
+
+
+async def _send(bot, campaign: BroadcastCampaign, delivery: _Delivery, semaphore: asyncio.Semaphore) -> None:
+    async with semaphore:
+        try:
+            if campaign.image_path:
+                if campaign.photo_file_id:
+                    message = await bot.send_photo(
+                        chat_id=delivery.tg_user_id,
+                        photo=campaign.photo_file_id,
+                        caption=campaign.text,
+                        parse_mode="HTML",
+                        rate_limit_args=Lane.BROADCAST
+                    )
+                else:
+                    with open(campaign.image_path, "rb") as photo:
+                        message = await bot.send_photo(
+                            chat_id=delivery.tg_user_id,
+                            photo=photo,
+                            caption=campaign.text,
+                            parse_mode="HTML",
+                            rate_limit_args=Lane.BROADCAST
+                        )
+                    delivery.file_id = message.photo[-1].file_id
+            else:
+                message = await bot.send_message(
+                    chat_id=delivery.tg_user_id,
+                    text=campaign.text,
+                    parse_mode="HTML",
+                    rate_limit_args=Lane.BROADCAST
+                )
+            delivery.status = SENT
+            delivery.message_id = message.message_id
+            delivery.error = None
+        except RetryAfter as e:
+            # send_scheduler уже приостановил выдачу; попытку не засчитываем
+            delivery.error = str(e)[:255]
+            await asyncio.sleep(float(e.retry_after))
+        except Forbidden as e:
+            # Бот заблокирован или аккаунт удалён
+            delivery.status = BLOCKED
+            delivery.error = str(e)[:255]
+        except BadRequest as e:
+            delivery.status = FAILED
+            delivery.error = str(e)[:255]
+        except Exception as e:
+            # TelegramError и прочее (например, OSError при открытии фото) — неудачная попытка
+            delivery.attempts += 1
+            delivery.error = str(e)[:255]
+            if delivery.attempts >= BROADCAST_MAX_ATTEMPTS:
+                delivery.status = FAILED
+
+
+async def _status(campaign_id: int) -> str | None:
+    async with get_async_session() as session:
+        return await session.scalar(select(BroadcastCampaign.status).where(BroadcastCampaign.id == campaign_id))
+
+
+async def _pending_batch(campaign_id: int, after_id: int) -> list[_Delivery]:
+    async with get_async_session() as session:
+        rows = (await session.execute(
+            select(BroadcastDelivery.id, BroadcastDelivery.tg_user_id, BroadcastDelivery.attempts)
+            .where(
+                BroadcastDelivery.campaign_id == campaign_id,
+                BroadcastDelivery.status == PENDING,
+                BroadcastDelivery.id > after_id
+            )
+            .order_by(BroadcastDelivery.id)
+            .limit(BROADCAST_BATCH_SIZE)
+        )).all()
+    return [_Delivery(*row) for row in rows]
+
+
+async def _save_batch(batch: list[_Delivery]) -> None:
+    """Статусы пачки одним executemany; заблокировавших бота — в неактивные."""
+    blocked = [d.tg_user_id for d in batch if d.status == BLOCKED]
+    async with get_async_session() as session:
+        await session.execute(
+            sa_update(BroadcastDelivery),
+            [
+                {
+                    "id": d.id,
+                    "status": d.status,
+                    "attempts": d.attempts,
+                    "message_id": d.message_id,
+                    "error": d.error
+                }
+                for d in batch
+            ]
+        )
+        if blocked:
+            await session.execute(
+                sa_update(User).where(User.tg_user_id.in_(blocked)).values(is_active=False)
+            )
+        await session.commit()
+
+
+async def _save_file_id(campaign_id: int, file_id: str) -> None:
+    async with get_async_session() as session:
+        await session.execute(
+            sa_update(BroadcastCampaign).where(BroadcastCampaign.id == campaign_id).values(photo_file_id=file_id)
+        )
+        await session.commit()
+
+
+async def _complete(campaign_id: int) -> None:
+    async with get_async_session() as session:
+        await session.execute(
+            sa_update(BroadcastCampaign)
+            .where(BroadcastCampaign.id == campaign_id)
+            .values(status=COMPLETED, finished_at=func.now())
+        )
+        await session.commit()
+    structured_logger.info(
+        "Broadcast completed",
+        action="broadcast",
+        context={'campaign_id': campaign_id, **await campaign_progress(campaign_id)}
+    )
+
+
+def start_campaign(application, campaign_id: int) -> None:
+    """Запускает рассылку фоновой задачей приложения."""
+    application.create_task(run_campaign(application.bot, campaign_id))
+
+
+async def resume_running_campaigns(application) -> None:
+    """После перезапуска продолжает рассылки, оставшиеся в статусе running (post_init)."""
+    async with get_async_session() as session:
+        campaign_ids = (await session.execute(
+            select(BroadcastCampaign.id).where(BroadcastCampaign.status == RUNNING)
+        )).scalars().all()
+    for campaign_id in campaign_ids:
+        start_campaign(application, campaign_id)
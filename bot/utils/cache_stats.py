@@ -0,0 +1,31 @@
+from typing import Callable
+
+from utils.logging_config import structured_logger
+
+_providers: dict[str, Callable[[], dict]] = {}
+
+
+def register_cache_stats(name: str, provider: Callable[[], dict]) -> None:
+    """Регистрирует функцию, возвращающую счётчики кэша для периодического лога."""
+    _providers[name] = provider
+
+
+def collect_cache_stats() -> dict[str, dict]:
+    stats = {}
+    for name, provider in _providers.items():
+        stats[name] = provider()
+    return stats
+
+
+def hit_ratio(hits: int, misses: int) -> float | None:
+    total = hits + misses
+    return round(hits / total, 3) if total else None
+
+
+async def log_cache_stats(context):
+    """Пишет счётчики всех зарегистрированных кэшей в структурированный лог (JobQueue)."""
+    structured_logger.info(
+        "Cache statistics",
+        action="cache_stats",
+        context=collect_cache_stats()
+    )
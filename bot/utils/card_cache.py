@@ -0,0 +1,121 @@
+from collections import OrderedDict
+from datetime import datetime
+from decimal import Decimal
+from typing import Iterable
+
+from sqlalchemy import select
+
+from db.db_async import get_async_session
+from db.models.apartments import Apartment
+
+from utils.cache_stats import register_cache_stats, hit_ratio
+
+CARD_CACHE_SIZE = 1000
+
+
+class ApartmentCard:
+    """Снимок данных квартиры, достаточный для отрисовки карточки в поиске."""
+
+    __slots__ = (
+        "id", "updated_at", "short_address", "address", "description",
+        "type_id", "type_name", "floor", "has_balcony", "pets_allowed",
+        "max_guests", "price", "reward", "owner_tg_id", "photo_ids",
+    )
+
+    def __init__(self, apartment: Apartment):
+        self.id: int = apartment.id
+        self.updated_at: datetime | None = apartment.updated_at
+        self.short_address: str = apartment.short_address
+        self.address: str = apartment.address
+        self.description: str | None = apartment.description
+        self.type_id: int = apartment.type_id
+        self.type_name: str = apartment.apartment_type.name if apartment.apartment_type else ""
+        self.floor: int | None = apartment.floor
+        self.has_balcony: bool = apartment.has_balcony
+        self.pets_allowed: bool = apartment.pets_allowed
+        self.max_guests: int = apartment.max_guests
+        self.price: Decimal = apartment.price
+        self.reward: Decimal | None = apartment.reward
+        self.owner_tg_id: int = apartment.owner_tg_id
+        self.photo_ids: tuple[str, ...] = tuple(img.tg_file_id for img in apartment.images or [])
+
+    def __repr__(self):
+        return f"<ApartmentCard(id={self.id}, updated_at={self.updated_at})>"
+
+
+class ApartmentCardCache:
+    """
+    Общий для всех пользователей LRU-кэш карточек квартир.
+
+    Запись считается устаревшей, когда у квартиры меняется updated_at:
+    каждая свежая выборка из БД (put) вытесняет старую версию, а изменения
+    объекта явно сбрасывают запись через invalidate().
+    """
+
+    def __init__(self, max_size: int = CARD_CACHE_SIZE):
+        self.max_size = max_size
+        self._cards: OrderedDict[int, ApartmentCard] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._cards)
+
+    def put(self, apartment: Apartment) -> ApartmentCard:
+        card = ApartmentCard(apartment)
+        self._cards[card.id] = card
+        self._cards.move_to_end(card.id)
+        while len(self._cards) > self.max_size:
+            self._cards.popitem(last=False)
+        return card
+
+    def put_many(self, apartments: Iterable[Apartment]) -> None:
+        for apartment in apartments:
+            self.put(apartment)
+
+    def invalidate(self, apartment_id: int) -> None:
+        self._cards.pop(apartment_id, None)
+
+    def get_cached(self, apartment_id: int) -> ApartmentCard | None:
+        card = self._cards.get(apartment_id)
+        if card is not None:
+            self._cards.move_to_end(apartment_id)
+        return card
+
+    async def get(self, apartment_id: int) -> ApartmentCard | None:
+        cards = await self.get_many([apartment_id])
+        return cards.get(apartment_id)
+
+    async def get_many(self, apartment_ids: Iterable[int]) -> dict[int, ApartmentCard]:
+        """Карточки по ID: из кэша, недостающие — одним запросом к БД."""
+        cards: dict[int, ApartmentCard] = {}
+        missing: list[int] = []
+        for apartment_id in apartment_ids:
+            card = self.get_cached(apartment_id)
+            if card is None:
+                missing.append(apartment_id)
+            else:
+                cards[apartment_id] = card
+
+        self.hits += len(cards)
+        self.misses += len(missing)
+
+        if missing:
+            async with get_async_session() as session:
+                result = await session.execute(select(Apartment).where(Apartment.id.in_(missing)))
+                for apartment in result.scalars().all():
+                    cards[apartment.id] = self.put(apartment)
+
+        return cards
+
+    def stats(self) -> dict:
+        return {
+            'size': len(self._cards),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': hit_ratio(self.hits, self.misses),
+        }
+
+
+card_cache = ApartmentCardCache()
+register_cache_stats("apartment_cards", card_cache.stats)
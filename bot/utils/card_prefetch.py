@@ -0,0 +1,117 @@
+import asyncio
+import os
+from typing import Sequence
+
+from db.db_async import engine
+
+from utils.booking_navigation_view import booking_apartment_card_full
+from utils.card_cache import card_cache
+from utils.cache_stats import register_cache_stats
+from utils.logging_config import structured_logger
+
+# Одновременно идущих предзагрузок на весь бот
+PREFETCH_CONCURRENCY = int(os.getenv("CARD_PREFETCH_CONCURRENCY", "4"))
+# Доля занятых соединений пула, выше которой предзагрузка отключается
+PREFETCH_MAX_POOL_SATURATION = float(os.getenv("CARD_PREFETCH_MAX_POOL_SATURATION", "0.75"))
+# Пауза перед запросом: сначала уходит ответ пользователю
+PREFETCH_DELAY_SECONDS = 0.05
+
+
+def pool_saturation() -> float:
+    """Доля занятых соединений пула БД (0..1+, с учётом overflow может быть > 1)."""
+    pool = engine.sync_engine.pool
+    try:
+        size = pool.size()
+        return pool.checkedout() / size if size else 0.0
+    except AttributeError:
+        # Пулы без счётчиков (NullPool, StaticPool) не ограничиваем
+        return 0.0
+
+
+class CardPrefetcher:
+    """
+    Спекулятивная предзагрузка соседних карточек (i-1, i+1) в card_cache
+    и render_cache, пока пользователь смотрит карточку i.
+
+    На каждый чат — не больше одной задачи: новый показ отменяет предыдущую.
+    Общий семафор ограничивает параллельность, а при насыщении пула БД
+    предзагрузка пропускается, чтобы не отнимать соединения у живых запросов.
+    """
+
+    def __init__(self, concurrency: int = PREFETCH_CONCURRENCY):
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._tasks: dict[int, asyncio.Task] = {}
+        self.scheduled = 0
+        self.prefetched = 0
+        self.skipped_saturated = 0
+        self.cancelled = 0
+
+    def schedule(self, chat_id: int, apartment_ids: Sequence[int], index: int) -> None:
+        self.cancel(chat_id)
+
+        neighbours = [apartment_ids[i] for i in (index + 1, index - 1) if 0 <= i < len(apartment_ids)]
+        # Всё уже в кэше — задача не нужна
+        missing = [apt_id for apt_id in neighbours if card_cache.get_cached(apt_id) is None]
+        if not missing:
+            return
+
+        if pool_saturation() > PREFETCH_MAX_POOL_SATURATION:
+            self.skipped_saturated += 1
+            return
+
+        self.scheduled += 1
+        task = asyncio.create_task(self._prefetch(missing, apartment_ids, index))
+        self._tasks[chat_id] = task
+        task.add_done_callback(lambda t: self._done(chat_id, t))
+
+    def cancel(self, chat_id: int) -> None:
+        task = self._tasks.pop(chat_id, None)
+        if task is not None and not task.done():
+            task.cancel()
+            self.cancelled += 1
+
+    def cancel_all(self) -> None:
+        for chat_id in list(self._tasks):
+            self.cancel(chat_id)
+
+    def _done(self, chat_id: int, task: asyncio.Task) -> None:
+        if self._tasks.get(chat_id) is task:
+            del self._tasks[chat_id]
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            structured_logger.warning(
+                f"Card prefetch failed: {task.exception()}",
+                action="card_prefetch",
+                context={'chat_id': chat_id}
+            )
+
+    async def _prefetch(self, missing: list[int], apartment_ids: Sequence[int], index: int) -> None:
+        await asyncio.sleep(PREFETCH_DELAY_SECONDS)
+        async with self._semaphore:
+            # Пока ждали семафор, пул мог забиться
+            if pool_saturation() > PREFETCH_MAX_POOL_SATURATION:
+                self.skipped_saturated += 1
+                return
+            cards = await card_cache.get_many(missing)
+
+        total = len(apartment_ids)
+        for i in (index + 1, index - 1):
+            if 0 <= i < total and apartment_ids[i] in cards:
+                # Прогреваем render_cache: текст, первое фото и статичные кнопки
+                booking_apartment_card_full(cards[apartment_ids[i]], i, total)
+        self.prefetched += len(cards)
+
+    def stats(self) -> dict:
+        return {
+            'scheduled': self.scheduled,
+            'prefetched': self.prefetched,
+            'skipped_saturated': self.skipped_saturated,
+            'cancelled': self.cancelled,
+            'running': len(self._tasks),
+            'pool_saturation': round(pool_saturation(), 3),
+        }
+
+
+card_prefetcher = CardPrefetcher()
+register_cache_stats("card_prefetch", card_prefetcher.stats)
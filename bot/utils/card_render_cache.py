@@ -0,0 +1,86 @@
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+from telegram import InlineKeyboardButton, InputMediaPhoto
+
+from utils.cache_stats import register_cache_stats, hit_ratio
+
+RENDER_CACHE_SIZE = 2000
+
+
+class RenderedCard:
+    """
+    Готовая к отправке неизменяемая часть карточки: HTML-текст, медиа и
+    статические кнопки. Строка позиции и кнопки навигации сюда не входят —
+    их дешево собирать на каждом шаге.
+    """
+
+    __slots__ = ("body", "media", "action_rows")
+
+    def __init__(
+        self,
+        body: str,
+        media: tuple[InputMediaPhoto, ...] = (),
+        action_rows: tuple[tuple[InlineKeyboardButton, ...], ...] = ()
+    ):
+        self.body = body
+        self.media = media
+        self.action_rows = action_rows
+
+    def media_list(self) -> list[InputMediaPhoto] | None:
+        return list(self.media) if self.media else None
+
+
+class CardRenderCache:
+    """
+    LRU-кэш отрисованных карточек.
+
+    Ключ — (вид карточки, apartment_id, updated_at, доп. версия): правка
+    квартиры меняет updated_at, поэтому устаревшая отрисовка просто перестаёт
+    находиться. Явный сброс — invalidate() из apartment_changed().
+    """
+
+    def __init__(self, max_size: int = RENDER_CACHE_SIZE):
+        self.max_size = max_size
+        self._cards: OrderedDict[tuple, RenderedCard] = OrderedDict()
+        self._hits: dict[str, int] = {}
+        self._misses: dict[str, int] = {}
+
+    def __len__(self):
+        return len(self._cards)
+
+    def get_or_render(
+        self,
+        kind: str,
+        apartment_id: int,
+        version: Hashable,
+        render: Callable[[], RenderedCard]
+    ) -> RenderedCard:
+        key = (kind, apartment_id, version)
+        card = self._cards.get(key)
+        if card is not None:
+            self._cards.move_to_end(key)
+            self._hits[kind] = self._hits.get(kind, 0) + 1
+            return card
+
+        self._misses[kind] = self._misses.get(kind, 0) + 1
+        card = render()
+        self._cards[key] = card
+        while len(self._cards) > self.max_size:
+            self._cards.popitem(last=False)
+        return card
+
+    def invalidate(self, apartment_id: int) -> None:
+        for key in [k for k in self._cards if k[1] == apartment_id]:
+            del self._cards[key]
+
+    def stats(self) -> dict:
+        stats = {'size': len(self._cards)}
+        for kind in sorted(set(self._hits) | set(self._misses)):
+            hits, misses = self._hits.get(kind, 0), self._misses.get(kind, 0)
+            stats[kind] = {'hits': hits, 'misses': misses, 'hit_ratio': hit_ratio(hits, misses)}
+        return stats
+
+
+render_cache = CardRenderCache()
+register_cache_stats("card_render", render_cache.stats)
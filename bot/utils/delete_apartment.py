@@ -16,19 +16,20 @@ from utils.logging_config import (
     monitor_performance
 )
 
+from utils.apartment_events import apartment_changed
+from utils.reference_data import ACTIVE_STATUSES
+
 from telegram import Update
 
 from telegram.ext import ContextTypes
 
 
-# Предположим, статус 5 = "pending", статус 6 = "confirmed"
-ACTIVE_BOOKING_STATUSES = [5, 6]
+ACTIVE_BOOKING_STATUSES = ACTIVE_STATUSES
 
 
 @log_db_update  
 async def delete_apartment(apartment_id: int, tg_user_id: int, update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Delete apartment with full logging"""
-    ACTIVE_BOOKING_STATUSES = [5, 6]
     
     with LoggingContext("apartment_deletion", user_id=tg_user_id, 
                        apartment_id=apartment_id) as log_ctx:
@@ -90,6 +91,7 @@ async def delete_apartment(apartment_id: int, tg_user_id: int, update: Update, c
                 )
             )
             await session.commit()
+            apartment_changed(apartment_id)
 
             structured_logger.info(
                 f"Apartment {apartment_id} successfully deleted",
@@ -0,0 +1,116 @@
+from datetime import date, timedelta
+
+import numpy as np
+from sqlalchemy import and_
+
+from db.db_async import get_async_session
+from db.models.apartments import Apartment
+from db.models.bookings import Booking
+
+from utils.booking_overlap import stay_overlaps
+from utils.card_cache import card_cache
+from utils.reference_data import BLOCKING_STATUSES
+
+# Максимальный сдвиг дат в гибком поиске (±N дней)
+FLEX_MAX_DAYS = 3
+
+
+def shift_order(flex: int) -> list[int]:
+    """Сдвиги в порядке предпочтения: 0, -1, +1, -2, +2, ..."""
+    order = [0]
+    for s in range(1, flex + 1):
+        order += [-s, s]
+    return order
+
+
+def best_shifts(occupancy: np.ndarray, nights: int, flex: int, allowed: np.ndarray) -> np.ndarray:
+    """
+    Лучший сдвиг для каждой квартиры по матрице занятости.
+
+    occupancy — bool-матрица (квартиры × ночи окна [check_in - flex, check_out + flex)),
+    nights — длина проживания, allowed — bool-маска допустимых сдвигов в порядке
+    shift_order(flex). Возвращает индекс в shift_order или -1, если свободного окна нет.
+    """
+    # Префиксные суммы: занятые ночи любого окна считаются разностью двух столбцов
+    prefix = np.zeros((occupancy.shape[0], occupancy.shape[1] + 1), dtype=np.int32)
+    np.cumsum(occupancy, axis=1, out=prefix[:, 1:])
+
+    starts = np.array([flex + s for s in shift_order(flex)])
+    busy = prefix[:, starts + nights] - prefix[:, starts]  # квартиры × сдвиги
+    free = (busy == 0) & allowed
+
+    best = free.argmax(axis=1)
+    best[~free.any(axis=1)] = -1
+    return best
+
+
+async def find_flexible_matches(
+    base_stmt,
+    check_in: date,
+    check_out: date,
+    flex: int,
+    limit: int | None = None
+) -> list[tuple[int, int]]:
+    """
+    Гибкий поиск: все окна [check_in + s, check_out + s), |s| <= flex, за один запрос.
+
+    base_stmt — select(Apartment) с фильтрами поиска, но без фильтра по датам и LIMIT.
+    Квартиры выбираются вместе с блокирующими бронями, пересекающими расширенное
+    окно; свободные сдвиги считаются в памяти. Возвращает пары
+    (apartment_id, лучший сдвиг): сначала точные даты, затем ближайшие сдвиги.
+    """
+    flex = max(0, min(flex, FLEX_MAX_DAYS))
+    origin = check_in - timedelta(days=flex)
+    window_end = check_out + timedelta(days=flex)
+    width = (window_end - origin).days
+    nights = (check_out - check_in).days
+
+    stmt = (
+        base_stmt
+        .add_columns(Booking.check_in, Booking.check_out)
+        .outerjoin(Booking, and_(
+            Booking.apartment_id == Apartment.id,
+            Booking.status_id.in_(BLOCKING_STATUSES),
+            stay_overlaps(origin, window_end)
+        ))
+    )
+
+    async with get_async_session() as session:
+        rows = (await session.execute(stmt)).all()
+
+    # Порядок квартир — как в обычной выдаче (первое появление в строках)
+    apartments: dict[int, Apartment] = {}
+    stays: list[tuple[int, date, date]] = []
+    for apartment, b_check_in, b_check_out in rows:
+        apartments.setdefault(apartment.id, apartment)
+        if b_check_in is not None:
+            stays.append((apartment.id, b_check_in, b_check_out))
+
+    if limit is not None:
+        apartments = dict(list(apartments.items())[:limit])
+    if not apartments:
+        return []
+
+    card_cache.put_many(apartments.values())
+
+    ids = list(apartments)
+    position = {apt_id: i for i, apt_id in enumerate(ids)}
+    occupancy = np.zeros((len(ids), width), dtype=bool)
+    for apt_id, b_check_in, b_check_out in stays:
+        if apt_id not in position:
+            continue
+        start = max((b_check_in - origin).days, 0)
+        end = min((b_check_out - origin).days, width)
+        occupancy[position[apt_id], start:end] = True
+
+    # Заезд возможен только с завтрашнего дня
+    today = date.today()
+    shifts = shift_order(flex)
+    allowed = np.array([check_in + timedelta(days=s) > today for s in shifts])
+
+    best = best_shifts(occupancy, nights, flex, allowed)
+
+    matches = [(apt_id, shifts[b]) for apt_id, b in zip(ids, best.tolist()) if b >= 0]
+    # Стабильная сортировка: точные даты первыми, внутри — исходный порядок выдачи
+    matches.sort(key=lambda m: abs(m[1]))
+    return matches
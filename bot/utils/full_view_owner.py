@@ -12,8 +12,11 @@ from telegram import (
     InputMediaPhoto
 )
 
-def render_apartment_card_full(apartment: Apartment) -> tuple[str, list[InputMediaPhoto] | None, InlineKeyboardMarkup]:
-    text = (
+from utils.card_render_cache import render_cache, RenderedCard
+
+
+def _render_draft_card(apartment: Apartment) -> RenderedCard:
+    body = (
         f"<b>{apartment.short_address}</b>\n\n"
         f"💬 {apartment.description or 'Без описания'}\n\n"
         f"🏷️ Тип: {apartment.apartment_type.name}\n"
@@ -23,13 +26,21 @@ def render_apartment_card_full(apartment: Apartment) -> tuple[str, list[InputMed
         f"💸 Комиссия за бронирование: {apartment.reward}%"
     )
 
-    photos = [InputMediaPhoto(img.tg_file_id) for img in apartment.images[:10]] if apartment.images else None
+    photos = tuple(InputMediaPhoto(img.tg_file_id) for img in apartment.images[:10]) if apartment.images else ()
+
+    action_rows = (
+        (InlineKeyboardButton("✅ Подтвердить", callback_data=f"confirm_apartment_{apartment.id}"),),
+        (InlineKeyboardButton("🔄 Внести заново", callback_data=f"redo_apartment_{apartment.id}"),),
+    )
+    return RenderedCard(body, photos, action_rows)
+
 
-    buttons = [
-        [InlineKeyboardButton("✅ Подтвердить", callback_data=f"confirm_apartment_{apartment.id}")],
-        [InlineKeyboardButton("🔄 Внести заново", callback_data=f"redo_apartment_{apartment.id}")]
-    ]
+def render_apartment_card_full(apartment: Apartment) -> tuple[str, list[InputMediaPhoto] | None, InlineKeyboardMarkup]:
+    card = render_cache.get_or_render(
+        "draft", apartment.id, apartment.updated_at,
+        lambda: _render_draft_card(apartment)
+    )
 
-    markup = InlineKeyboardMarkup(buttons)
+    markup = InlineKeyboardMarkup(card.action_rows)
 
-    return text, photos, markup
+    return card.body, card.media_list(), markup
@@ -2,51 +2,122 @@ from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 
 import calendar
 from datetime import date, timedelta
+from functools import lru_cache
 
 # Префиксы для callback
 CB_PREFIX = "CAL"
 CB_SELECT = f"{CB_PREFIX}_SELECT"
 CB_NAV = f"{CB_PREFIX}_NAV"
 
-def build_calendar(year: int, month: int, check_in=None, check_out=None):
-    """Строит inline-календарь"""
+@lru_cache(maxsize=64)
+def _month_skeleton(year: int, month: int) -> tuple:
+    """
+    Неизменяемый каркас календаря месяца: шапка, дни недели, сетка дней и навигация.
+    Строки сетки хранятся как кортежи (день | None, кнопка) — None у пустых клеток.
+    """
     cal = calendar.Calendar(firstweekday=0)
-    keyboard = []
 
     # Шапка с месяцем
-    keyboard.append([InlineKeyboardButton(f"{calendar.month_name[month]} {year}", callback_data="IGNORE")])
+    header = (InlineKeyboardButton(f"{calendar.month_name[month]} {year}", callback_data="IGNORE"),)
 
     # Дни недели
     week_days = ["Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс"]
-    keyboard.append([InlineKeyboardButton(d, callback_data="IGNORE") for d in week_days])
+    weekdays = tuple(InlineKeyboardButton(d, callback_data="IGNORE") for d in week_days)
 
     # Сетка дней
-    for week in cal.monthdatescalendar(year, month):
-        row = []
-        for day in week:
-            if day.month != month:
-                row.append(InlineKeyboardButton(" ", callback_data="IGNORE"))
-            else:
-                text = str(day.day)
-
-                # Подсветка выбранного диапазона
-                if check_in and check_out and check_in <= day <= check_out:
-                    text = f"✔️{day.day}"
-                elif check_in and day == check_in:
-                    text = f"✔️{day.day}"
-                elif check_out and day == check_out:
-                    text = f"🔴{day.day}"
-
-                row.append(InlineKeyboardButton(text, callback_data=f"{CB_SELECT}:{day.isoformat()}"))
-        keyboard.append(row)
+    empty = InlineKeyboardButton(" ", callback_data="IGNORE")
+    weeks = tuple(
+        tuple(
+            (None, empty) if day.month != month
+            else (day, InlineKeyboardButton(str(day.day), callback_data=f"{CB_SELECT}:{day.isoformat()}"))
+            for day in week
+        )
+        for week in cal.monthdatescalendar(year, month)
+    )
 
     # Навигация
     prev_month = (date(year, month, 1) - timedelta(days=1)).replace(day=1)
     next_month = (date(year, month, calendar.monthrange(year, month)[1]) + timedelta(days=1)).replace(day=1)
-    keyboard.append([
+    nav = (
         InlineKeyboardButton("◀️", callback_data=f"{CB_NAV}:{prev_month.year}:{prev_month.month}"),
         InlineKeyboardButton("▶️", callback_data=f"{CB_NAV}:{next_month.year}:{next_month.month}")
-    ])
+    )
+
+    return header, weekdays, weeks, nav
+
+
+def _range_label(day: date, check_in, check_out) -> str | None:
+    """Подпись дня из выбранного диапазона; None — оставить кнопку как есть."""
+    if check_in and check_out and check_in <= day <= check_out:
+        return f"✔️{day.day}"
+    if check_in and day == check_in:
+        return f"✔️{day.day}"
+    if check_out and day == check_out:
+        return f"🔴{day.day}"
+    return None
+
+
+# Сетка месяца с наложенной тепловой картой: (год, месяц) -> (free_counts, today, сетка)
+_heatmap_grids: dict[tuple[int, int], tuple[dict, date, tuple]] = {}
+HEATMAP_GRIDS_MAX = 64
+
+
+def _heatmap_grid(year: int, month: int, weeks: tuple, free_counts: dict, today: date) -> tuple:
+    """
+    Сетка дней со счётчиками свободных квартир.
+
+    availability_heatmap отдаёт один и тот же dict, пока месяц не пересчитан,
+    поэтому сетка кэшируется по тождеству free_counts (и дате: прошедшие дни без счётчиков).
+    """
+    key = (year, month)
+    cached = _heatmap_grids.get(key)
+    if cached and cached[0] is free_counts and cached[1] == today:
+        return cached[2]
+
+    grid = []
+    for week in weeks:
+        row = []
+        for day, button in week:
+            if day and day > today and day in free_counts:
+                free = free_counts[day]
+                label = f"{day.day}·{free}" if free else f"{day.day}✖️"
+                button = InlineKeyboardButton(label, callback_data=button.callback_data)
+            row.append((day, button))
+        grid.append(tuple(row))
+    grid = tuple(grid)
+
+    if key not in _heatmap_grids and len(_heatmap_grids) >= HEATMAP_GRIDS_MAX:
+        _heatmap_grids.pop(next(iter(_heatmap_grids)))
+    _heatmap_grids[key] = (free_counts, today, grid)
+    return grid
+
+
+def build_calendar(year: int, month: int, check_in=None, check_out=None, free_counts: dict | None = None):
+    """
+    Строит inline-календарь.
+
+    Каркас месяца берётся из кэша (_month_skeleton), заново создаются только
+    кнопки подсвеченных дней. free_counts — {дата: число свободных квартир}
+    для тепловой карты арендатора: у будущих дней рядом с числом выводится
+    количество свободных вариантов; сетка со счётчиками тоже кэшируется (_heatmap_grid).
+    """
+    header, weekdays, weeks, nav = _month_skeleton(year, month)
+
+    if free_counts:
+        weeks = _heatmap_grid(year, month, weeks, free_counts, date.today())
+
+    # Без подсветки диапазона клетки сетки подходят как есть
+    if not (check_in or check_out):
+        return InlineKeyboardMarkup([header, weekdays, *([button for _, button in week] for week in weeks), nav])
+
+    keyboard = [header, weekdays]
+    for week in weeks:
+        row = []
+        for day, button in week:
+            label = _range_label(day, check_in, check_out) if day else None
+            row.append(button if label is None else InlineKeyboardButton(label, callback_data=button.callback_data))
+        keyboard.append(row)
+    keyboard.append(nav)
 
     return InlineKeyboardMarkup(keyboard)
 
@@ -73,4 +144,27 @@ def build_price_filter_keyboard():
         [InlineKeyboardButton("3000 – 5900 ₽", callback_data="price_3000_5900")],
         [InlineKeyboardButton("6000+ ₽", callback_data="price_6000_plus")],
         [InlineKeyboardButton("💰 Без фильтра", callback_data="price_all")]
-    ]
\ No newline at end of file
+    ]
+
+def build_location_keyboard(districts: dict):
+    """Выбор района поиска: районы в 2 колонки, "рядом со мной" и "без разницы"."""
+    keyboard = []
+    row = []
+    for key, (_, _, label) in districts.items():
+        row.append(InlineKeyboardButton(label, callback_data=f"geo_{key}"))
+        if len(row) == 2:
+            keyboard.append(row)
+            row = []
+    if row:
+        keyboard.append(row)
+
+    keyboard.append([InlineKeyboardButton("📍 Рядом со мной", callback_data="geo_me")])
+    keyboard.append([InlineKeyboardButton("🌍 Без разницы", callback_data="geo_any")])
+    return keyboard
+
+def build_flex_keyboard(max_days: int):
+    """Точные даты или гибкий поиск ±1..±max_days дней."""
+    return [
+        [InlineKeyboardButton("🎯 Точные даты", callback_data="flex_0")],
+        [InlineKeyboardButton(f"±{d} дн.", callback_data=f"flex_{d}") for d in range(1, max_days + 1)]
+    ]
@@ -1,9 +1,17 @@
 from telegram import Update
 from telegram.ext import ContextTypes
-from telegram.error import BadRequest
+from telegram.error import TelegramError
+
+from utils.logging_config import structured_logger
+from utils.send_scheduler import Lane
 
 import re
 
+# deleteMessages принимает до 100 ID за запрос
+DELETE_BATCH_SIZE = 100
+# Дольше 48 часов Telegram всё равно не даёт удалять сообщения бота
+MAX_TRACKED_MESSAGES = 200
+
 async def send_and_pin_message(bot, chat_id: int, text: str, reply_markup=None):
     """
     Отправляет и закрепляет сообщение в чате.
@@ -40,29 +48,52 @@ async def send_message(update: Update, text: str, reply_markup=None, **kwargs):
 async def cleanup_messages(context: ContextTypes.DEFAULT_TYPE):
     """
     Удаляет все сообщения, сохранённые в context.user_data["messages_to_delete"].
-    После очистки список сбрасывается.
+    Список сбрасывается сразу, а удаление идёт фоновой задачей — ответ
+    пользователю не ждёт его. Сообщения удаляются пачками deleteMessages
+    (до 100 ID на запрос) по каждому чату.
     """
     messages = context.user_data.get("messages_to_delete", [])
     if not messages:
         return
 
+    by_chat: dict[int, list[int]] = {}
     for chat_id, msg_id in messages:
-        try:
-            await context.bot.delete_message(chat_id, msg_id)
-        except BadRequest:
-            # сообщение уже удалено или недоступно
-            pass
-
+        by_chat.setdefault(chat_id, []).append(msg_id)
     context.user_data["messages_to_delete"] = []
 
+    context.application.create_task(_delete_messages(context.bot, by_chat))
+
+
+async def _delete_messages(bot, by_chat: dict[int, list[int]]):
+    for chat_id, msg_ids in by_chat.items():
+        for i in range(0, len(msg_ids), DELETE_BATCH_SIZE):
+            try:
+                # Полоса ниже интерактивной: новый ответ в этот чат уходит первым
+                await bot.delete_messages(
+                    chat_id,
+                    msg_ids[i:i + DELETE_BATCH_SIZE],
+                    rate_limit_args=Lane.NOTIFICATION
+                )
+            except TelegramError as e:
+                # Ненайденные сообщения Telegram пропускает сам; сюда попадают сетевые ошибки
+                structured_logger.warning(
+                    f"Message cleanup failed: {e}",
+                    action="message_cleanup",
+                    context={'chat_id': chat_id, 'count': len(msg_ids[i:i + DELETE_BATCH_SIZE])}
+                )
+
 
 async def add_message_to_cleanup(context: ContextTypes.DEFAULT_TYPE, chat_id: int, msg_id: int):
     """
     Добавляет сообщение в список на будущее удаление.
+    Хранятся последние MAX_TRACKED_MESSAGES сообщений, более старые забываются.
     """
     if "messages_to_delete" not in context.user_data:
         context.user_data["messages_to_delete"] = []
-    context.user_data["messages_to_delete"].append((chat_id, msg_id))
+    messages = context.user_data["messages_to_delete"]
+    messages.append((chat_id, msg_id))
+    if len(messages) > MAX_TRACKED_MESSAGES:
+        del messages[:-MAX_TRACKED_MESSAGES]
 
 def sanitize_message(text: str) -> str:
     # 9+ цифр подряд → ***
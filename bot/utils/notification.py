@@ -1,13 +1,13 @@
 from datetime import datetime
-from sqlalchemy import select
-from telegram import InputFile
-
-from db.db_async import get_async_session
-from db.models import User
 
+from utils.broadcast import create_campaign, run_campaign, SENT, FAILED, BLOCKED
 from utils.logging_config import structured_logger
 
 
+# Имя рассылки: повторный запуск с тем же именем продолжает её, а не начинает заново
+CAMPAIGN_NAME = "server_maintenance_2026_01_22"
+
+
 async def send_mass_notification(bot):
     """
     Рассылка сообщения всем активным пользователям.
@@ -28,46 +28,17 @@ async def send_mass_notification(bot):
 
     image_path = "/bot/static/images/sandywatch.jpg"
 
-    sent = 0
-    failed = 0
-
-    # --- Получаем список пользователей ---
-    async with get_async_session() as session:
-        result = await session.execute(
-            select(User.tg_user_id).where(User.is_active == True)
-        )
-        rows = result.fetchall()
-        users = [row.tg_user_id for row in rows]
-
-    if not users:
-        structured_logger.info("Рассылка не выполнена — нет активных пользователей")
-        return {"sent": 0, "failed": 0}
-
-    # --- Рассылка ---
-    for user_id in users:
-        try:
-            with open(image_path, "rb") as photo:
-                await bot.send_photo(
-                    chat_id=user_id,
-                    photo=photo,
-                    caption=message_text,
-                    parse_mode="HTML"
-                )
-            sent += 1
+    # --- Получатели фиксируются в broadcast_deliveries, рассылка идёт по ним ---
+    campaign_id = await create_campaign(CAMPAIGN_NAME, message_text, image_path)
+    result = await run_campaign(bot, campaign_id)
 
-        except Exception as e:
-            structured_logger.warning(
-                "Ошибка отправки уведомления",
-                user_id=user_id,
-                action="send_failed",
-                context={"error": str(e)}
-            )
-            failed += 1
+    sent = result.get(SENT, 0)
+    failed = result.get(FAILED, 0) + result.get(BLOCKED, 0)
 
     structured_logger.info(
         "Рассылка завершена",
         action="mass_notification_done",
-        context={"sent": sent, "failed": failed, "timestamp": datetime.utcnow().isoformat()}
+        context={"campaign_id": campaign_id, "sent": sent, "failed": failed, "timestamp": datetime.utcnow().isoformat()}
     )
 
     return {"sent": sent, "failed": failed}
@@ -0,0 +1,234 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, update as sa_update, func
+from telegram import InlineKeyboardMarkup
+from telegram.error import TelegramError, RetryAfter, Forbidden, BadRequest
+
+from db.db_async import get_async_session
+from db.models.outbox import OutboxMessage
+
+from utils.cache_stats import register_cache_stats
+from utils.logging_config import structured_logger
+from utils.send_scheduler import Lane
+
+OUTBOX_BATCH_SIZE = 50
+# Захваченное сообщение недоступно другим проходам на это время; упавший
+# процесс не отметит отправку, и сообщение уйдёт повторно (at-least-once)
+OUTBOX_LEASE_SECONDS = 60
+OUTBOX_MAX_ATTEMPTS = 8
+OUTBOX_POLL_SECONDS = 30
+BACKOFF_BASE_SECONDS = 5
+BACKOFF_MAX_SECONDS = 60 * 60
+
+
+def enqueue(
+    session,
+    chat_id: int,
+    text: str,
+    kind: str,
+    booking_id: int | None = None,
+    parse_mode: str | None = None,
+    reply_markup: InlineKeyboardMarkup | None = None,
+    pin: bool = False
+) -> OutboxMessage:
+    """Добавляет уведомление в outbox в текущей транзакции; отправит его диспетчер после commit."""
+    message = OutboxMessage(
+        chat_id=chat_id,
+        kind=kind,
+        booking_id=booking_id,
+        text=text,
+        parse_mode=parse_mode,
+        reply_markup=reply_markup.to_dict() if reply_markup else None,
+        pin=pin
+    )
+    session.add(message)
+    return message
+
+
+def backoff_seconds(attempts: int) -> int:
+    """Экспоненциальная пауза перед следующей попыткой: 5, 10, 20, ... до часа."""
+    return min(BACKOFF_BASE_SECONDS * 2 ** max(attempts - 1, 0), BACKOFF_MAX_SECONDS)
+
+
+class OutboxDispatcher:
+    """
+    Отправляет сообщения из public.outbox.
+
+    Пачка захватывается одним UPDATE ... WHERE id IN (SELECT ... FOR UPDATE SKIP LOCKED)
+    с арендой на OUTBOX_LEASE_SECONDS, после чего каждое сообщение отправляется
+    и отмечается отдельно. Временные ошибки повторяются с экспоненциальной паузой,
+    RetryAfter — через указанное Telegram время, Forbidden/BadRequest завершают
+    отправку сразу.
+    """
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+        self._pending = False
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self.latency_total_ms = 0
+        self.latency_max_ms = 0
+
+    async def drain(self, bot) -> int:
+        """Отправляет всё, что пора отправить. Параллельный вызов лишь просит ещё один проход."""
+        if self._lock.locked():
+            self._pending = True
+            return 0
+
+        delivered = 0
+        async with self._lock:
+            while True:
+                self._pending = False
+                batch = await self._claim()
+                for message in batch:
+                    if await self._deliver(bot, message):
+                        delivered += 1
+                if len(batch) < OUTBOX_BATCH_SIZE and not self._pending:
+                    break
+        return delivered
+
+    async def _claim(self) -> list[OutboxMessage]:
+        due = (
+            select(OutboxMessage.id)
+            .where(
+                OutboxMessage.sent_at.is_(None),
+                OutboxMessage.failed_at.is_(None),
+                OutboxMessage.next_attempt_at <= func.now()
+            )
+            .order_by(OutboxMessage.id)
+            .limit(OUTBOX_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+        async with get_async_session() as session:
+            result = await session.execute(
+                sa_update(OutboxMessage)
+                .where(OutboxMessage.id.in_(due))
+                .values(
+                    attempts=OutboxMessage.attempts + 1,
+                    next_attempt_at=func.now() + timedelta(seconds=OUTBOX_LEASE_SECONDS)
+                )
+                .returning(OutboxMessage)
+                .execution_options(synchronize_session=False)
+            )
+            messages = result.scalars().all()
+            await session.commit()
+        return sorted(messages, key=lambda m: m.id)
+
+    async def _deliver(self, bot, message: OutboxMessage) -> bool:
+        try:
+            sent = await bot.send_message(
+                chat_id=message.chat_id,
+                text=message.text,
+                parse_mode=message.parse_mode,
+                reply_markup=InlineKeyboardMarkup.de_json(message.reply_markup, bot) if message.reply_markup else None,
+                rate_limit_args=Lane.NOTIFICATION
+            )
+        except RetryAfter as e:
+            await self._retry(message, int(e.retry_after), e)
+            return False
+        except (Forbidden, BadRequest) as e:
+            await self._fail(message, e)
+            return False
+        except TelegramError as e:
+            if message.attempts >= OUTBOX_MAX_ATTEMPTS:
+                await self._fail(message, e)
+            else:
+                await self._retry(message, backoff_seconds(message.attempts), e)
+            return False
+
+        # Закрепление — не повод отправлять сообщение повторно
+        if message.pin:
+            try:
+                await bot.pin_chat_message(
+                    chat_id=message.chat_id,
+                    message_id=sent.message_id,
+                    disable_notification=False,
+                    rate_limit_args=Lane.NOTIFICATION
+                )
+            except TelegramError as e:
+                structured_logger.warning(
+                    f"Outbox message pin failed: {e}",
+                    action="outbox_dispatch",
+                    context={'outbox_id': message.id, 'kind': message.kind}
+                )
+
+        await self._update(message.id, sent_at=func.now(), last_error=None)
+        latency_ms = round((datetime.now(timezone.utc) - message.created_at).total_seconds() * 1000)
+        self.sent += 1
+        self.latency_total_ms += latency_ms
+        self.latency_max_ms = max(self.latency_max_ms, latency_ms)
+        structured_logger.info(
+            "Outbox message delivered",
+            action="outbox_dispatch",
+            context={
+                'outbox_id': message.id,
+                'kind': message.kind,
+                'booking_id': message.booking_id,
+                'attempts': message.attempts,
+                'latency_ms': latency_ms
+            }
+        )
+        return True
+
+    async def _retry(self, message: OutboxMessage, delay: int, error: Exception) -> None:
+        self.retried += 1
+        await self._update(
+            message.id,
+            next_attempt_at=func.now() + timedelta(seconds=delay),
+            last_error=str(error)[:255]
+        )
+        structured_logger.warning(
+            f"Outbox delivery postponed: {error}",
+            action="outbox_dispatch",
+            context={'outbox_id': message.id, 'kind': message.kind, 'attempts': message.attempts, 'delay_s': delay}
+        )
+
+    async def _fail(self, message: OutboxMessage, error: Exception) -> None:
+        self.failed += 1
+        await self._update(message.id, failed_at=func.now(), last_error=str(error)[:255])
+        structured_logger.error(
+            f"Outbox delivery failed: {error}",
+            action="outbox_dispatch",
+            context={'outbox_id': message.id, 'kind': message.kind, 'chat_id': message.chat_id, 'attempts': message.attempts}
+        )
+
+    @staticmethod
+    async def _update(outbox_id: int, **values) -> None:
+        async with get_async_session() as session:
+            await session.execute(
+                sa_update(OutboxMessage).where(OutboxMessage.id == outbox_id).values(**values)
+            )
+            await session.commit()
+
+    def stats(self) -> dict:
+        return {
+            'sent': self.sent,
+            'retried': self.retried,
+            'failed': self.failed,
+            'latency_avg_ms': round(self.latency_total_ms / self.sent) if self.sent else None,
+            'latency_max_ms': self.latency_max_ms,
+        }
+
+
+outbox_dispatcher = OutboxDispatcher()
+register_cache_stats("outbox", outbox_dispatcher.stats)
+
+
+async def dispatch_outbox(context):
+    """Проход диспетчера (JobQueue): по таймеру и сразу после записи в outbox."""
+    try:
+        await outbox_dispatcher.drain(context.bot)
+    except Exception as e:
+        structured_logger.error(
+            f"Outbox dispatch failed: {e}",
+            action="outbox_dispatch",
+            exception=e
+        )
+
+
+def kick_outbox(job_queue) -> None:
+    """Запускает отправку сразу после commit, не дожидаясь планового прохода."""
+    if job_queue is not None:
+        job_queue.run_once(dispatch_outbox, when=0)
@@ -8,25 +8,33 @@ from telegram import (
     InputMediaPhoto
 )
 
-def prepare_owner_objects_cards(current_apartment: Apartment, current_index: int, total: int) -> tuple[str, str | None, InlineKeyboardMarkup]:
-    """Возвращает текст и клавиатуру для карточки."""
+from utils.card_render_cache import render_cache, RenderedCard
+from utils.reference_data import BookingStatus
+
+
+def _booking_stats(current_apartment: Apartment) -> tuple:
     confirmed = pending = complit = placeholder = confirmed_fund = pending_fund = complit_fund = 0
 
     for b in current_apartment.booking:
-        if b.status_id == 6:  # подтверждено
+        if b.status_id == BookingStatus.CONFIRMED:
             confirmed += 1
             confirmed_fund += b.total_price or 0
-        elif b.status_id == 5:  # ожидает подтверждения
+        elif b.status_id == BookingStatus.PENDING:
             pending += 1
             pending_fund += b.total_price or 0
-        elif b.status_id == 12:  # завершено
+        elif b.status_id == BookingStatus.COMPLETED:
             complit += 1
             complit_fund += b.total_price or 0
-        elif b.status_id == 7: #заглушка
+        elif b.status_id == BookingStatus.PLACEHOLDER:
             placeholder += 1
+    return confirmed, pending, complit, placeholder, confirmed_fund, pending_fund, complit_fund
+
+
+def _render_owner_card(current_apartment: Apartment, stats: tuple) -> RenderedCard:
+    confirmed, pending, complit, placeholder, confirmed_fund, pending_fund, complit_fund = stats
     books = confirmed + pending + placeholder
 
-    text = (
+    body = (
         f"🏢 <b>{current_apartment.address}</b>\n\n"
         f"🏷 Тип: {current_apartment.apartment_type.name}\n"
         f"💰 Цена за ночь: {current_apartment.price} ₽\n"
@@ -38,9 +46,31 @@ def prepare_owner_objects_cards(current_apartment: Apartment, current_index: int
         f"💸 На сумму: {pending_fund}\n\n"
         f"⏳ Завершено: {complit}\n"
         f"💰 На сумму: {complit_fund}\n\n"
-        f"📍 {current_index+1} из {total}"
     )
 
+    action_rows = []
+    if books > 0:
+        action_rows.append((InlineKeyboardButton("🧑🏻‍💻 К бронированиям", callback_data=f"goto_{current_apartment.id}"),
+                            InlineKeyboardButton("Вернуться в меню➡️", callback_data="back_menu")))
+    action_rows.append((InlineKeyboardButton("📅 Занято", callback_data=f"placeholder_{current_apartment.id}"),
+                        InlineKeyboardButton("🛠 Изменить", callback_data=f"apt_upgrade_{current_apartment.id}"),
+                        InlineKeyboardButton("🗑 Удалить", callback_data=f"apt_delete_{current_apartment.id}")
+                        ))
+    action_rows.append((InlineKeyboardButton("📍 Посмотреть на карте", callback_data=f"owner_show_map_{current_apartment.id}"),))
+
+    return RenderedCard(body, action_rows=tuple(action_rows))
+
+
+def prepare_owner_objects_cards(current_apartment: Apartment, current_index: int, total: int) -> tuple[str, InlineKeyboardMarkup]:
+    """Возвращает текст и клавиатуру для карточки."""
+    # Статистика броней входит в ключ: новая бронь даёт новую отрисовку
+    stats = _booking_stats(current_apartment)
+    card = render_cache.get_or_render(
+        "owner", current_apartment.id, (current_apartment.updated_at, stats),
+        lambda: _render_owner_card(current_apartment, stats)
+    )
+    text = f"{card.body}📍 {current_index+1} из {total}"
+
     # кнопки навигации
     buttons = []
     if current_index > 0:
@@ -49,15 +79,8 @@ def prepare_owner_objects_cards(current_apartment: Apartment, current_index: int
         buttons.append(InlineKeyboardButton("➡️ Следующий", callback_data=f"apt_next_{current_index+1}"))
     
     buttons = [buttons] if buttons else []
-    if books > 0:
-        buttons.append([InlineKeyboardButton("🧑🏻‍💻 К бронированиям", callback_data=f"goto_{current_apartment.id}"),
-                        InlineKeyboardButton("Вернуться в меню➡️", callback_data="back_menu")])
-    buttons.append([InlineKeyboardButton("📅 Занято", callback_data=f"placeholder_{current_apartment.id}"),
-                    InlineKeyboardButton("🛠 Изменить", callback_data=f"apt_upgrade_{current_apartment.id}"),
-                    InlineKeyboardButton("🗑 Удалить", callback_data=f"apt_delete_{current_apartment.id}")
-                    ])
-    buttons.append([InlineKeyboardButton("📍 Посмотреть на карте", callback_data=f"owner_show_map_{current_apartment.id}")])
+    buttons.extend(card.action_rows)
 
     markup = InlineKeyboardMarkup(buttons)
     
-    return text, markup
\ No newline at end of file
+    return text, markup
@@ -10,6 +10,8 @@ from telegram import (
 
 from datetime import timedelta
 
+from utils.reference_data import BookingStatus
+
 def prepare_owner_orders_cards(current_booking: Booking, current_index: int, total: int) -> tuple[str, str | None, InlineKeyboardMarkup]:
     """Возвращает текст и клавиатуру для карточки."""
     apartment = current_booking.apartment
@@ -42,18 +44,18 @@ def prepare_owner_orders_cards(current_booking: Booking, current_index: int, tot
         buttons.append(InlineKeyboardButton("➡️ Следующий", callback_data=f"owner_book_next_{current_index+1}"))
     
     buttons = [buttons] if buttons else []
-    if status == 'ожидает подтверждения':
+    if current_booking.status_id == BookingStatus.PENDING:
         buttons.append([
             InlineKeyboardButton("✅ Подтвердить", callback_data=f"booking_confirm_{current_booking.id}"),
-            InlineKeyboardButton("❌ Отклонить", callback_data=f"booking_decline_8_{current_booking.id}")
+            InlineKeyboardButton("❌ Отклонить", callback_data=f"booking_decline_{BookingStatus.DECLINED.value}_{current_booking.id}")
     ])
-    if status == 'подтверждено':
-        buttons.append([InlineKeyboardButton("❌ Отменить", callback_data=f"booking_decline_10_{current_booking.id}"),
+    if current_booking.status_id == BookingStatus.CONFIRMED:
+        buttons.append([InlineKeyboardButton("❌ Отменить", callback_data=f"booking_decline_{BookingStatus.CANCELLED_BY_OWNER.value}_{current_booking.id}"),
                         InlineKeyboardButton("🕊 Написать гостю", callback_data=f"chat_booking_{current_booking.id}")])
 
-    if status == 'заглушка':
+    if current_booking.status_id == BookingStatus.PLACEHOLDER:
         buttons.append([
-            InlineKeyboardButton("❌ Отменить", callback_data=f"booking_decline_10_{current_booking.id}")
+            InlineKeyboardButton("❌ Отменить", callback_data=f"booking_decline_{BookingStatus.CANCELLED_BY_OWNER.value}_{current_booking.id}")
     ])
     buttons.append([InlineKeyboardButton("🔙 Вернуться назад", callback_data="back_to_objects")])
     markup = InlineKeyboardMarkup(buttons)
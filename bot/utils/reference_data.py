@@ -0,0 +1,124 @@
+import asyncio
+import os
+import time
+from enum import IntEnum
+
+from sqlalchemy import select
+
+from db.db_async import get_async_session
+from db.models.apartment_types import ApartmentType
+from db.models.booking_types import BookingType
+from db.models.roles import Role
+
+from utils.logging_config import structured_logger
+
+REFERENCE_DATA_REFRESH_SECONDS = int(os.getenv("REFERENCE_DATA_REFRESH_SECONDS", str(6 * 60 * 60)))
+
+
+class BookingStatus(IntEnum):
+    """Статусы брони (public.booking_types). Наличие ID проверяется при старте."""
+    PENDING = 5              # ожидает подтверждения
+    CONFIRMED = 6            # подтверждено
+    PLACEHOLDER = 7          # заглушка (занято собственником)
+    DECLINED = 8             # отклонено собственником
+    CANCELLED_BY_GUEST = 9   # отменено гостем
+    CANCELLED_BY_OWNER = 10  # отменено собственником
+    TIMEOUT = 11             # время истекло
+    COMPLETED = 12           # завершено
+
+
+# Брони, занимающие даты квартиры
+BLOCKING_STATUSES = (BookingStatus.PENDING, BookingStatus.CONFIRMED, BookingStatus.PLACEHOLDER)
+# Брони гостей, ещё не завершённые
+ACTIVE_STATUSES = (BookingStatus.PENDING, BookingStatus.CONFIRMED)
+# Финальные статусы: бронь больше нельзя отменить
+FINAL_STATUSES = (
+    BookingStatus.DECLINED,
+    BookingStatus.CANCELLED_BY_GUEST,
+    BookingStatus.CANCELLED_BY_OWNER,
+    BookingStatus.TIMEOUT,
+    BookingStatus.COMPLETED,
+)
+
+
+class ReferenceData:
+    """
+    Справочники (apartment_types, booking_types, roles) в памяти процесса.
+
+    Загружаются один раз при старте и перечитываются по таймеру или сигналу.
+    Если справочник устарел (например, в процессе API без JobQueue),
+    он перечитывается при следующем обращении.
+    """
+
+    def __init__(self, max_age: int = REFERENCE_DATA_REFRESH_SECONDS):
+        self.max_age = max_age
+        self._apartment_types: tuple[dict, ...] = ()
+        self._booking_types: dict[int, str] = {}
+        self._roles: dict[int, str] = {}
+        self._loaded_at: float | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self._loaded_at is not None
+
+    async def load(self) -> None:
+        async with self._lock:
+            async with get_async_session() as session:
+                apartment_types = (await session.execute(
+                    select(ApartmentType.id, ApartmentType.name).order_by(ApartmentType.id)
+                )).all()
+                booking_types = (await session.execute(select(BookingType.id, BookingType.name))).all()
+                roles = (await session.execute(select(Role.id, Role.name))).all()
+
+            self._apartment_types = tuple({"id": t_id, "name": name} for t_id, name in apartment_types)
+            self._booking_types = dict(booking_types)
+            self._roles = dict(roles)
+            self._loaded_at = time.monotonic()
+
+        structured_logger.info(
+            "Reference data loaded",
+            action="reference_data_load",
+            context={
+                'apartment_types': len(self._apartment_types),
+                'booking_types': len(self._booking_types),
+                'roles': len(self._roles)
+            }
+        )
+
+    def verify_booking_statuses(self) -> None:
+        """Сверяет BookingStatus со справочником в БД."""
+        missing = [status.name for status in BookingStatus if status not in self._booking_types]
+        if missing:
+            raise RuntimeError(f"booking_types is missing statuses: {', '.join(missing)}")
+
+    async def ensure_fresh(self) -> None:
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.max_age:
+            await self.load()
+
+    async def apartment_types(self) -> list[dict]:
+        """Типы квартир в виде [{"id", "name"}], упорядоченные по id."""
+        await self.ensure_fresh()
+        return [dict(t) for t in self._apartment_types]
+
+    def booking_type_name(self, status_id: int) -> str | None:
+        return self._booking_types.get(status_id)
+
+    def role_name(self, role_id: int) -> str | None:
+        return self._roles.get(role_id)
+
+
+reference_data = ReferenceData()
+
+
+async def refresh_reference_data(context=None):
+    """Перечитывает справочники (JobQueue или SIGHUP)."""
+    try:
+        await reference_data.load()
+        reference_data.verify_booking_statuses()
+    except Exception as e:
+        structured_logger.error(
+            f"Reference data refresh failed: {e}",
+            action="reference_data_refresh",
+            exception=e
+        )
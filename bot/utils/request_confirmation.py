@@ -2,21 +2,21 @@ from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 
 from datetime import timedelta
 
-from utils.message_tricks import send_and_pin_message
+from utils.outbox import enqueue
+from utils.reference_data import BookingStatus
 
 
 
-async def send_booking_request_to_owner(bot, booking):
-    owner_chat_id = booking.apartment.owner.tg_user_id
-    print(f"[DEBUG] Вызов send_booking_request_to_owner для owner_id={owner_chat_id}")
+def enqueue_booking_request_to_owner(session, booking):
     """
-    Отправляет владельцу сообщение о новом бронировании с кнопками подтверждения/отклонения.
-    
-    :param bot: экземпляр telegram.Bot
+    Ставит в outbox сообщение владельцу о новом бронировании с кнопками подтверждения/отклонения.
+    Вызывается до commit брони — сообщение и бронь сохраняются одной транзакцией.
+
+    :param session: AsyncSession транзакции, создающей бронь
     :param booking: объект Booking с подгруженными apartment и owner
     """
+    owner_chat_id = booking.apartment.owner.tg_user_id
 
-    
     timeout_deadline = (booking.created_at + timedelta(hours=27)).strftime("%Y-%m-%d %H:%M")  # N + 3 часа GMT
 
     # Расчет комиссии
@@ -43,21 +43,19 @@ async def send_booking_request_to_owner(bot, booking):
     keyboard = [
         [
             InlineKeyboardButton("✅ Подтвердить", callback_data=f"booking_confirm_{booking.id}"),
-            InlineKeyboardButton("❌ Отклонить", callback_data=f"booking_decline_8_{booking.id}")
+            InlineKeyboardButton("❌ Отклонить", callback_data=f"booking_decline_{BookingStatus.DECLINED.value}_{booking.id}")
         ]
     ]
     reply_markup = InlineKeyboardMarkup(keyboard)
 
-    # Отправка сообщения
-    #await bot.pin_message(
-    #    chat_id=owner_chat_id,
-    #    text=text,
-    #    parse_mode="HTML",
-    #    reply_markup=reply_markup
-    #)
-    await send_and_pin_message(
-        bot=bot,
+    # Отправку и закрепление выполнит диспетчер outbox
+    enqueue(
+        session,
         chat_id=owner_chat_id,
         text=text,
-        reply_markup=reply_markup
+        kind="booking_request",
+        booking_id=booking.id,
+        parse_mode="HTML",
+        reply_markup=reply_markup,
+        pin=True
     )
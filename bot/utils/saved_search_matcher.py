@@ -0,0 +1,325 @@
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import select, update as sa_update, func
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import TelegramError
+
+from db.db_async import get_async_session
+from db.models.apartments import Apartment
+from db.models.bookings import Booking
+from db.models.saved_searches import SavedSearch
+from db.models.search_sessions import SearchSession
+
+from utils.apts_search_session import build_search_stmt
+from utils.flexible_search import find_flexible_matches
+from utils.logging_config import structured_logger
+
+# Ширина корзины интервального индекса, ночей
+BUCKET_NIGHTS = 7
+
+
+def _buckets(check_in: date, check_out: date) -> range:
+    """Корзины, покрывающие ночи [check_in, check_out)."""
+    return range(check_in.toordinal() // BUCKET_NIGHTS, (check_out.toordinal() - 1) // BUCKET_NIGHTS + 1)
+
+
+class _Entry:
+    __slots__ = ("id", "tg_user_id", "check_in", "check_out", "flex", "type_ids", "filters", "notified")
+
+    def __init__(self, saved: SavedSearch):
+        self.id = saved.id
+        self.tg_user_id = saved.tg_user_id
+        self.check_in = saved.check_in
+        self.check_out = saved.check_out
+        self.flex = int((saved.filters or {}).get("flex") or 0)   # гибкие даты ±flex дней
+        self.type_ids = frozenset(saved.type_ids or ())
+        self.filters = saved.filters
+        self.notified = set(saved.notified_apartment_ids or ())
+
+    @property
+    def window(self) -> tuple[date, date]:
+        """Ночи, которые может занять поиск с учётом сдвига: [check_in - flex, check_out + flex)."""
+        shift = timedelta(days=self.flex)
+        return self.check_in - shift, self.check_out + shift
+
+
+class SavedSearchIndex:
+    """
+    Интервальный индекс активных сохранённых поисков.
+
+    Поиски разложены по недельным корзинам ночей своего окна (с гибкими
+    датами — расширенного на ±flex): изменение занятости [check_in, check_out)
+    проверяет только поиски из пересекающихся корзин и подходящего типа,
+    а не весь список.
+    """
+
+    def __init__(self):
+        self._entries: dict[int, _Entry] = {}
+        self._buckets: dict[int, set[int]] = {}
+        self.ready = False
+
+    def __len__(self):
+        return len(self._entries)
+
+    async def load(self) -> None:
+        async with get_async_session() as session:
+            result = await session.execute(
+                select(SavedSearch).where(
+                    SavedSearch.is_active.is_(True),
+                    SavedSearch.check_in > func.current_date()
+                )
+            )
+            saved = result.scalars().all()
+
+        self._entries.clear()
+        self._buckets.clear()
+        for s in saved:
+            self.add(s)
+        self.ready = True
+
+    def add(self, saved: SavedSearch) -> None:
+        entry = _Entry(saved)
+        self.remove(entry.id)
+        self._entries[entry.id] = entry
+        for b in _buckets(*entry.window):
+            self._buckets.setdefault(b, set()).add(entry.id)
+
+    def remove(self, saved_id: int) -> None:
+        entry = self._entries.pop(saved_id, None)
+        if entry is None:
+            return
+        for b in _buckets(*entry.window):
+            ids = self._buckets.get(b)
+            if ids:
+                ids.discard(saved_id)
+                if not ids:
+                    del self._buckets[b]
+
+    def candidates(self, check_in: date | None, check_out: date | None, type_id: int) -> list[_Entry]:
+        """
+        Поиски, чьё окно пересекается с [check_in, check_out) и тип подходит.
+        Без дат (публикация квартиры) — все поиски, кроме уже начавшихся.
+        """
+        today = date.today()
+        if check_in is None or check_out is None:
+            ids = self._entries.keys()
+        else:
+            ids = set()
+            for b in _buckets(check_in, check_out):
+                ids |= self._buckets.get(b, set())
+
+        matched = []
+        for saved_id in ids:
+            entry = self._entries[saved_id]
+            if entry.check_in <= today:
+                continue
+            if check_in is not None:
+                window_in, window_out = entry.window
+                if not (window_in < check_out and check_in < window_out):
+                    continue
+            if entry.type_ids and type_id not in entry.type_ids:
+                continue
+            matched.append(entry)
+        return matched
+
+    def expire(self) -> list[int]:
+        """Убирает из индекса поиски с наступившей датой заезда."""
+        today = date.today()
+        expired = [e.id for e in self._entries.values() if e.check_in <= today]
+        for saved_id in expired:
+            self.remove(saved_id)
+        return expired
+
+
+saved_search_index = SavedSearchIndex()
+
+
+async def save_search(search_session_id: int, tg_user_id: int) -> SavedSearch | None:
+    """Сохраняет фильтры поиска из search_sessions и добавляет их в индекс."""
+    async with get_async_session() as session:
+        search = await session.get(SearchSession, search_session_id)
+        if search is None or search.tg_user_id != tg_user_id:
+            return None
+
+        filters = search.filters
+        check_in = date.fromisoformat(filters["check_in"])
+        check_out = date.fromisoformat(filters["check_out"])
+
+        # Повторное нажатие кнопки не создаёт дубликат
+        existing = (await session.execute(
+            select(SavedSearch).where(
+                SavedSearch.search_session_id == search_session_id,
+                SavedSearch.is_active.is_(True)
+            )
+        )).scalar_one_or_none()
+        if existing:
+            return existing
+
+        saved = SavedSearch(
+            tg_user_id=tg_user_id,
+            search_session_id=search_session_id,
+            filters=filters,
+            check_in=check_in,
+            check_out=check_out,
+            type_ids=filters.get("type_ids") or None,
+            notified_apartment_ids=[]
+        )
+        session.add(saved)
+        await session.commit()
+
+    saved_search_index.add(saved)
+    return saved
+
+
+async def match_apartment(bot, apartment_id: int, check_in: date | None = None, check_out: date | None = None) -> int:
+    """
+    Проверяет сохранённые поиски, которых касается изменение квартиры:
+    освободились даты [check_in, check_out) или квартира опубликована (даты None).
+    Возвращает число отправленных уведомлений.
+    """
+    if not saved_search_index.ready:
+        return 0
+
+    async with get_async_session() as session:
+        apartment = await session.get(Apartment, apartment_id)
+    if apartment is None or apartment.is_draft or not apartment.is_active:
+        return 0
+
+    candidates = [
+        e for e in saved_search_index.candidates(check_in, check_out, apartment.type_id)
+        if apartment_id not in e.notified
+    ]
+    if not candidates:
+        return 0
+
+    matched = []
+    for entry in candidates:
+        shift = await _match_shift(entry, apartment_id)
+        if shift is not None:
+            matched.append((entry, shift))
+
+    if matched:
+        async with get_async_session() as session:
+            await session.execute(
+                sa_update(SavedSearch)
+                .where(SavedSearch.id.in_([e.id for e, _ in matched]))
+                .values(
+                    notified_apartment_ids=func.array_append(SavedSearch.notified_apartment_ids, apartment_id),
+                    last_notified_at=datetime.now(timezone.utc)
+                )
+            )
+            await session.commit()
+
+    # Индекс и отправка — только после commit и вне транзакции
+    sent = 0
+    for entry, shift in matched:
+        entry.notified.add(apartment_id)
+        if await _notify(bot, entry, apartment.short_address, shift):
+            sent += 1
+
+    structured_logger.info(
+        "Saved searches matched",
+        action="saved_search_match",
+        context={
+            'apartment_id': apartment_id,
+            'candidates': len(candidates),
+            'notified': sent,
+            'indexed': len(saved_search_index)
+        }
+    )
+    return sent
+
+
+async def match_freed_booking(bot, booking: Booking) -> int:
+    """Бронь снята (отклонена, отменена, истекла) — её даты снова свободны."""
+    try:
+        return await match_apartment(bot, booking.apartment_id, booking.check_in, booking.check_out)
+    except Exception as e:
+        structured_logger.error(
+            f"Saved search matching failed: {e}",
+            action="saved_search_match",
+            exception=e,
+            context={'booking_id': booking.id}
+        )
+        return 0
+
+
+async def match_published_apartment(bot, apartment_id: int) -> int:
+    try:
+        return await match_apartment(bot, apartment_id)
+    except Exception as e:
+        structured_logger.error(
+            f"Saved search matching failed: {e}",
+            action="saved_search_match",
+            exception=e,
+            context={'apartment_id': apartment_id}
+        )
+        return 0
+
+
+async def _match_shift(entry: _Entry, apartment_id: int) -> int | None:
+    """
+    Точная проверка фильтров и занятости — по одной квартире. Возвращает сдвиг
+    дат, с которым квартира свободна (0 — точные даты), или None.
+    """
+    if entry.flex:
+        matches = await find_flexible_matches(
+            build_search_stmt(None, None, entry.filters).where(Apartment.id == apartment_id).limit(None),
+            entry.check_in, entry.check_out, entry.flex
+        )
+        return matches[0][1] if matches else None
+
+    stmt = (
+        build_search_stmt(entry.check_in, entry.check_out, entry.filters, source="bookings")
+        .where(Apartment.id == apartment_id)
+        .limit(None)
+        .with_only_columns(Apartment.id)
+    )
+    async with get_async_session() as session:
+        found = (await session.execute(stmt)).first()
+    return 0 if found is not None else None
+
+
+async def _notify(bot, entry: _Entry, short_address: str, shift: int = 0) -> bool:
+    check_in = entry.check_in + timedelta(days=shift)
+    check_out = entry.check_out + timedelta(days=shift)
+    text = (
+        "🔔 По вашему сохранённому поиску появился вариант!\n\n"
+        f"🏠 {short_address}\n"
+        f"📅 {check_in:%d.%m} – {check_out:%d.%m}"
+        f"{f' (сдвиг {shift:+d} дн.)' if shift else ''}\n\n"
+        "Запустите поиск, чтобы посмотреть и забронировать."
+    )
+    try:
+        await bot.send_message(
+            chat_id=entry.tg_user_id,
+            text=text,
+            reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("🔍 Новый поиск", callback_data="start_search")]])
+        )
+        return True
+    except TelegramError as e:
+        structured_logger.warning(
+            f"Saved search notification failed: {e}",
+            action="saved_search_notify",
+            context={'saved_search_id': entry.id, 'tg_user_id': entry.tg_user_id}
+        )
+        return False
+
+
+async def expire_saved_searches(context):
+    """Ежедневно снимает с учёта поиски с наступившей датой заезда (JobQueue)."""
+    try:
+        saved_search_index.expire()
+        async with get_async_session() as session:
+            await session.execute(
+                sa_update(SavedSearch)
+                .where(SavedSearch.is_active.is_(True), SavedSearch.check_in <= func.current_date())
+                .values(is_active=False)
+            )
+            await session.commit()
+    except Exception as e:
+        structured_logger.error(
+            f"Saved search expiry failed: {e}",
+            action="saved_search_expire",
+            exception=e
+        )
@@ -0,0 +1,136 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Awaitable, Callable
+
+from utils.cache_stats import register_cache_stats, hit_ratio
+
+SEARCH_CACHE_TTL_SECONDS = 120
+SEARCH_CACHE_SIZE = 256
+
+
+class _SearchEntry:
+    __slots__ = ("expires_at", "check_in", "check_out", "type_ids", "apartment_ids")
+
+    def __init__(self, expires_at: float, filters: dict, apartment_ids: tuple):
+        self.expires_at = expires_at
+        self.check_in = _to_date(filters.get("check_in"))
+        self.check_out = _to_date(filters.get("check_out"))
+        # Гибкий поиск зависит от броней во всём расширенном окне
+        flex = filters.get("flex") or 0
+        if flex and self.check_in and self.check_out:
+            self.check_in -= timedelta(days=flex)
+            self.check_out += timedelta(days=flex)
+        self.type_ids = frozenset(filters.get("type_ids") or ())
+        self.apartment_ids = apartment_ids
+
+
+def _to_date(value) -> date | None:
+    if value is None or isinstance(value, date):
+        return value
+    return date.fromisoformat(value)
+
+
+class SearchResultCache:
+    """
+    Общий кэш результатов поиска, ключ — нормализованный словарь filters.
+
+    Запись живёт SEARCH_CACHE_TTL_SECONDS и точечно сбрасывается, когда меняется
+    бронь в пересекающемся диапазоне дат или квартира подходящего типа.
+    Одновременные одинаковые промахи ждут один общий запрос к БД.
+    Значение — то, что вернул загрузчик: ID квартир, для гибкого поиска —
+    пары (ID, сдвиг дат), для постраничной выдачи — (первая страница, курсор)
+    и отдельной записью (число результатов,).
+    """
+
+    def __init__(self, ttl: float = SEARCH_CACHE_TTL_SECONDS, max_size: int = SEARCH_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: OrderedDict[str, _SearchEntry] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future] = {}
+        # Растёт при каждой инвалидации: результат запроса, начатого до неё, не кэшируем
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(filters: dict) -> str:
+        normalized = dict(filters)
+        normalized["type_ids"] = sorted(filters.get("type_ids") or [])
+        return json.dumps(normalized, sort_keys=True, default=str)
+
+    async def get_or_load(
+        self,
+        filters: dict,
+        loader: Callable[[], Awaitable[list]]
+    ) -> tuple:
+        key = self.make_key(filters)
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.expires_at > time.monotonic():
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry.apartment_ids
+            del self._entries[key]
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(inflight)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        generation = self._generation
+        try:
+            apartment_ids = tuple(await loader())
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # ожидающих может не быть — помечаем исключение полученным
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        if generation == self._generation:
+            self._entries[key] = _SearchEntry(time.monotonic() + self.ttl, filters, apartment_ids)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        future.set_result(apartment_ids)
+        return apartment_ids
+
+    def invalidate_dates(self, check_in: date, check_out: date) -> None:
+        """Сбрасывает поиски, чей диапазон [check_in, check_out) пересекается с заданным."""
+        self._invalidate(
+            lambda e: e.check_in is None or e.check_out is None
+            or (e.check_in < check_out and check_in < e.check_out)
+        )
+
+    def invalidate_type(self, type_id: int | None) -> None:
+        """Сбрасывает поиски, в выдачу которых может попасть квартира данного типа."""
+        self._invalidate(lambda e: type_id is None or not e.type_ids or type_id in e.type_ids)
+
+    def _invalidate(self, predicate: Callable[[_SearchEntry], bool]) -> None:
+        self._generation += 1
+        stale = [key for key, entry in self._entries.items() if predicate(entry)]
+        for key in stale:
+            del self._entries[key]
+        self.invalidations += len(stale)
+
+    def stats(self) -> dict:
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'invalidations': self.invalidations,
+            'hit_ratio': hit_ratio(self.hits + self.coalesced, self.misses),
+        }
+
+
+search_cache = SearchResultCache()
+register_cache_stats("search_results", search_cache.stats)
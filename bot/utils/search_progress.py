@@ -0,0 +1,66 @@
+from sqlalchemy import update as sa_update, case
+
+from db.db_async import get_async_session
+from db.models.search_sessions import SearchSession
+
+from utils.logging_config import structured_logger
+
+FLUSH_INTERVAL_SECONDS = 5
+
+
+class SearchProgressTracker:
+    """
+    Write-behind буфер позиции пагинации (search_sessions.current_index).
+
+    Навигация по карточкам только запоминает последний индекс в памяти,
+    а в БД изменения уходят пачкой — одним UPDATE раз в несколько секунд
+    и при остановке бота.
+    """
+
+    def __init__(self):
+        self._dirty: dict[int, int] = {}
+
+    def record(self, search_id: int, index: int) -> None:
+        self._dirty[search_id] = index
+
+    def __len__(self):
+        return len(self._dirty)
+
+    async def flush(self) -> int:
+        """Записывает накопленные позиции одним запросом. Возвращает число строк."""
+        if not self._dirty:
+            return 0
+
+        batch, self._dirty = self._dirty, {}
+        try:
+            async with get_async_session() as session:
+                await session.execute(
+                    sa_update(SearchSession)
+                    .where(SearchSession.id.in_(batch.keys()))
+                    .values(current_index=case(batch, value=SearchSession.id))
+                    .execution_options(synchronize_session=False)
+                )
+                await session.commit()
+        except Exception:
+            # Возвращаем несохранённое в буфер, не затирая более свежие позиции
+            for search_id, index in batch.items():
+                self._dirty.setdefault(search_id, index)
+            raise
+
+        return len(batch)
+
+
+search_progress = SearchProgressTracker()
+
+
+async def flush_search_progress(context):
+    """Периодический сброс буфера пагинации в БД (JobQueue)."""
+    try:
+        await search_progress.flush()
+    except Exception as e:
+        structured_logger.error(
+            f"Search progress flush failed: {e}",
+            action="search_progress_flush",
+            exception=e,
+            context={'pending': len(search_progress)}
+        )
@@ -0,0 +1,228 @@
+import asyncio
+import time
+from collections import deque
+from enum import IntEnum
+from typing import Any, Callable, Coroutine
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+from utils.cache_stats import register_cache_stats
+from utils.logging_config import structured_logger
+
+# Лимиты Telegram: ~30 сообщений/с на бота, ~1/с в личный чат, 20/мин в группу
+GLOBAL_RATE, GLOBAL_BURST = 30.0, 30
+CHAT_RATE, CHAT_BURST = 1.0, 3          # карточка — это альбом и сообщение подряд
+GROUP_RATE, GROUP_BURST = 20 / 60, 5
+MAX_RETRIES = 2
+# Сколько ожидающих в полосе просматривается в поисках свободного чата
+LANE_SCAN_LIMIT = 100
+# Раз в столько секунд забываются бакеты чатов, успевшие наполниться
+BUCKET_CLEANUP_SECONDS = 60
+
+
+class Lane(IntEnum):
+    """Полосы приоритета исходящих запросов: меньше — важнее."""
+    INTERACTIVE = 0   # ответы на действия пользователя
+    NOTIFICATION = 1  # уведомления по броням (outbox)
+    BROADCAST = 2     # рассылки
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Через сколько секунд появится токен (0 — есть сейчас)."""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+
+class _Waiter:
+    __slots__ = ("future", "chat_id", "enqueued_at")
+
+    def __init__(self, future: asyncio.Future, chat_id: int, enqueued_at: float):
+        self.future = future
+        self.chat_id = chat_id
+        self.enqueued_at = enqueued_at
+
+
+class PrioritySendScheduler(BaseRateLimiter[int]):
+    """
+    Общий планировщик исходящих запросов бота (ApplicationBuilder.rate_limiter).
+
+    Запрос с chat_id ждёт токена из общего бакета и бакета своего чата (для групп —
+    с лимитом 20/мин); токены выдаются строго по приоритету полос: уведомления и рассылки
+    получают только токены, не нужные интерактивным ответам. Внутри полосы
+    ожидающий, чей чат исчерпал лимит, не задерживает остальных.
+    Запросы без chat_id (getUpdates, answerCallbackQuery) проходят сразу.
+    RetryAfter приостанавливает выдачу на указанное время, запрос повторяется
+    до MAX_RETRIES раз. Полоса передаётся через rate_limit_args, по умолчанию —
+    INTERACTIVE.
+    """
+
+    def __init__(self):
+        self._global = TokenBucket(GLOBAL_RATE, GLOBAL_BURST)
+        self._chats: dict[int, TokenBucket] = {}
+        self._lanes: dict[Lane, deque[_Waiter]] = {lane: deque() for lane in Lane}
+        self._paused_until = 0.0
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._last_cleanup = 0.0
+        self.granted = {lane: 0 for lane in Lane}
+        self.wait_total = {lane: 0.0 for lane in Lane}
+        self.wait_max = {lane: 0.0 for lane in Lane}
+        self.retry_after = 0
+
+    async def initialize(self) -> None:
+        # ExtBot.initialize вызывается и из Application, и из Updater
+        if self._task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def shutdown(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for queue in self._lanes.values():
+            while queue:
+                queue.popleft().future.cancel()
+
+    async def process_request(
+        self,
+        callback: Callable[..., Coroutine[Any, Any, Any]],
+        args: Any,
+        kwargs: dict[str, Any],
+        endpoint: str,
+        data: dict[str, Any],
+        rate_limit_args: int | None
+    ):
+        chat_id = data.get("chat_id")
+        if chat_id is None or self._task is None:
+            return await callback(*args, **kwargs)
+
+        lane = Lane(rate_limit_args) if rate_limit_args is not None else Lane.INTERACTIVE
+        chat_key = chat_id if isinstance(chat_id, int) else hash(chat_id)  # @channelusername
+
+        for attempt in range(MAX_RETRIES + 1):
+            await self._acquire(lane, chat_key)
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as e:
+                self.retry_after += 1
+                self._paused_until = max(self._paused_until, time.monotonic() + float(e.retry_after))
+                structured_logger.warning(
+                    f"Telegram flood control: retry after {e.retry_after}s",
+                    action="send_scheduler",
+                    context={'endpoint': endpoint, 'chat_id': chat_id, 'lane': lane.name, 'attempt': attempt}
+                )
+                if attempt == MAX_RETRIES:
+                    raise
+
+    async def _acquire(self, lane: Lane, chat_key: int) -> None:
+        future = asyncio.get_running_loop().create_future()
+        self._lanes[lane].append(_Waiter(future, chat_key, time.monotonic()))
+        self._wakeup.set()
+        await future
+
+    async def _run(self) -> None:
+        while True:
+            delay = self._grant(time.monotonic())
+            if delay == 0:
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def _grant(self, now: float) -> float | None:
+        """
+        Выдаёт один токен самому приоритетному ожидающему, которому он доступен.
+        Возвращает 0 — выдан, можно продолжать; иначе сколько ждать (None — некого).
+        """
+        if now < self._paused_until:
+            return self._paused_until - now
+
+        self._cleanup(now)
+        soonest = None
+        for lane in Lane:
+            queue = self._lanes[lane]
+            for i, waiter in enumerate(queue):
+                if i >= LANE_SCAN_LIMIT:
+                    break
+                if waiter.future.done():
+                    del queue[i]
+                    return 0
+
+                global_wait = self._global.wait_time(now)
+                if global_wait > 0:
+                    return global_wait
+
+                chat_wait = self._chat_bucket(waiter.chat_id).wait_time(now)
+                if chat_wait > 0:
+                    soonest = chat_wait if soonest is None else min(soonest, chat_wait)
+                    continue
+
+                self._global.take()
+                self._chat_bucket(waiter.chat_id).take()
+                del queue[i]
+                waited = now - waiter.enqueued_at
+                self.granted[lane] += 1
+                self.wait_total[lane] += waited
+                self.wait_max[lane] = max(self.wait_max[lane], waited)
+                waiter.future.set_result(None)
+                return 0
+        return soonest
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            # Отрицательные chat_id — группы и каналы
+            bucket = TokenBucket(GROUP_RATE, GROUP_BURST) if chat_id < 0 else TokenBucket(CHAT_RATE, CHAT_BURST)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    def _cleanup(self, now: float) -> None:
+        if now - self._last_cleanup < BUCKET_CLEANUP_SECONDS:
+            return
+        self._last_cleanup = now
+        waiting = {w.chat_id for queue in self._lanes.values() for w in queue}
+        for chat_id, bucket in list(self._chats.items()):
+            if chat_id not in waiting and bucket.wait_time(now) == 0 and bucket.tokens >= bucket.capacity:
+                # Полный бакет неотличим от нового
+                del self._chats[chat_id]
+
+    def stats(self) -> dict:
+        return {
+            'queued': {lane.name.lower(): len(queue) for lane, queue in self._lanes.items()},
+            'granted': {lane.name.lower(): n for lane, n in self.granted.items()},
+            'wait_avg_ms': {
+                lane.name.lower(): round(self.wait_total[lane] / self.granted[lane] * 1000) if self.granted[lane] else None
+                for lane in Lane
+            },
+            'wait_max_ms': {lane.name.lower(): round(self.wait_max[lane] * 1000) for lane in Lane},
+            'retry_after': self.retry_after,
+            'chats_tracked': len(self._chats),
+        }
+
+
+send_scheduler = PrioritySendScheduler()
+register_cache_stats("send_scheduler", send_scheduler.stats)
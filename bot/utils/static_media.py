@@ -0,0 +1,140 @@
+import asyncio
+import hashlib
+import os
+from pathlib import Path
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from telegram.error import TelegramError
+
+from db.db_async import get_async_session
+from db.models.static_media import StaticMedia
+
+from utils.cache_stats import register_cache_stats, hit_ratio
+from utils.logging_config import structured_logger
+
+ADMIN_CHAT_ID = int(os.getenv("ADMIN_CHAT_ID"))
+STATIC_DIR = Path(__file__).resolve().parent.parent / "static"
+PHOTO_SUFFIXES = {".jpg", ".jpeg", ".png"}
+
+
+class StaticMediaRegistry:
+    """
+    file_id статических картинок бота.
+
+    Картинка загружается в Telegram один раз — в чат администратора, —
+    полученный file_id сохраняется в public.static_media по SHA-256 содержимого
+    и дальше отправляется вместо файла. Хэш файла пересчитывается, только
+    если изменились его размер или mtime.
+    """
+
+    def __init__(self):
+        self._hashes: dict[str, tuple[int, int, str]] = {}   # путь -> (mtime_ns, size, sha256)
+        self._file_ids: dict[str, str] = {}                  # sha256 -> file_id
+        self._locks: dict[str, asyncio.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.uploads = 0
+
+    async def load(self) -> None:
+        """Загружает сохранённые file_id (post_init)."""
+        async with get_async_session() as session:
+            rows = (await session.execute(select(StaticMedia.sha256, StaticMedia.file_id))).all()
+        self._file_ids = dict(rows)
+
+    async def photo(self, bot, path: str) -> str:
+        """
+        file_id картинки для send_photo / reply_photo. При первом обращении
+        загружает файл. FileNotFoundError — файла нет, TelegramError — загрузка
+        не удалась.
+        """
+        sha256 = await self._sha256(path)
+        file_id = self._file_ids.get(sha256)
+        if file_id:
+            self.hits += 1
+            return file_id
+
+        # Параллельные первые обращения к одной картинке ждут одну загрузку
+        async with self._locks.setdefault(sha256, asyncio.Lock()):
+            file_id = self._file_ids.get(sha256)
+            if file_id:
+                self.hits += 1
+                return file_id
+            self.misses += 1
+
+            async with get_async_session() as session:
+                file_id = await session.scalar(select(StaticMedia.file_id).where(StaticMedia.sha256 == sha256))
+            if file_id is None:
+                file_id = await self._upload(bot, path, sha256)
+            self._file_ids[sha256] = file_id
+            return file_id
+
+    async def warm_up(self, bot) -> None:
+        """Загружает заранее все картинки из bot/static, чтобы первый пользователь не ждал загрузки."""
+        for path in sorted(STATIC_DIR.rglob("*")):
+            if path.suffix.lower() not in PHOTO_SUFFIXES:
+                continue
+            try:
+                await self.photo(bot, str(path))
+            except (OSError, TelegramError) as e:
+                structured_logger.warning(
+                    f"Static media upload failed: {e}",
+                    action="static_media",
+                    context={'path': str(path)}
+                )
+
+    async def _sha256(self, path: str) -> str:
+        stat = os.stat(path)
+        cached = self._hashes.get(path)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+        sha256 = await asyncio.to_thread(_file_sha256, path)
+        self._hashes[path] = (stat.st_mtime_ns, stat.st_size, sha256)
+        return sha256
+
+    async def _upload(self, bot, path: str, sha256: str) -> str:
+        with open(path, "rb") as f:
+            message = await bot.send_photo(
+                chat_id=ADMIN_CHAT_ID,
+                photo=f,
+                caption=f"static: {os.path.basename(path)}",
+                disable_notification=True
+            )
+        file_id = message.photo[-1].file_id
+
+        async with get_async_session() as session:
+            await session.execute(
+                pg_insert(StaticMedia)
+                .values(sha256=sha256, path=path[:255], file_id=file_id)
+                .on_conflict_do_update(index_elements=["sha256"], set_={"path": path[:255], "file_id": file_id})
+            )
+            await session.commit()
+
+        self.uploads += 1
+        structured_logger.info(
+            "Static media uploaded",
+            action="static_media",
+            context={'path': path, 'sha256': sha256[:12], 'size': os.path.getsize(path)}
+        )
+        return file_id
+
+    def stats(self) -> dict:
+        return {
+            'cached': len(self._file_ids),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': hit_ratio(self.hits, self.misses),
+            'uploads': self.uploads,
+        }
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+static_media = StaticMediaRegistry()
+register_cache_stats("static_media", static_media.stats)
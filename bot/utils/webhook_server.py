@@ -0,0 +1,99 @@
+import hmac
+import json
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response
+from starlette.routing import Route
+from telegram import Update
+from telegram.ext import Application
+
+from utils.logging_config import structured_logger
+
+WEBHOOK_PATH = "/telegram"
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def build_webhook_app(application: Application, secret_token: str) -> Starlette:
+    """
+    ASGI-приложение вебхука. Запрос с верным секретом подтверждается сразу
+    после постановки апдейта в application.update_queue — обработка идёт
+    в PTB, Telegram не ждёт ответа хендлеров.
+    """
+    expected = secret_token.encode()
+
+    async def telegram_update(request: Request) -> Response:
+        received = request.headers.get(SECRET_HEADER, "").encode()
+        if not hmac.compare_digest(received, expected):
+            structured_logger.warning(
+                "Webhook request with invalid secret token",
+                action="webhook",
+                context={'client': request.client.host if request.client else None}
+            )
+            return Response(status_code=403)
+
+        try:
+            update = Update.de_json(await request.json(), application.bot)
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+            structured_logger.warning(
+                f"Webhook received malformed update: {e}",
+                action="webhook"
+            )
+            return Response(status_code=400)
+
+        if update is not None:
+            await application.update_queue.put(update)
+        return Response(status_code=200)
+
+    async def healthz(request: Request) -> Response:
+        return PlainTextResponse("ok")
+
+    return Starlette(routes=[
+        Route(WEBHOOK_PATH, telegram_update, methods=["POST"]),
+        Route("/healthz", healthz, methods=["GET"]),
+    ])
+
+
+def create_webhook_server(application: Application, secret_token: str, host: str, port: int) -> uvicorn.Server:
+    """uvicorn-сервер вебхука; остановить — server.should_exit = True или SIGINT/SIGTERM."""
+    return uvicorn.Server(uvicorn.Config(
+        build_webhook_app(application, secret_token),
+        host=host,
+        port=port,
+        log_level="warning",
+        access_log=False
+    ))
+
+
+async def run_webhook(application: Application, server: uvicorn.Server, url: str, secret_token: str) -> None:
+    """
+    Запускает бота в режиме вебхука и ждёт остановки сервера.
+
+    run_polling сам вызывает post_init/post_shutdown и регистрирует вебхук,
+    здесь это делается вручную. set_webhook идемпотентен, поэтому несколько
+    процессов за балансировщиком могут вызывать его одновременно.
+    """
+    await application.initialize()
+    try:
+        if application.post_init:
+            await application.post_init(application)
+        await application.bot.set_webhook(
+            url=url.rstrip("/") + WEBHOOK_PATH,
+            secret_token=secret_token,
+            allowed_updates=Update.ALL_TYPES
+        )
+        await application.start()
+        structured_logger.info(
+            "Webhook server started",
+            action="webhook",
+            context={'url': url, 'host': server.config.host, 'port': server.config.port}
+        )
+        try:
+            await server.serve()
+        finally:
+            await application.stop()
+    finally:
+        await application.shutdown()
+        if application.post_shutdown:
+            await application.post_shutdown(application)